@@ -0,0 +1,124 @@
+"""Persistent cache of the resolved programs.
+
+A program is stored in __loxcache__/<name>.loxc next to its script, as a pickle
+of the resolved statements and of the global table they index behind a header. The header holds a key, hashed from
+the source, the options it was compiled with and the cache tag, a hash of the
+interpreter version and of the sources of the package. A cache file
+whose key doesn't match is stale, it's recompiled and rewritten.
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import sys
+from typing import List, Optional
+from pylox import __version__
+from pylox.environment.environment import bind_global_slots, global_slots
+
+CACHE_DIR = "__loxcache__"
+MAGIC = b"LOXC"
+
+# Directory of the sources of the pylox package
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=None)
+def cache_tag() -> bytes:
+    """Tag of the interpreter, hashed into the key of every cache file.
+
+    It changes with the interpreter version, the python version and the sources
+    of the package, so any change of the nodes, the resolver, the optimizer or
+    the analyses the statements are pickled with makes the cache files stale.
+    It's computed once, on the first access of the cache.
+
+    Returns:
+        bytes: the tag.
+    """
+    tag = hashlib.sha256("{} {}".format(__version__, sys.implementation.cache_tag).encode())
+    for directory, directories, files in os.walk(PACKAGE_DIR):
+        directories[:] = sorted(name for name in directories if name != "__pycache__")
+        for name in sorted(files):
+            if not name.endswith(".py"): continue
+            path = os.path.join(directory, name)
+            tag.update(b"\0" + os.path.relpath(path, PACKAGE_DIR).encode() + b"\0")
+            with open(path, "rb") as f: tag.update(f.read())
+    return tag.digest()
+
+
+def cache_path(path: str) -> str:
+    """Path of the cache file of a script.
+
+    Args:
+        path (str): path of the script.
+
+    Returns:
+        str: path of the cache file.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, CACHE_DIR, os.path.splitext(name)[0] + ".loxc")
+
+def cache_key(source: str, *options: str) -> bytes:
+    """Key of a compiled program, a hash of its source and the options it's compiled with.
+
+    Args:
+        source (str): source of the program.
+        options (str): options which change the compiled program, e.g. the numeric model.
+
+    Returns:
+        bytes: the key.
+    """
+    key = hashlib.sha256(cache_tag())
+    for option in options: key.update(b"\0" + option.encode())
+    key.update(b"\0" + source.encode())
+    return key.digest()
+
+def load(path: str, source: str, *options: str) -> Optional[List]:
+    """Loads the resolved statements of a script from its cache file.
+
+    Args:
+        path (str): path of the script.
+        source (str): source of the script.
+        options (str): options the program is compiled with.
+
+    The globals of the statements take the slots they were resolved with, the
+    cache misses if this run gave one of these slots to another global.
+
+    Returns:
+        Optional[List]: the statements, None if there's no valid cache file.
+    """
+    try:
+        with open(cache_path(path), "rb") as f:
+            header = f.read(len(MAGIC) + 32)
+            if header != MAGIC + cache_key(source, *options): return None
+            statements, names = pickle.load(f)
+            if not bind_global_slots(names): return None
+            return statements
+    except Exception:
+        # a missing, stale or corrupt cache file is a miss
+        return None
+
+def store(path: str, source: str, statements: List, *options: str) -> None:
+    """Writes the resolved statements of a script into its cache file.
+
+    The file is written aside and moved in place, so a concurrent run never
+    reads a partial file. Failing to write the cache isn't an error.
+
+    Args:
+        path (str): path of the script.
+        source (str): source of the script.
+        statements (List): resolved statements.
+        options (str): options the program is compiled with.
+    """
+    file = cache_path(path)
+    temp = "{}.{}.tmp".format(file, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(temp, "wb") as f:
+            f.write(MAGIC + cache_key(source, *options))
+            pickle.dump((statements, list(global_slots)), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, file)
+    except Exception:
+        # unwritable directory or a program too deep to pickle
+        try: os.remove(temp)
+        except OSError: pass
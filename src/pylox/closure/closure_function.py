@@ -0,0 +1,90 @@
+"""ClosureFunction is the lox function object of the closure compiled engine"""
+
+from typing import List
+from pylox.interpreter.lox_callable import LoxCallable
+from pylox.interpreter.lox_instance import LoxInstance
+from pylox.interpreter.lox_bound_method import LoxBoundMethod
+from pylox.interpreter import memo
+from pylox.environment.environment import Environment, box
+
+
+class ClosureFunction(LoxCallable):
+    """Lox function whose body is compiled into a python closure"""
+    def __init__(self, name: str, params: List, body, closure: Environment, is_initializer: bool, scoped: bool = True, cells: List = None, getter=None) -> None:
+        """Initialization of the function.
+
+        Args:
+            name (str): name of the function.
+            params (List): tokens of the parameters.
+            body: compiled body, returns a (value,) tuple when a return statement is executed.
+            closure (Environment): The enviroment of the cells captured by the function.
+            is_initializer (bool): if the function is initializer or not.
+            scoped (bool, optional): if the calls run in a frame of their own, a function without params and
+                locals runs in its closure. Defaults to True.
+            cells (List, optional): slots of the frame (this and params) which are captured, they are moved
+                into cells by the call. Defaults to None.
+            getter (optional): compiled read of the property of the instance a getter method returns,
+                the method calls read it instead. Defaults to None.
+        """
+        self.name = name
+        self.params = params
+        self.body = body
+        self.closure = closure
+        self.is_initializer = is_initializer
+        self.scoped = scoped
+        self.cells = cells
+        self.getter = getter
+
+    def arity(self) -> int:
+        """Returns the lenght of the required parameters"""
+        return len(self.params)
+
+    def __repr__(self) -> str:
+        return "<fn {}>".format(self.name)
+
+    def bind(self, instance: LoxInstance) -> LoxBoundMethod:
+        """Binds the given instance to the method as this"""
+        return LoxBoundMethod(self, instance)
+
+    def call(self, globals: Environment, arguments: List):
+        """Calls the function with the arguments.
+
+        Args:
+            globals (Environment): the global env.
+            arguments (List): arguments to the function call, the parameters take their slots.
+        """
+        if not self.scoped: result = self.body(self.closure)
+        elif self.cells: result = self.body(Environment(self.closure, box(list(arguments), self.cells)))
+        else: result = self.body(Environment(self.closure, list(arguments)))
+        if result is not None: return result[0]
+        return None
+
+    def invoke(self, instance: LoxInstance, arguments: List):
+        """Calls the method on an instance, this and the arguments take the slots of a single frame.
+
+        Args:
+            instance (LoxInstance): the instance bound to this.
+            arguments (List): arguments to the method call.
+        """
+        frame = [instance, *arguments]
+        if self.cells: box(frame, self.cells)
+        result = self.body(Environment(self.closure, frame))
+        if self.is_initializer: return instance
+        if result is not None: return result[0]
+        return None
+
+
+class MemoizedClosureFunction(ClosureFunction):
+    """Pure compiled function whose results are kept by their arguments, its calls don't take the direct path"""
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.memo = memo.memoize(self.name, self.compute)
+
+    def compute(self, *arguments):
+        """Runs the function, the memo calls it with the arguments it has no result for"""
+        return ClosureFunction.call(self, None, arguments)
+
+    def call(self, globals: Environment, arguments: List):
+        """Returns the kept result of the arguments, or calls the function"""
+        if memo.memoizable(arguments): return self.memo(*arguments)
+        return ClosureFunction.call(self, globals, arguments)
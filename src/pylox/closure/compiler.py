@@ -0,0 +1,788 @@
+"""Closure compiler which turns the resolved statements into a tree of python closures.
+
+Every node is compiled once into a closure taking the environment, with the
+operator, the resolved depth and the constants of the node captured as free
+variables. Running the program is then a chain of direct calls, without the
+visitor dispatch of the tree walk interpreter.
+
+Expression closures return the value of the expression. Statement closures
+return None, or a (value,) tuple once a return statement is executed.
+"""
+
+import time
+from decimal import Decimal
+from typing import List
+import pylox.parser.expr as EXPR
+import pylox.parser.stmt as STMT
+from pylox.closure.closure_function import ClosureFunction, MemoizedClosureFunction
+from pylox.interpreter import memo
+from pylox.environment.environment import UNDEFINED, Cell, Environment, GlobalEnvironment, box, global_slot
+from pylox.exceptions.exceptions import RuntimeError
+from pylox.interpreter.interpreter import check_number_operand, check_number_operands, clear_hoisted, is_number, restore_hoisted, stringify
+from pylox.interpreter.lox_callable import LoxCallable
+from pylox.interpreter.lox_class import LoxClass
+from pylox.interpreter.lox_instance import LoxInstance
+from pylox.interpreter.shape import POLYMORPHIC_LIMIT
+
+
+# State of the engine
+globals = GlobalEnvironment()
+# nesting of the scopes being compiled, declarations at zero are globals
+scope_depth = 0
+
+
+def visit_expression_stmt(stmt: STMT.Expression):
+    """Compiles an expression statement"""
+    expression = compile_node(stmt.expression)
+    def expression_stmt(env):
+        expression(env)
+    return expression_stmt
+
+def visit_print_stmt(stmt: STMT.Print):
+    """Compiles a print statement"""
+    expression = compile_node(stmt.expression)
+    def print_stmt(env):
+        print(stringify(expression(env)))
+    return print_stmt
+
+def visit_var_stmt(stmt: STMT.Var):
+    """Compiles a variable declaration"""
+    if stmt.initializer is None:
+        return compile_define(stmt.name, None, stmt.captured)
+    initializer = compile_node(stmt.initializer)
+    return compile_define(stmt.name, initializer, stmt.captured)
+
+def visit_block_stmt(stmt: STMT.Block):
+    """Compiles a block, which runs its statements in a new environment.
+
+    The locals of a merged block are appended to the current environment and
+    dropped at its end, a block which declares nothing runs in the current one.
+    """
+    if not stmt.scoped and not stmt.merged: return compile_statements(stmt.statements)
+    if stmt.merged:
+        statements = compile_statements(stmt.statements)
+        def merged_block_stmt(env):
+            values = env.values
+            size = len(values)
+            result = statements(env)
+            del values[size:]
+            return result
+        return merged_block_stmt
+    statements = compile_scope(stmt.statements)
+    def block_stmt(env):
+        return statements(Environment(env))
+    return block_stmt
+
+def visit_if_stmt(stmt: STMT.If):
+    """Compiles an if statement with optional else branch"""
+    condition = compile_node(stmt.condition)
+    then_branch = compile_node(stmt.thenBranch)
+    if stmt.elseBranch is None:
+        def if_stmt(env):
+            if condition(env): return then_branch(env)
+        return if_stmt
+    else_branch = compile_node(stmt.elseBranch)
+    def if_else_stmt(env):
+        if condition(env): return then_branch(env)
+        return else_branch(env)
+    return if_else_stmt
+
+def visit_while_stmt(stmt: STMT.While):
+    """Compiles a while loop"""
+    condition = compile_node(stmt.condition)
+    body = compile_node(stmt.body)
+    def while_stmt(env):
+        while condition(env):
+            result = body(env)
+            if result is not None: return result
+    if stmt.hoisted is None: return while_stmt
+    return compile_hoisting(stmt.hoisted, while_stmt)
+
+def visit_for_stmt(stmt: STMT.For):
+    """Compiles a for loop, a variable declared by the initializer lives in an environment of the loop,
+    or in the current one if the loop is merged"""
+    global scope_depth
+    scoped = stmt.scoped
+    merged = stmt.merged
+    if scoped: scope_depth += 1
+    try:
+        initializer = compile_node(stmt.initializer) if stmt.initializer is not None else None
+        condition = compile_node(stmt.condition) if stmt.condition is not None else None
+        increment = compile_node(stmt.increment) if stmt.increment is not None else None
+        body = compile_node(stmt.body)
+    finally:
+        if scoped: scope_depth -= 1
+    def for_stmt(env):
+        if scoped: env = Environment(env)
+        if initializer is not None: initializer(env)
+        while condition is None or condition(env):
+            result = body(env)
+            if result is not None: return result
+            if increment is not None: increment(env)
+    if stmt.hoisted is not None: for_stmt = compile_hoisting(stmt.hoisted, for_stmt)
+    if not merged: return for_stmt
+    def merged_for_stmt(env):
+        values = env.values
+        size = len(values)
+        result = for_stmt(env)
+        del values[size:]
+        return result
+    return merged_for_stmt
+
+def compile_hoisting(hoisted, loop):
+    """Wraps a compiled loop to clear the values of its hoisted expressions on every run"""
+    def hoisting_loop(env):
+        saved = clear_hoisted(hoisted)
+        try:
+            return loop(env)
+        finally:
+            restore_hoisted(hoisted, saved)
+    return hoisting_loop
+
+def visit_function_stmt(stmt: STMT.Function):
+    """Compiles a function declaration, the compiled body is shared by every closure created from it"""
+    name = stmt.name.lexeme
+    params = stmt.params
+    scoped = stmt.scoped
+    upvalues = stmt.upvalues
+    cells = stmt.cells
+    body = compile_scope(stmt.body)
+    function_class = MemoizedClosureFunction if stmt.pure and memo.size else ClosureFunction
+    def function(env):
+        return function_class(name, params, body, env.capture(upvalues), False, scoped, cells)
+    if not stmt.captured: return compile_define(stmt.name, function)
+    def define_captured_function(env):
+        # the function can capture itself, its cell is defined before the closure is created
+        cell = Cell()
+        env.values.append(cell)
+        cell.value = function(env)
+    return define_captured_function
+
+def visit_return_stmt(stmt: STMT.Return):
+    """Compiles a return statement"""
+    if stmt.value is None:
+        def return_stmt(env):
+            return (None,)
+        return return_stmt
+    value = compile_node(stmt.value)
+    def return_value_stmt(env):
+        return (value(env),)
+    return return_value_stmt
+
+def visit_class_stmt(stmt: STMT.Class):
+    """Compiles a class declaration.
+
+    Args:
+        stmt (STMT.Class): class node.
+    """
+    name = stmt.name.lexeme
+    superclass_token = stmt.superclass.name if stmt.superclass else None
+    superclass_expr = compile_node(stmt.superclass) if stmt.superclass else None
+    methods = [(method.name.lexeme, method.params, compile_scope(method.body), method.upvalues, method.cells,
+                compile_property(method.getter) if method.getter is not None else None) for method in stmt.methods]
+    captured = stmt.captured
+
+    def klass(env, cell=None):
+        superclass = None
+        if superclass_expr is not None:
+            superclass = superclass_expr(env)
+            if type(superclass) is not LoxClass: raise RuntimeError(superclass_token, "Superclass must be a class.")
+
+        # the methods which capture the class refer to its cell, defined before they are created
+        if cell is not None: env.values.append(cell)
+
+        # super is only referred to by the methods, so it's always captured
+        method_env = env
+        if superclass is not None:
+            method_env = Environment(env, [Cell(superclass)])
+
+        functions = {}
+        for method_name, params, body, upvalues, cells, getter in methods:
+            functions[method_name] = ClosureFunction(method_name, params, body, method_env.capture(upvalues), method_name == "init", True, cells, getter)
+        return LoxClass(name, superclass, functions)
+    if not captured: return compile_define(stmt.name, klass)
+    def define_captured_class(env):
+        cell = Cell()
+        cell.value = klass(env, cell)
+    return define_captured_class
+
+def visit_literal_expr(expr: EXPR.Literal):
+    """Compiles a literal into a closure returning the constant"""
+    value = expr.value
+    def literal(env):
+        return value
+    return literal
+
+def visit_grouping_expr(expr: EXPR.Grouping):
+    """A grouping compiles into its inner expression"""
+    return compile_node(expr.expression)
+
+def visit_hoisted_expr(expr: EXPR.Hoisted):
+    """Compiles a loop invariant expression, evaluated on the first pass of the loop and kept in the node"""
+    expression = compile_node(expr.expression)
+    def hoisted(env):
+        value = expr.value
+        if value is None: value = expr.value = (expression(env),)
+        return value[0]
+    return hoisted
+
+def visit_unary_expr(expr: EXPR.Unary):
+    """Compiles a unary expression"""
+    operator = expr.operator
+    if operator.type == "MINUS":
+        right = compile_operand(expr.right)
+        if expr.proven is float:
+            def negate_proven(env):
+                return -right(env)
+            return negate_proven
+        def negate(env):
+            value = right(env)
+            if type(value) is float: return -value
+            check_number_operand(operator, value)
+            return float(-value)
+        return negate
+    right = compile_node(expr.right)
+    def not_(env):
+        return not right(env)
+    return not_
+
+def visit_binary_expr(expr: EXPR.Binary):
+    """Compiles a binary expression into a closure specialized for its operator.
+
+    Operands whose types are proven by the type inference aren't checked.
+
+    Args:
+        expr (EXPR.Binary): Binary expression node.
+    """
+    operator = expr.operator
+    type_ = operator.type
+    if type_ == "EQUAL_EQUAL" or type_ == "BANG_EQUAL":
+        left = compile_node(expr.left)
+        right = compile_node(expr.right)
+        if type_ == "EQUAL_EQUAL":
+            def equal(env):
+                return left(env) == right(env)
+            return equal
+        def not_equal(env):
+            return not left(env) == right(env)
+        return not_equal
+
+    left = compile_operand(expr.left)
+    right = compile_operand(expr.right)
+    if expr.proven is not None: return compile_proven_binary(type_, left, right)
+    if type_ == "PLUS":
+        def add(env):
+            a = left(env)
+            b = right(env)
+            if type(a) is float and type(b) is float: return a + b
+            if is_number(a) and is_number(b): return float(a) + float(b)
+            if type(a) is str and type(b) is str: return str(a + b)
+            raise RuntimeError(operator, "Operands must be two numbers or two strings.")
+        return add
+    if type_ == "MINUS":
+        def subtract(env):
+            a = left(env)
+            b = right(env)
+            if type(a) is float and type(b) is float: return a - b
+            check_number_operands(operator, a, b)
+            return float(a) - float(b)
+        return subtract
+    if type_ == "STAR":
+        def multiply(env):
+            a = left(env)
+            b = right(env)
+            if type(a) is float and type(b) is float: return a * b
+            check_number_operands(operator, a, b)
+            return float(a) * float(b)
+        return multiply
+    if type_ == "SLASH":
+        def divide(env):
+            a = left(env)
+            b = right(env)
+            if type(a) is not float or type(b) is not float:
+                check_number_operands(operator, a, b)
+                a, b = float(a), float(b)
+            if b == 0: return float("nan")
+            return a / b
+        return divide
+    if type_ == "GREATER":
+        def greater(env):
+            a = left(env)
+            b = right(env)
+            if type(a) is float and type(b) is float: return a > b
+            check_number_operands(operator, a, b)
+            return float(a) > float(b)
+        return greater
+    if type_ == "GREATER_EQUAL":
+        def greater_equal(env):
+            a = left(env)
+            b = right(env)
+            if type(a) is float and type(b) is float: return a >= b
+            check_number_operands(operator, a, b)
+            return float(a) >= float(b)
+        return greater_equal
+    if type_ == "LESS":
+        def less(env):
+            a = left(env)
+            b = right(env)
+            if type(a) is float and type(b) is float: return a < b
+            check_number_operands(operator, a, b)
+            return float(a) < float(b)
+        return less
+    def less_equal(env):
+        a = left(env)
+        b = right(env)
+        if type(a) is float and type(b) is float: return a <= b
+        check_number_operands(operator, a, b)
+        return float(a) <= float(b)
+    return less_equal
+
+def compile_proven_binary(type_: str, left, right):
+    """Compiles an operator whose operands are proven to be floats (or strings for +), they aren't checked"""
+    if type_ == "PLUS":
+        def add_proven(env):
+            return left(env) + right(env)
+        return add_proven
+    if type_ == "MINUS":
+        def subtract_proven(env):
+            return left(env) - right(env)
+        return subtract_proven
+    if type_ == "STAR":
+        def multiply_proven(env):
+            return left(env) * right(env)
+        return multiply_proven
+    if type_ == "SLASH":
+        def divide_proven(env):
+            a = left(env)
+            b = right(env)
+            if b == 0: return float("nan")
+            return a / b
+        return divide_proven
+    if type_ == "GREATER":
+        def greater_proven(env):
+            return left(env) > right(env)
+        return greater_proven
+    if type_ == "GREATER_EQUAL":
+        def greater_equal_proven(env):
+            return left(env) >= right(env)
+        return greater_equal_proven
+    if type_ == "LESS":
+        def less_proven(env):
+            return left(env) < right(env)
+        return less_proven
+    def less_equal_proven(env):
+        return left(env) <= right(env)
+    return less_equal_proven
+
+def visit_logical_expr(expr: EXPR.Logical):
+    """Compiles a short circuiting logical expression"""
+    left = compile_node(expr.left)
+    right = compile_node(expr.right)
+    if expr.operator.type == "OR":
+        def or_(env):
+            value = left(env)
+            if value: return value
+            return right(env)
+        return or_
+    def and_(env):
+        value = left(env)
+        if not value: return value
+        return right(env)
+    return and_
+
+def visit_variable_expr(expr: EXPR.Variable):
+    """Compiles a variable read"""
+    return compile_lookup(expr, expr.name)
+
+def visit_this_expr(expr: EXPR.This):
+    """Compiles this, which is looked up like a variable"""
+    return compile_lookup(expr, expr.keyword)
+
+def visit_assign_expr(expr: EXPR.Assign):
+    """Compiles an assignment, specialized for the resolved depth of the variable"""
+    name = expr.name
+    lexeme = name.lexeme
+    value = compile_node(expr.value)
+    dist, index = expr.depth, expr.index
+    if dist == EXPR.GLOBAL:
+        global_values = globals.values
+        def assign_global(env):
+            result = value(env)
+            if global_values[index] is UNDEFINED: raise RuntimeError(name, "Undefined variable '" + lexeme + "'.")
+            global_values[index] = result
+            return result
+        return assign_global
+    if expr.cell:
+        def assign_cell(env):
+            result = value(env)
+            env.ancestor(dist).values[index].value = result
+            return result
+        return assign_cell
+    if dist == 0:
+        def assign_local(env):
+            result = env.values[index] = value(env)
+            return result
+        return assign_local
+    def assign_at(env):
+        result = value(env)
+        env.ancestor(dist).values[index] = result
+        return result
+    return assign_at
+
+def visit_super_expr(expr: EXPR.Super):
+    """Compiles a super method access"""
+    dist, index = expr.depth, expr.index
+    this = compile_node(expr.this)
+    method_token = expr.method
+    # method cached for the last superclass seen
+    cached_superclass = cached_method = None
+    def super_(env):
+        nonlocal cached_superclass, cached_method
+        # super is a cell of the closure of the method
+        superclass = env.ancestor(dist).values[index].value
+        object = this(env)
+        if superclass is not cached_superclass:
+            method = superclass.find_method(method_token.lexeme)
+            if not method: raise RuntimeError(method_token, "Undefined property '{}'.".format(method_token.lexeme))
+            cached_superclass = superclass
+            cached_method = method
+        return cached_method.bind(object)
+    return super_
+
+def visit_get_expr(expr: EXPR.Get):
+    """Compiles a property access"""
+    object_expr = compile_node(expr.object)
+    name = expr.name
+    lexeme = name.lexeme
+    # inline cache: the last shape seen and its slot, the shapes seen once the site is polymorphic
+    cached_shape = cached_slot = cache = None
+    def get(env):
+        nonlocal cached_shape, cached_slot, cache
+        object = object_expr(env)
+        if type(object) is not LoxInstance: raise RuntimeError(name, "Only instances have property")
+        shape = object.shape
+        if shape is cached_shape:
+            slot = cached_slot
+        else:
+            slot = cache.get(shape) if cache is not None else None
+            if slot is None:
+                slot = shape.lookup(lexeme)
+                if slot is None: raise RuntimeError(name, "Undefied property {}.".format(lexeme))
+                if cached_shape is not None:
+                    if cache is None: cache = {cached_shape: cached_slot}
+                    if len(cache) < POLYMORPHIC_LIMIT: cache[shape] = slot
+            cached_shape = shape
+            cached_slot = slot
+        if type(slot) is int: return object.values[slot]
+        return slot.bind(object)
+    return get
+
+def compile_property(expr: EXPR.Get):
+    """Compiles the property read of a getter method, from the instance the method is called on"""
+    name = expr.name
+    lexeme = name.lexeme
+    # inline cache, as in a Get
+    cached_shape = cached_slot = cache = None
+    def property(object):
+        nonlocal cached_shape, cached_slot, cache
+        shape = object.shape
+        if shape is cached_shape:
+            slot = cached_slot
+        else:
+            slot = cache.get(shape) if cache is not None else None
+            if slot is None:
+                slot = shape.lookup(lexeme)
+                if slot is None: raise RuntimeError(name, "Undefied property {}.".format(lexeme))
+                if cached_shape is not None:
+                    if cache is None: cache = {cached_shape: cached_slot}
+                    if len(cache) < POLYMORPHIC_LIMIT: cache[shape] = slot
+            cached_shape = shape
+            cached_slot = slot
+        if type(slot) is int: return object.values[slot]
+        return slot.bind(object)
+    return property
+
+def visit_set_expr(expr: EXPR.Set):
+    """Compiles a property assignment"""
+    object_expr = compile_node(expr.object)
+    value_expr = compile_node(expr.value)
+    name = expr.name
+    lexeme = name.lexeme
+    # inline cache: the last shape seen with its slot and transition, the shapes seen once the site is polymorphic
+    cached_shape = cached_slot = cached_transition = cache = None
+    def set(env):
+        nonlocal cached_shape, cached_slot, cached_transition, cache
+        object = object_expr(env)
+        if type(object) is not LoxInstance: raise RuntimeError(name, "Only instances have fields")
+        value = value_expr(env)
+        shape = object.shape
+        if shape is not cached_shape:
+            entry = cache.get(shape) if cache is not None else None
+            if entry is None:
+                entry = shape.store(lexeme)
+                if cached_shape is not None:
+                    if cache is None: cache = {cached_shape: (cached_slot, cached_transition)}
+                    if len(cache) < POLYMORPHIC_LIMIT: cache[shape] = entry
+            cached_shape = shape
+            cached_slot, cached_transition = entry
+        if cached_transition is None:
+            object.values[cached_slot] = value
+        else:
+            object.shape = cached_transition
+            object.values.append(value)
+        return value
+    return set
+
+def visit_call_expr(expr: EXPR.Call):
+    """Compiles a call, calls of compiled lox functions run their body directly.
+
+    A call inlined by the optimizer evaluates the inlined expression if the callee
+    is the function it was inlined from.
+
+    Args:
+        expr (EXPR.Call): Call expression node.
+    """
+    if type(expr.callee) is EXPR.Get: return compile_invoke(expr)
+    callee_expr = compile_node(expr.callee)
+    argument_exprs = [compile_node(arg) for arg in expr.arguments]
+    paren = expr.paren
+    count = len(argument_exprs)
+    def call(env):
+        callee = callee_expr(env)
+        arguments = [argument(env) for argument in argument_exprs]
+        if type(callee) is ClosureFunction:
+            params = callee.params
+            if count != len(params):
+                raise RuntimeError(paren, "Expected {} arguments but got {}.".format(len(params), count))
+            if not callee.scoped: result = callee.body(callee.closure)
+            else:
+                if callee.cells: box(arguments, callee.cells)
+                result = callee.body(Environment(callee.closure, arguments))
+            if result is not None: return result[0]
+            return None
+        if not isinstance(callee, LoxCallable):
+            raise RuntimeError(paren, "Can only call functions and classes.")
+        if count != callee.arity():
+            raise RuntimeError(paren, "Expected {} arguments but got {}.".format(callee.arity(), count))
+        return callee.call(globals, arguments)
+    if expr.inlined is None: return call
+    inlined = compile_node(expr.inlined)
+    # the closures of a declaration share its params list
+    target_params = expr.target.params
+    def inlined_call(env):
+        callee = callee_expr(env)
+        if type(callee) is ClosureFunction and callee.params is target_params: return inlined(env)
+        # the callee is a variable, reading it again has no effect
+        return call(env)
+    return inlined_call
+
+def compile_invoke(expr: EXPR.Call):
+    """Compiles a method call, the method is called on the instance without binding it.
+
+    A getter method isn't called, the property it returns is read from the instance.
+
+    Args:
+        expr (EXPR.Call): Call expression node whose callee is a Get.
+    """
+    object_expr = compile_node(expr.callee.object)
+    argument_exprs = [compile_node(arg) for arg in expr.arguments]
+    name = expr.callee.name
+    lexeme = name.lexeme
+    paren = expr.paren
+    count = len(argument_exprs)
+    # inline cache of the property, as in a Get
+    cached_shape = cached_slot = cache = None
+    def invoke(env):
+        nonlocal cached_shape, cached_slot, cache
+        object = object_expr(env)
+        if type(object) is not LoxInstance: raise RuntimeError(name, "Only instances have property")
+        shape = object.shape
+        if shape is cached_shape:
+            slot = cached_slot
+        else:
+            slot = cache.get(shape) if cache is not None else None
+            if slot is None:
+                slot = shape.lookup(lexeme)
+                if slot is None: raise RuntimeError(name, "Undefied property {}.".format(lexeme))
+                if cached_shape is not None:
+                    if cache is None: cache = {cached_shape: cached_slot}
+                    if len(cache) < POLYMORPHIC_LIMIT: cache[shape] = slot
+            cached_shape = shape
+            cached_slot = slot
+        if type(slot) is int:
+            # a field holding a callable is called like any other callee
+            callee = object.values[slot]
+            arguments = [argument(env) for argument in argument_exprs]
+            if not isinstance(callee, LoxCallable):
+                raise RuntimeError(paren, "Can only call functions and classes.")
+            if count != callee.arity():
+                raise RuntimeError(paren, "Expected {} arguments but got {}.".format(callee.arity(), count))
+            return callee.call(globals, arguments)
+        if slot.getter is not None and count == 0: return slot.getter(object)
+        # this and the arguments are the slots of the method's frame
+        frame = [object]
+        for argument in argument_exprs: frame.append(argument(env))
+        if count != len(slot.params):
+            raise RuntimeError(paren, "Expected {} arguments but got {}.".format(len(slot.params), count))
+        if slot.cells: box(frame, slot.cells)
+        result = slot.body(Environment(slot.closure, frame))
+        if slot.is_initializer: return object
+        if result is not None: return result[0]
+        return None
+    return invoke
+
+def compile_lookup(expr, name):
+    """Compiles a lookup of a variable, specialized for its resolved depth.
+
+    Args:
+        expr (EXPR): the variable or this expression.
+        name (Token): token of the identifier.
+    """
+    lexeme = name.lexeme
+    dist, index = expr.depth, expr.index
+    if dist == EXPR.GLOBAL:
+        global_values = globals.values
+        def global_variable(env):
+            value = global_values[index]
+            if value is UNDEFINED: raise RuntimeError(name, "Undefined variable '" + lexeme + "'.")
+            return value
+        return global_variable
+    if expr.cell:
+        # a captured variable is read through its cell
+        if dist == 0:
+            def local_cell(env):
+                return env.values[index].value
+            return local_cell
+        if dist == 1:
+            def enclosing_cell(env):
+                return env.enclosing.values[index].value
+            return enclosing_cell
+        def cell_at(env):
+            return env.ancestor(dist).values[index].value
+        return cell_at
+    if dist == 0:
+        def local_variable(env):
+            return env.values[index]
+        return local_variable
+    if dist == 1:
+        def enclosing_variable(env):
+            return env.enclosing.values[index]
+        return enclosing_variable
+    def variable_at(env):
+        return env.ancestor(dist).values[index]
+    return variable_at
+
+def compile_operand(expr):
+    """Compiles an operand of an arithmetic or comparison operator.
+
+    The operators convert their operands to float anyway, so number literals are
+    converted once here and take the fast path of the operator.
+    """
+    if type(expr) is EXPR.Literal and type(expr.value) is Decimal:
+        value = float(expr.value)
+        def literal(env):
+            return value
+        return literal
+    return compile_node(expr)
+
+def compile_define(name, value, captured=False):
+    """Compiles a declaration, locals take the next slot of the environment and globals their slot of the global table.
+
+    Args:
+        name (Token): token of the identifier.
+        value: compiled value of the declaration, None to define nil.
+        captured (bool, optional): if the local is captured by a closure, it's stored in a cell. Defaults to False.
+    """
+    if scope_depth == 0:
+        global_values = globals.values
+        slot = global_slot(name.lexeme)
+        def define_global(env):
+            global_values[slot] = value(env) if value is not None else None
+        return define_global
+    if captured:
+        def define_cell(env):
+            env.values.append(Cell(value(env) if value is not None else None))
+        return define_cell
+    def define_local(env):
+        env.values.append(value(env) if value is not None else None)
+    return define_local
+
+def compile_scope(statements: List):
+    """Compiles the statements of a block or a function body, which run in a new environment"""
+    global scope_depth
+    scope_depth += 1
+    try:
+        return compile_statements(statements)
+    finally:
+        scope_depth -= 1
+
+def compile_statements(statements: List):
+    """Compiles a list of statements into a single closure running them in order"""
+    compiled = [compile_node(stmt) for stmt in statements]
+    if len(compiled) == 1: return compiled[0]
+    def statements_(env):
+        for stmt in compiled:
+            result = stmt(env)
+            if result is not None: return result
+    return statements_
+
+def compile_node(node):
+    """Compiles an expression or a statement into its closure"""
+    return node.accept(node)
+
+def compile(statements: List):
+    """Compiles the resolved statements into a single closure.
+
+    Args:
+        statements (List): resolved statements.
+    """
+    # assigning visitor method to the visitor's classes
+    EXPR.Assign.visit = visit_assign_expr
+    EXPR.Binary.visit = visit_binary_expr
+    EXPR.Call.visit = visit_call_expr
+    EXPR.Get.visit = visit_get_expr
+    EXPR.Grouping.visit = visit_grouping_expr
+    EXPR.Hoisted.visit = visit_hoisted_expr
+    EXPR.Literal.visit = visit_literal_expr
+    EXPR.Set.visit = visit_set_expr
+    EXPR.Super.visit = visit_super_expr
+    EXPR.This.visit = visit_this_expr
+    EXPR.Unary.visit = visit_unary_expr
+    EXPR.Variable.visit = visit_variable_expr
+    EXPR.Logical.visit = visit_logical_expr
+
+    STMT.Expression.visit = visit_expression_stmt
+    STMT.Class.visit = visit_class_stmt
+    STMT.Return.visit = visit_return_stmt
+    STMT.Function.visit = visit_function_stmt
+    STMT.Print.visit = visit_print_stmt
+    STMT.Var.visit = visit_var_stmt
+    STMT.Block.visit = visit_block_stmt
+    STMT.If.visit = visit_if_stmt
+    STMT.While.visit = visit_while_stmt
+    STMT.For.visit = visit_for_stmt
+
+    return [compile_node(stmt) for stmt in statements]
+
+def interpret(statements: List) -> None:
+    """Compiles the resolved statements and runs them, a drop-in for the tree walk interpret().
+
+    Args:
+        statements (List): resolved statements.
+    """
+    # the globals of the resolved statements index their slots
+    globals.reserve()
+    if not globals.is_defined("clock"):
+        def c_arity():
+            return 0
+        def c_call(interepreter, globals):
+            return time.time()
+
+        clock_object = LoxCallable()
+        clock_object.arity = c_arity
+        clock_object.call = c_call
+        globals.define("clock", clock_object)
+
+    # statements are compiled up front, so nothing runs if compilation fails.
+    for stmt in compile(statements):
+        stmt(globals)
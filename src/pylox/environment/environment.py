@@ -1,73 +1,82 @@
-"""This class holds the structure of the environment(state) where the variables are stored in a dictionary
+"""This module holds the structure of the environments(state) where the variables are stored.
+
+Local scopes are array backed, the resolver assigns every local a slot index in
+its scope and the interpreter reads it by (depth, index). The globals have a slot
+of the global table, assigned by name when the resolver declares or refers to
+them, the natives take the first ones. A slot holds UNDEFINED until its global is
+defined.
+
+A local captured by a function is stored in a Cell, the closure of the function
+is a flat environment of the cells it captures, without enclosing environment.
 
     Raises:
-        RuntimeError: In get() function if it encounters getting a undefined variable
-        RuntimeError: In assign() function if it encounters assigning a undefined variable
+        RuntimeError: In assign_slot() function if it encounters assigning a undefined global
 
     Returns:
         Environment: The state enclosed in a scope
 """
+from typing import List
 from pylox.exceptions.exceptions import RuntimeError
 from pylox.scanner.token import Token
 
+# Globals defined by the engines before the program runs
+NATIVES = ("clock",)
+# Slot of every global in the global table, by name. It's shared by the engines and
+# kept across the lines of the repl, a name has the same slot in every program of a run
+global_slots = {name: slot for slot, name in enumerate(NATIVES)}
+# Value of the slot of a global which isn't defined (yet)
+UNDEFINED = object()
+
+
+def global_slot(name: str) -> int:
+    """Returns the slot of a global in the global table, a new name takes the next slot"""
+    slot = global_slots.get(name)
+    if slot is None: slot = global_slots[name] = len(global_slots)
+    return slot
+
+def bind_global_slots(names: List) -> bool:
+    """Gives the globals of a program resolved by another run the slots it was resolved with.
+
+    Args:
+        names (List): names of the globals, in the order of their slots.
+
+    Returns:
+        bool: False if a slot is taken by another global in this run.
+    """
+    for slot, name in enumerate(names):
+        if global_slot(name) != slot: return False
+    return True
+
+
 class Environment:
-    """This class holds the environment of the program"""
-    def __init__(self, enclose = None) -> None:
+    """This class holds the local variables of a scope, in the order of their declaration"""
+    __slots__ = ("enclosing", "values")
+
+    def __init__(self, enclose = None, values: List = None) -> None:
         """Initializing the environment
 
         Args:
             enclose (Environment, optional): Environment to enclose. Defaults to None.
+            values (List, optional): initial slots, the environment takes ownership of the list. Defaults to None.
         """
         self.enclosing = enclose
-        self.values = dict()
-    
+        self.values = values if values is not None else []
+
     def __repr__(self) -> str:
         return str(self.values)
-    
-    def get(self, name: Token):
-        """To get a value of an identifier from the envorinment.
-
-        Args:
-            name (Token): token of the identifier.
 
-        Raises:
-            RuntimeError: if the name is not found in the env as well as in the enclosing env.
-        """
-        if type(name) is str: name = Token(None, name, None, None)
-        if name.lexeme in self.values:
-            return self.values.get(name.lexeme)
-        if self.enclosing is not None: return self.enclosing.get(name)
-        raise RuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
-    
-    def assign(self, name: Token, value) -> None:
-        """To assign a value to the identifier in the environment.
-
-        Args:
-            name (Token): token of the identifier.
-            value: value to assign.
-
-        Raises:
-            RuntimeError: if the identifier is not defined in the env, as well as in the enclosing env.
-        """
-        if type(name) is str: name = Token(None, name, None, None)
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
-            return
-        if self.enclosing is not None:
-            self.enclosing.assign(name, value)
-            return
-        raise RuntimeError(name, "Undefined variable '"+ name.lexeme + "'.")
-    
     def define(self, name: Token, value) -> None:
-        """Defines a indentifier in the environment.
+        """Defines a local in the next slot of the environment.
+
+        The resolver assigns slots in declaration order, which is also the order
+        in which the declarations are executed.
 
         Args:
             name (Token): token of the identifier.
             value : value of the identifier.
         """
-        if type(name) is str: name = Token(None, name, None, None)
-        self.values.update({name.lexeme: value})
-    
+        self.values.append(value)
+
     def ancestor(self, distance: int):
         """Getting the enclosed environment at a distance.
 
@@ -81,27 +90,108 @@ class Environment:
         for i in range(distance):
             environment = environment.enclosing
         return environment
-        
-    def get_at(self, distance: int, name: Token):
+
+    def get_at(self, distance: int, index: int):
         """Getting a value from an environment at the given distance.
 
         Args:
             distance (int): distance of the enclosed env.
-            name (Token): name of the identifier to get.
+            index (int): slot of the identifier to get.
 
         Returns:
-            value: returns the value of the name at the given enclosed env distace.
+            value: returns the value of the slot at the given enclosed env distace.
         """
-        if type(name) is str: name = Token(None, name, None, None)
-        return self.ancestor(distance).values.get(name.lexeme)
-    
-    def assign_at(self, distance: int, name: Token, value) -> None:
+        return self.ancestor(distance).values[index]
+
+    def assign_at(self, distance: int, index: int, value) -> None:
         """Assigning a value to the environment at the given distance.
 
         Args:
             distance (int): distance of the enclosed env.
-            name (Token): name of the identifier to assign.
+            index (int): slot of the identifier to assign.
             value (_type_): value to the identifier to assign.
         """
-        if type(name) is str: name = Token(None, name, None, None)
-        self.ancestor(distance).values[name.lexeme] = value
+        self.ancestor(distance).values[index] = value
+
+    def capture(self, upvalues: List) -> "Environment":
+        """Creates the closure of a function declared in this environment.
+
+        Args:
+            upvalues (List): (distance, index) of the cells the function captures.
+
+        Returns:
+            Environment: environment of the captured cells, with no enclosing environment.
+        """
+        return Environment(None, [self.ancestor(distance).values[index] for distance, index in upvalues])
+
+
+class Cell:
+    """A captured local, shared by the environment of its scope and the closures which capture it"""
+    __slots__ = ("value",)
+
+    def __init__(self, value = None) -> None:
+        self.value = value
+
+    def __repr__(self) -> str:
+        return "<cell {!r}>".format(self.value)
+
+
+def box(values: List, slots: List) -> List:
+    """Moves the values of the slots into cells, for the captured params of a frame"""
+    for slot in slots: values[slot] = Cell(values[slot])
+    return values
+
+
+class GlobalEnvironment:
+    """This class holds the global variables of the program in their slots of the global table"""
+    __slots__ = ("enclosing", "values")
+
+    def __init__(self) -> None:
+        """Initializing the global environment"""
+        self.enclosing = None
+        self.values = []
+
+    def __repr__(self) -> str:
+        return str({name: self.values[slot] for name, slot in global_slots.items() if slot < len(self.values) and self.values[slot] is not UNDEFINED})
+
+    def reserve(self) -> None:
+        """Gives a slot to every global of the table, the resolved programs index the values without checking their length.
+
+        The list is extended in place, the compiled engines keep a reference to it.
+        """
+        self.values.extend([UNDEFINED] * (len(global_slots) - len(self.values)))
+
+    def is_defined(self, name: str) -> bool:
+        """Checks if a global is defined"""
+        slot = global_slots.get(name)
+        return slot is not None and slot < len(self.values) and self.values[slot] is not UNDEFINED
+
+    def assign_slot(self, index: int, name: Token, value) -> None:
+        """To assign a value to a global in its resolved slot.
+
+        Args:
+            index (int): slot of the global.
+            name (Token): token of the identifier, reported if it isn't defined.
+            value: value to assign.
+
+        Raises:
+            RuntimeError: if the name is not defined.
+        """
+        if self.values[index] is UNDEFINED: raise RuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
+        self.values[index] = value
+
+    def define(self, name: Token, value) -> None:
+        """Defines a global, redefinition replaces the value.
+
+        Args:
+            name (Token): token of the identifier.
+            value : value of the identifier.
+        """
+        lexeme = name if type(name) is str else name.lexeme
+        slot = global_slot(lexeme)
+        if slot >= len(self.values): self.reserve()
+        self.values[slot] = value
+
+    def capture(self, upvalues: List) -> Environment:
+        """Creates the closure of a function declared at the top level, which captures nothing"""
+        return Environment(None, [])
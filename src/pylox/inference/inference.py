@@ -0,0 +1,492 @@
+"""Type inference of the resolved statements, which proves the types of the operands of the operators.
+
+It runs on a whole program (a script), after the resolver and the optimizer. The
+locals of a function which no closure captures are typed along the statements of
+the function, a branch or a loop joins the types of its paths. The globals, the
+captured locals, the params and the return values of the functions are typed for
+the whole program, as the union of the values assigned to them: a param gets the
+arguments of every call of its function, unless the function escapes (it's used
+as a value) and can be called from anywhere. These facts start empty and the
+program is inferred again until none of them grows.
+
+A Binary, Unary or Logical node whose operands are proven to always be floats
+(or strings for + and the equality, or booleans for !, and, or) gets that python
+type in its "proven" slot, the engines apply its operator without checking the
+operands. A failing operation stops the program, so the result of an operation
+is typed by its success, e.g. a - b is always a float.
+"""
+
+import sys
+from decimal import Decimal
+from typing import List
+import pylox.parser.expr as EXPR
+import pylox.parser.stmt as STMT
+
+# Types are sets of the kinds of values, as bits
+NOTHING = 0
+FLOAT = 1
+DECIMAL = 2
+STRING = 4
+BOOL = 8
+NIL = 16
+# functions, classes and instances
+OBJECT = 32
+ANY = FLOAT | DECIMAL | STRING | BOOL | NIL | OBJECT
+NUMBER = FLOAT | DECIMAL
+
+# Types of the literal values
+literal_types = {float: FLOAT, Decimal: DECIMAL, str: STRING, bool: BOOL, type(None): NIL}
+
+# Python types of the proven operands
+proven_types = {FLOAT: float, STRING: str, BOOL: bool}
+
+# Operators which apply to two strings
+STRING_OPERATORS = ("PLUS", "EQUAL_EQUAL", "BANG_EQUAL")
+ARITHMETIC_OPERATORS = ("MINUS", "STAR", "SLASH")
+
+# Callee of the native clock function
+CLOCK = "clock"
+
+
+class Binding:
+    """A variable of the program.
+
+    A local which no closure captures is typed along the flow of its function,
+    the type of the other variables is the union of every value assigned to them.
+    """
+    __slots__ = ("type", "flow", "callees")
+
+    def __init__(self, flow: bool, callees: set = None) -> None:
+        """
+        Args:
+            flow (bool): if the variable is typed along the flow of its function.
+            callees (set, optional): the functions and classes declared with the name, None if it's
+                assigned other values. Defaults to None.
+        """
+        self.type = NOTHING
+        self.flow = flow
+        self.callees = callees
+
+
+class Signature:
+    """The types of the params and of the returned values of a function"""
+    __slots__ = ("params", "returns", "escaped")
+
+    def __init__(self, arity: int, escaped: bool = False) -> None:
+        """
+        Args:
+            arity (int): number of params.
+            escaped (bool, optional): if the function can be called from anywhere, its params
+                can be anything. Defaults to False.
+        """
+        self.params = [NOTHING] * arity
+        self.returns = NOTHING
+        self.escaped = escaped
+
+
+# State of the inference
+# bindings of the locals by their declaration (a node or the token of a param), and of the globals by name
+bindings = {}
+globals = {}
+# signatures of the functions by their node
+signatures = {}
+# names of the locals in the scopes, from the outermost
+scopes = []
+# types of the flow typed locals at the current statement, None if it's never reached
+types = {}
+# signature of the function being inferred, None at the top level
+signature = None
+# if a fact grew since the program is inferred
+changed = False
+
+
+def infer_types(statements: List) -> None:
+    """Infers the types of a whole program and stores the proven operand types on its operators.
+
+    Args:
+        statements (List): resolved statements of the program.
+    """
+    global types, signature, changed
+    bindings.clear()
+    signatures.clear()
+    globals.clear()
+    for stmt in statements:
+        # a function or a class name is only called until it's declared with var
+        if type(stmt) is STMT.Var or type(stmt) is STMT.Function or type(stmt) is STMT.Class:
+            globals[stmt.name.lexeme] = Binding(False, set())
+    if CLOCK not in globals:
+        globals[CLOCK] = Binding(False, {CLOCK})
+        globals[CLOCK].type = OBJECT
+    try:
+        while True:
+            changed = False
+            types = {}
+            signature = None
+            infer_statements(statements)
+            if not changed: break
+    finally:
+        scopes.clear()
+        bindings.clear()
+        signatures.clear()
+        globals.clear()
+
+def explain(statements: List, file=sys.stdout) -> None:
+    """Prints the operators whose operand types are proven, by function.
+
+    Args:
+        statements (List): inferred statements of the program.
+        file (optional): output of the report. Defaults to sys.stdout.
+    """
+    rows = []
+    tally("<script>", None, statements, rows)
+    print("{:<24}{:>6}{:>10}{:>11}{:>8}  {}".format("function", "line", "proven", "operators", "", "unproven at lines"), file=file)
+    for name, line, proven, total, unproven in rows:
+        share = "{:.0%}".format(proven / total) if total else "-"
+        lines = ", ".join(str(line) for line in sorted(set(unproven)))
+        print("{:<24}{:>6}{:>10}{:>11}{:>8}  {}".format(name, line or "", proven, total, share, lines), file=file)
+    proven = sum(row[2] for row in rows)
+    total = sum(row[3] for row in rows)
+    print("{:<24}{:>6}{:>10}{:>11}{:>8}".format("total", "", proven, total, "{:.0%}".format(proven / total) if total else "-"), file=file)
+
+def tally(name: str, line, nodes: List, rows: List) -> None:
+    """Counts the operators of a function (or of the script) and the proven ones into a row, and the nested functions into their own rows"""
+    row = [name, line, 0, 0, []]
+    rows.append(row)
+    pending = list(reversed(nodes))
+    while pending:
+        node = pending.pop()
+        if type(node) is list:
+            pending.extend(reversed(node))
+            continue
+        # tokens and the values of the literals
+        if not hasattr(node, "kind"): continue
+        if type(node) is STMT.Function:
+            tally(node.name.lexeme, node.name.line, node.body, rows)
+            continue
+        if type(node) is STMT.Class:
+            for method in node.methods: tally("{}.{}".format(node.name.lexeme, method.name.lexeme), method.name.line, method.body, rows)
+            continue
+        if type(node) is EXPR.Binary or type(node) is EXPR.Unary or type(node) is EXPR.Logical:
+            row[3] += 1
+            if node.proven is not None: row[2] += 1
+            else: row[4].append(node.line)
+        pending.extend(reversed([getattr(node, field) for field in node.__match_args__]))
+
+def infer_statements(statements: List) -> None:
+    for stmt in statements:
+        # the statements after a return are never reached
+        if types is None: return
+        statement_inferrers[stmt.kind](stmt)
+
+def infer(expr) -> int:
+    """Infers the type of an expression, in the current types of the locals"""
+    return expression_inferrers[expr.kind](expr)
+
+def join(a, b):
+    """Joins the types of the locals of two paths"""
+    if a is None: return b
+    if b is None: return a
+    joined = dict(a)
+    for binding, type_ in b.items(): joined[binding] = joined.get(binding, NOTHING) | type_
+    return joined
+
+def grow(binding: Binding, type_: int) -> None:
+    """Adds a type to a variable typed for the whole program"""
+    global changed
+    if type_ & ~binding.type:
+        binding.type |= type_
+        changed = True
+
+def lookup(name: str) -> Binding:
+    """Finds the binding of a name from the innermost scope"""
+    for scope in reversed(scopes):
+        if name in scope: return scope[name]
+    binding = globals.get(name)
+    if binding is None:
+        # a global which the program doesn't declare, it can only be defined by another program
+        binding = globals[name] = Binding(False)
+        binding.type = ANY
+    return binding
+
+def declare(name: str, declaration, captured: bool, callable: bool = False) -> Binding:
+    """Declares a name in the innermost scope, a global is bound by its name"""
+    if not scopes: return globals[name]
+    binding = bindings.get(declaration)
+    if binding is None: binding = bindings[declaration] = Binding(not captured, set() if callable else None)
+    scopes[-1][name] = binding
+    return binding
+
+def read(binding: Binding) -> int:
+    if binding.flow: return types.get(binding, ANY)
+    return binding.type
+
+def write(binding: Binding, type_: int) -> None:
+    if binding.flow: types[binding] = type_
+    else: grow(binding, type_)
+
+def forget_callees(binding: Binding) -> None:
+    """A variable assigned another value than its declared function or class can hold anything.
+
+    Its calls aren't followed anymore, so its functions escape.
+    """
+    global changed
+    if binding.callees is not None:
+        escape(binding)
+        binding.callees = None
+        changed = True
+
+def add_callee(binding: Binding, callee) -> None:
+    global changed
+    if binding.callees is not None and callee not in binding.callees:
+        binding.callees.add(callee)
+        changed = True
+
+def signature_of(function: STMT.Function, method: bool = False) -> Signature:
+    found = signatures.get(function)
+    if found is None: found = signatures[function] = Signature(len(function.params), method)
+    return found
+
+def escape(binding: Binding) -> None:
+    """The functions of a variable read as a value can be called from anywhere"""
+    global changed
+    for callee in binding.callees:
+        if type(callee) is not STMT.Function: continue
+        found = signature_of(callee)
+        if not found.escaped:
+            found.escaped = True
+            changed = True
+
+def infer_function(function: STMT.Function, found: Signature, method: bool = False) -> None:
+    """Infers the body of a function, in types of its own"""
+    global types, signature
+    enclosing_types, enclosing_signature = types, signature
+    types = {}
+    signature = found
+    scope = {}
+    scopes.append(scope)
+    cells = function.cells or ()
+    try:
+        for i, param in enumerate(function.params):
+            # this takes the first slot of a method's frame
+            binding = bindings.get(param)
+            if binding is None: binding = bindings[param] = Binding((i + 1 if method else i) not in cells)
+            scope[param.lexeme] = binding
+            write(binding, ANY if found.escaped else found.params[i])
+        infer_statements(function.body)
+        # falling off the end returns nil
+        if types is not None: returns(NIL)
+    finally:
+        scopes.pop()
+        types, signature = enclosing_types, enclosing_signature
+
+def returns(type_: int) -> None:
+    global changed
+    if type_ & ~signature.returns:
+        signature.returns |= type_
+        changed = True
+
+def infer_loop(condition, body, increment) -> None:
+    """Infers a loop until the types of the locals at its start are stable.
+
+    The last iteration is inferred with the stable types, so its operators keep the
+    types proven for every iteration.
+    """
+    global types
+    entry = types
+    while True:
+        types = dict(entry)
+        if condition is not None: infer(condition)
+        # a loop without a condition is only left by a return
+        exit = types if condition is not None else None
+        types = dict(types)
+        statement_inferrers[body.kind](body)
+        if types is not None and increment is not None: infer(increment)
+        following = join(entry, types)
+        if following == entry: break
+        entry = following
+    types = exit
+
+def infer_expression_stmt(stmt: STMT.Expression) -> None:
+    infer(stmt.expression)
+
+def infer_print_stmt(stmt: STMT.Print) -> None:
+    infer(stmt.expression)
+
+def infer_var_stmt(stmt: STMT.Var) -> None:
+    type_ = infer(stmt.initializer) if stmt.initializer is not None else NIL
+    binding = declare(stmt.name.lexeme, stmt, stmt.captured)
+    forget_callees(binding)
+    write(binding, type_)
+
+def infer_function_stmt(stmt: STMT.Function) -> None:
+    binding = declare(stmt.name.lexeme, stmt, stmt.captured, True)
+    add_callee(binding, stmt)
+    write(binding, OBJECT)
+    infer_function(stmt, signature_of(stmt))
+
+def infer_class_stmt(stmt: STMT.Class) -> None:
+    binding = declare(stmt.name.lexeme, stmt, stmt.captured, True)
+    if stmt.superclass is not None: infer(stmt.superclass)
+    add_callee(binding, stmt)
+    write(binding, OBJECT)
+    # a method is called on any instance, its params can be anything
+    for method in stmt.methods: infer_function(method, signature_of(method, True), True)
+
+def infer_return_stmt(stmt: STMT.Return) -> None:
+    global types
+    type_ = infer(stmt.value) if stmt.value is not None else NIL
+    if signature is not None: returns(type_)
+    types = None
+
+def infer_block_stmt(stmt: STMT.Block) -> None:
+    scopes.append({})
+    try:
+        infer_statements(stmt.statements)
+    finally:
+        scopes.pop()
+
+def infer_if_stmt(stmt: STMT.If) -> None:
+    global types
+    infer(stmt.condition)
+    before = types
+    types = dict(before)
+    statement_inferrers[stmt.thenBranch.kind](stmt.thenBranch)
+    taken = types
+    types = dict(before)
+    if stmt.elseBranch is not None: statement_inferrers[stmt.elseBranch.kind](stmt.elseBranch)
+    types = join(taken, types)
+
+def infer_while_stmt(stmt: STMT.While) -> None:
+    infer_loop(stmt.condition, stmt.body, None)
+
+def infer_for_stmt(stmt: STMT.For) -> None:
+    scopes.append({})
+    try:
+        if stmt.initializer is not None: statement_inferrers[stmt.initializer.kind](stmt.initializer)
+        infer_loop(stmt.condition, stmt.body, stmt.increment)
+    finally:
+        scopes.pop()
+
+def infer_literal_expr(expr: EXPR.Literal) -> int:
+    return literal_types.get(type(expr.value), ANY)
+
+def infer_grouping_expr(expr: EXPR.Grouping) -> int:
+    return infer(expr.expression)
+
+def infer_hoisted_expr(expr: EXPR.Hoisted) -> int:
+    return infer(expr.expression)
+
+def infer_variable_expr(expr: EXPR.Variable) -> int:
+    binding = lookup(expr.name.lexeme)
+    if binding.callees: escape(binding)
+    return read(binding)
+
+def infer_assign_expr(expr: EXPR.Assign) -> int:
+    type_ = infer(expr.value)
+    binding = lookup(expr.name.lexeme)
+    forget_callees(binding)
+    write(binding, type_)
+    return type_
+
+def infer_binary_expr(expr: EXPR.Binary) -> int:
+    left = infer(expr.left)
+    right = infer(expr.right)
+    operator = expr.operator.type
+    expr.proven = None
+    if left == right and left in proven_types:
+        if left == FLOAT or (left == STRING and operator in STRING_OPERATORS): expr.proven = proven_types[left]
+    if not left or not right: return NOTHING
+    if operator == "EQUAL_EQUAL" or operator == "BANG_EQUAL": return BOOL
+    numbers = left & NUMBER and right & NUMBER
+    if operator == "PLUS":
+        return (FLOAT if numbers else NOTHING) | (STRING if left & STRING and right & STRING else NOTHING)
+    if operator in ARITHMETIC_OPERATORS: return FLOAT if numbers else NOTHING
+    return BOOL if numbers else NOTHING
+
+def infer_unary_expr(expr: EXPR.Unary) -> int:
+    right = infer(expr.right)
+    if expr.operator.type == "MINUS":
+        expr.proven = float if right == FLOAT else None
+        return FLOAT if right & NUMBER else NOTHING
+    expr.proven = bool if right == BOOL else None
+    return BOOL if right else NOTHING
+
+def infer_logical_expr(expr: EXPR.Logical) -> int:
+    global types
+    left = infer(expr.left)
+    expr.proven = bool if left == BOOL else None
+    # the right operand isn't always evaluated
+    before = types
+    types = dict(before)
+    right = infer(expr.right)
+    types = join(before, types)
+    return left | right
+
+def infer_call_expr(expr: EXPR.Call) -> int:
+    callees = None
+    if type(expr.callee) is EXPR.Variable: callees = lookup(expr.callee.name.lexeme).callees
+    else: infer(expr.callee)
+    arguments = [infer(argument) for argument in expr.arguments]
+    # the inlined expression runs in place of the call, with the arguments of the call
+    if expr.inlined is not None: infer(expr.inlined)
+    if callees is None: return ANY
+    type_ = NOTHING
+    for callee in callees:
+        if callee is CLOCK: type_ |= FLOAT
+        elif type(callee) is STMT.Class: type_ |= OBJECT
+        elif len(arguments) == len(callee.params):
+            # a call with another number of arguments fails
+            found = signature_of(callee)
+            for i, argument in enumerate(arguments): pass_argument(found, i, argument)
+            type_ |= found.returns
+    return type_
+
+def pass_argument(found: Signature, i: int, type_: int) -> None:
+    global changed
+    if type_ & ~found.params[i]:
+        found.params[i] |= type_
+        changed = True
+
+def infer_get_expr(expr: EXPR.Get) -> int:
+    infer(expr.object)
+    return ANY
+
+def infer_set_expr(expr: EXPR.Set) -> int:
+    infer(expr.object)
+    return infer(expr.value)
+
+def infer_this_expr(expr: EXPR.This) -> int:
+    return OBJECT
+
+def infer_super_expr(expr: EXPR.Super) -> int:
+    # a bound method
+    return OBJECT
+
+
+# Inferring functions indexed by the kind of the node
+expression_inferrers = [None] * len(EXPR.classes)
+expression_inferrers[EXPR.ASSIGN] = infer_assign_expr
+expression_inferrers[EXPR.BINARY] = infer_binary_expr
+expression_inferrers[EXPR.CALL] = infer_call_expr
+expression_inferrers[EXPR.GET] = infer_get_expr
+expression_inferrers[EXPR.GROUPING] = infer_grouping_expr
+expression_inferrers[EXPR.HOISTED] = infer_hoisted_expr
+expression_inferrers[EXPR.LITERAL] = infer_literal_expr
+expression_inferrers[EXPR.LOGICAL] = infer_logical_expr
+expression_inferrers[EXPR.SET] = infer_set_expr
+expression_inferrers[EXPR.SUPER] = infer_super_expr
+expression_inferrers[EXPR.THIS] = infer_this_expr
+expression_inferrers[EXPR.UNARY] = infer_unary_expr
+expression_inferrers[EXPR.VARIABLE] = infer_variable_expr
+
+statement_inferrers = [None] * len(STMT.classes)
+statement_inferrers[STMT.BLOCK] = infer_block_stmt
+statement_inferrers[STMT.CLASS] = infer_class_stmt
+statement_inferrers[STMT.EXPRESSION] = infer_expression_stmt
+statement_inferrers[STMT.FUNCTION] = infer_function_stmt
+statement_inferrers[STMT.IF] = infer_if_stmt
+statement_inferrers[STMT.PRINT] = infer_print_stmt
+statement_inferrers[STMT.VAR] = infer_var_stmt
+statement_inferrers[STMT.RETURN] = infer_return_stmt
+statement_inferrers[STMT.WHILE] = infer_while_stmt
+statement_inferrers[STMT.FOR] = infer_for_stmt
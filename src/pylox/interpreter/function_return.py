@@ -1,6 +0,0 @@
-"""Function return class: Derived from exception"""
-
-class FunctionReturn(Exception):
-    def __init__(self, value):
-        self.value = value
-        
\ No newline at end of file
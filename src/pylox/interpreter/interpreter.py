@@ -1,44 +1,114 @@
 """Lox Intepreter which interprets the parsed statements"""
 import decimal
-from threading import local
 import time
 from typing import List, Optional
-from pylox.interpreter.lox_function import LoxFunction
+from pylox.interpreter.lox_function import LoxFunction, MemoizedFunction
 from pylox.interpreter.lox_instance import LoxInstance
+from pylox.interpreter.shape import POLYMORPHIC_LIMIT
+from pylox.interpreter import memo, stats
 import pylox.parser.expr as EXPR
 import pylox.parser.stmt as STMT
 from pylox.exceptions.exceptions import RuntimeError
-from pylox.environment.environment import Environment
+from pylox.environment.environment import UNDEFINED, Cell, Environment, GlobalEnvironment
 from pylox.interpreter.lox_callable import LoxCallable
-from pylox.interpreter.function_return import FunctionReturn
 from pylox.scanner.token import Token
 from pylox.interpreter.lox_class import LoxClass
 
 
 # State of the interpreter
-globals = Environment()
+globals = GlobalEnvironment()
 env = globals
-locals = {}
 
-def visit_while_stmt(stmt: STMT.While) -> None:
+# Visitor functions indexed by the kind of the expression node, assigned in interpret()
+expr_visitors = [None] * len(EXPR.classes)
+
+def visit_while_stmt(stmt: STMT.While) -> Optional[tuple]:
     """Evaluates the while statement.
 
     Args:
         stmt (STMT.While): While node.
     """
-    while is_truthy(evaluate(stmt.condition)): execute(stmt.body)
-    return None
+    hoisted = stmt.hoisted
+    if hoisted is not None: saved = clear_hoisted(hoisted)
+    try:
+        while is_truthy(evaluate(stmt.condition)):
+            completion = execute(stmt.body)
+            if completion is not None: return completion
+        return None
+    finally:
+        if hoisted is not None: restore_hoisted(hoisted, saved)
+
+def visit_for_stmt(stmt: STMT.For) -> Optional[tuple]:
+    """Evaluates the for loop.
+
+    A variable declared by the initializer lives in an environment of the loop,
+    created once, the iterations run in it. A merged loop appends the variable
+    to the current environment instead, and drops it at the end.
+
+    Args:
+        stmt (STMT.For): For node.
+    """
+    global env
+    if stmt.merged:
+        values = env.values
+        size = len(values)
+        execute(stmt.initializer)
+        completion = run_loop(stmt)
+        del values[size:]
+        return completion
+    if not stmt.scoped:
+        if stmt.initializer is not None: execute(stmt.initializer)
+        return run_loop(stmt)
+
+    previous_env = env
+    env = Environment(enclose=env)
+    try:
+        execute(stmt.initializer)
+        return run_loop(stmt)
+    finally:
+        env = previous_env
+
+def run_loop(stmt: STMT.For) -> Optional[tuple]:
+    """Runs the iterations of a for loop, its initializer is executed"""
+    condition = stmt.condition
+    increment = stmt.increment
+    body = stmt.body
+    hoisted = stmt.hoisted
+    if hoisted is not None: saved = clear_hoisted(hoisted)
+    try:
+        while condition is None or is_truthy(evaluate(condition)):
+            completion = execute(body)
+            if completion is not None: return completion
+            if increment is not None: evaluate(increment)
+        return None
+    finally:
+        if hoisted is not None: restore_hoisted(hoisted, saved)
+
+def clear_hoisted(hoisted: List) -> List:
+    """Clears the values of the expressions hoisted out of a loop as a run of the loop starts.
+
+    Returns:
+        List: the values of the previous run, which is still running if a
+        call ran the loop again. They're restored when the new run ends.
+    """
+    saved = [expr.value for expr in hoisted]
+    for expr in hoisted: expr.value = None
+    return saved
+
+def restore_hoisted(hoisted: List, saved: List) -> None:
+    """Restores the values of the hoisted expressions of the run which started the loop again"""
+    for expr, value in zip(hoisted, saved): expr.value = value
 
-def visit_if_stmt(stmt: STMT.If) -> None:
+def visit_if_stmt(stmt: STMT.If) -> Optional[tuple]:
     """Evaluates the if statement with else clause.
 
     Args:
         stmt (STMT.If): If block node.
     """
     if is_truthy(evaluate(stmt.condition)):
-        execute(stmt.thenBranch)
+        return execute(stmt.thenBranch)
     elif stmt.elseBranch is not None:
-        execute(stmt.elseBranch)
+        return execute(stmt.elseBranch)
     return None
 
 def visit_var_stmt(stmt: STMT.Var) -> None:
@@ -49,7 +119,7 @@ def visit_var_stmt(stmt: STMT.Var) -> None:
     """
     value = None
     if stmt.initializer: value = evaluate(stmt.initializer)
-    env.define(stmt.name, value)
+    env.define(stmt.name, Cell(value) if stmt.captured else value)
     return None
 
 def visit_expression_stmt(stmt: STMT.Expression) -> None:
@@ -67,8 +137,15 @@ def visit_function_stmt(stmt: STMT.Function) -> None:
     Args:
         stmt (STMT.Function): Function node.
     """
-    function = LoxFunction(stmt, env, False)
-    env.define(stmt.name, function)
+    if not stmt.captured:
+        # a pure top-level function keeps its results
+        function = MemoizedFunction if stmt.pure and memo.size else LoxFunction
+        env.define(stmt.name, function(stmt, env.capture(stmt.upvalues), False))
+        return None
+    # the function can capture itself, its cell is defined before the closure is created
+    cell = Cell()
+    env.define(stmt.name, cell)
+    cell.value = LoxFunction(stmt, env.capture(stmt.upvalues), False)
     return None
 
 def visit_print_stmt(stmt: STMT.Print) -> None:
@@ -81,15 +158,18 @@ def visit_print_stmt(stmt: STMT.Print) -> None:
     print(stringify(value))
     return None
 
-def visit_return_stmt(stmt: STMT.Return) -> None:
+def visit_return_stmt(stmt: STMT.Return) -> tuple:
     """Evaluate a returns statement.
 
     Args:
         stmt (STMT.Return): Return node.
+
+    Returns:
+        tuple: the (value,) completion, which the enclosing statements pass up to the call.
     """
     value = None
     if stmt.value: value = evaluate(stmt.value)
-    raise FunctionReturn(value)
+    return (value,)
 
 def visit_class_stmt(stmt: STMT.Class) -> None:
     """Evaluates a class statement.
@@ -97,54 +177,106 @@ def visit_class_stmt(stmt: STMT.Class) -> None:
     Args:
         stmt (STMT.Class): class node.
     """
-    global env
-    
     # super class evaluation.
     superclass = None
     if stmt.superclass:
         superclass = evaluate(stmt.superclass)
         if type(superclass) is not LoxClass: raise RuntimeError(stmt.superclass.name, "Superclass must be a class.")
     
-    env.define(stmt.name, None)
+    # the methods which capture the class refer to its cell, defined before they are created
+    cell = None
+    if stmt.captured:
+        cell = Cell()
+        env.define(stmt.name, cell)
     
-    # super class assignment.
+    # super class assignment, super is only referred to by the methods, so it's always captured.
+    method_env = env
     if stmt.superclass:
-        env = Environment(env)
-        env.define("super", superclass)
+        method_env = Environment(env, [Cell(superclass)])
     
     # Class methods evaluation.
     methods = {}
     for method in stmt.methods:
-        function = LoxFunction(method, env, method.name.lexeme == "init")
+        function = LoxFunction(method, method_env.capture(method.upvalues), method.name.lexeme == "init")
         methods[method.name.lexeme] = function
     
     klass = LoxClass(stmt.name.lexeme, superclass, methods)
     
-    if superclass:
-        env = env.enclosing
-    
-    env.assign(stmt.name, klass)
+    # the class is defined once built, nothing else can observe it in between.
+    if cell is None: env.define(stmt.name, klass)
+    else: cell.value = klass
     
-def visit_block_stmt(stmt: STMT.Block) -> None:
+def visit_block_stmt(stmt: STMT.Block) -> Optional[tuple]:
     """Evaluates a block consisting of statements.
 
+    A block with a scope of its own runs in a new environment, the locals of a
+    merged block are appended to the current environment and dropped at its end.
+    A block which declares nothing runs in the current environment.
+
     Args:
         stmt (STMT.Block): Block node.
     """
-    execute_block(stmt.statements, Environment(enclose=env))
-    return None
+    if stmt.scoped: return execute_block(stmt.statements, Environment(enclose=env))
+    if not stmt.merged: return execute_statements(stmt.statements)
+    values = env.values
+    size = len(values)
+    completion = execute_statements(stmt.statements)
+    del values[size:]
+    return completion
 
 def visit_logical_expr(expr: EXPR.Logical):
     """Evaluates a logical expression.
 
+    The node keeps the operation it applies, specialized for a boolean left
+    operand if its first evaluation got one. A left operand which the type
+    inference proved to be a boolean isn't checked.
+
     Args:
         expr (EXPR.Logical): Logical expression node.
     """
     left = evaluate(expr.left)
-    if expr.operator.type == "OR":
-        if is_truthy(left): return left
-    else:
-        if not is_truthy(left): return left
+    operation = expr.operation
+    if operation is None:
+        if expr.proven is not None:
+            operation = or_proven if expr.operator.type == "OR" else and_proven
+        elif type(left) is bool:
+            operation = or_bool if expr.operator.type == "OR" else and_bool
+            stats.specialized["Logical"] += 1
+        else:
+            operation = or_ if expr.operator.type == "OR" else and_
+        expr.operation = operation
+    return operation(expr, left)
+
+def deoptimize_logical(expr: EXPR.Logical, left):
+    """Rewrites a specialized Logical node, which got a left operand which isn't a boolean, back to the generic operation"""
+    stats.deoptimized["Logical"] += 1
+    operation = expr.operation = or_ if expr.operator.type == "OR" else and_
+    return operation(expr, left)
+
+def or_(expr, left):
+    if is_truthy(left): return left
+    return evaluate(expr.right)
+
+def and_(expr, left):
+    if not is_truthy(left): return left
+    return evaluate(expr.right)
+
+def or_bool(expr, left):
+    if left is True: return left
+    if left is False: return evaluate(expr.right)
+    return deoptimize_logical(expr, left)
+
+def and_bool(expr, left):
+    if left is False: return left
+    if left is True: return evaluate(expr.right)
+    return deoptimize_logical(expr, left)
+
+def or_proven(expr, left):
+    if left: return left
+    return evaluate(expr.right)
+
+def and_proven(expr, left):
+    if not left: return left
     return evaluate(expr.right)
 
 def visit_assign_expr(expr: EXPR.Assign):
@@ -154,9 +286,9 @@ def visit_assign_expr(expr: EXPR.Assign):
         expr (EXPR.Assign): Expression node.
     """
     value = evaluate(expr.value)
-    dist = locals.get(expr)
-    if dist is not None: env.assign_at(dist, expr.name, value)
-    else: globals.assign(expr.name, value)
+    if expr.depth == EXPR.GLOBAL: globals.assign_slot(expr.index, expr.name, value)
+    elif expr.cell: env.get_at(expr.depth, expr.index).value = value
+    else: env.assign_at(expr.depth, expr.index, value)
     return value
 
 def visit_this_expr(expr: EXPR.This):
@@ -165,13 +297,16 @@ def visit_this_expr(expr: EXPR.This):
 
 def visit_super_expr(expr: EXPR.Super):
     """Evaluates the super expression and binds the superclass"""
-    dist = locals.get(expr)
-    superclass = env.get_at(dist, "super")
-    object = env.get_at(dist - 1, "this")
+    superclass = env.get_at(expr.depth, expr.index).value
+    object = look_up_variable(expr.this.keyword, expr.this)
     
-    method = superclass.find_method(expr.method.lexeme)
-    if not method: raise RuntimeError(expr.method, "Undefined property '{}'.".format(expr.method.lexeme))
-    return method.bind(object)
+    # the method is cached for the superclass, which is the same on every run unless the class is declared again
+    if superclass is not expr.superclass:
+        method = superclass.find_method(expr.method.lexeme)
+        if not method: raise RuntimeError(expr.method, "Undefined property '{}'.".format(expr.method.lexeme))
+        expr.superclass = superclass
+        expr.function = method
+    return expr.function.bind(object)
 
 def visit_variable_expr(expr: EXPR.Variable):
     """Evaluates a variable expression"""
@@ -179,15 +314,20 @@ def visit_variable_expr(expr: EXPR.Variable):
 
 def look_up_variable(name: Token, expr: EXPR):
     """Resolves the variable from the locals and globals"""
-    dist = locals.get(expr)
-    if dist is not None:
-        return env.get_at(dist, name.lexeme)
-    else:
-        return globals.get(name)
+    if expr.depth != EXPR.GLOBAL:
+        value = env.get_at(expr.depth, expr.index)
+        return value.value if expr.cell else value
+    value = globals.values[expr.index]
+    if value is UNDEFINED: raise RuntimeError(name, "Undefined variable '" + name.lexeme + "'.")
+    return value
 
 def visit_binary_expr(expr: EXPR.Binary):
     """Evaluates a binary expression.
 
+    The node keeps the operation it applies, specialized for the types of
+    the operands of its first evaluation (see specialize_binary), or for the
+    types proven by the type inference.
+
     Args:
         expr (EXPR.Binary): Binary expression node.
 
@@ -196,32 +336,240 @@ def visit_binary_expr(expr: EXPR.Binary):
     """
     left = evaluate(expr.left)
     right = evaluate(expr.right)
+    operation = expr.operation
+    if operation is None: return specialize_binary(expr, left, right)
+    return operation(expr, left, right)
 
-    if expr.operator.type == "MINUS" and check_number_operands(expr.operator, left, right): return float(left) - float(right)
-    elif expr.operator.type == "SLASH" and  check_number_operands(expr.operator, left, right):
-        if float(right) == 0:
-            return float("nan")
-        return float(left) / float(right)
-    elif expr.operator.type == "STAR" and check_number_operands(expr.operator, left, right): return float(left) * float(right)
-
-    elif expr.operator.type == "PLUS":
-        if is_float(left) and is_float(right): return float(left) + float(right)
-        if type(left) is str and type(right) is str : return str(left+right)
-        raise RuntimeError(expr.operator, "Operands must be two numbers or two strings.")
-    
-    elif expr.operator.type == "GREATER" and check_number_operands(expr.operator, left, right): return float(left) > float(right)
-    elif expr.operator.type == "GREATER_EQUAL" and check_number_operands(expr.operator, left, right): return float(left) >= float(right)
-    elif expr.operator.type == "LESS" and check_number_operands(expr.operator, left, right): return float(left) < float(right)
-    elif expr.operator.type == "LESS_EQUAL" and check_number_operands(expr.operator, left, right): return float(left) <= float(right)
+def specialize_binary(expr: EXPR.Binary, left, right):
+    """Rewrites the operation of a Binary node for the types of its operands, and applies it.
 
-    elif expr.operator.type == "BANG_EQUAL": return not is_equal(left, right)
-    elif expr.operator.type == "EQUAL_EQUAL": return is_equal(left, right)
+    Two floats, or two strings for + and the equality, get an operation which
+    only checks for these types, other operands the generic operation. Operands
+    whose types are proven get an operation which doesn't check them.
+    """
+    if expr.proven is not None: operation = proven_operators[expr.operator.type]
+    elif type(left) is float and type(right) is float: operation = float_operators.get(expr.operator.type)
+    elif type(left) is str and type(right) is str: operation = string_operators.get(expr.operator.type)
+    else: operation = None
+    if operation is None: operation = binary_operators[expr.operator.type]
+    elif expr.proven is None: stats.specialized["Binary"] += 1
+    expr.operation = operation
+    return operation(expr, left, right)
+
+def deoptimize_binary(expr: EXPR.Binary, left, right):
+    """Rewrites a specialized Binary node, which got operands of other types, back to the generic operation"""
+    stats.deoptimized["Binary"] += 1
+    operation = expr.operation = binary_operators[expr.operator.type]
+    return operation(expr, left, right)
+
+def binary(expr: EXPR.Binary, left, right):
+    """Applies the operator of a binary expression to the operands.
 
-    return None
+    Args:
+        expr (EXPR.Binary): Binary expression node.
+        left: left operand.
+        right: right operand.
+
+    Raises:
+        RuntimeError: if the operands are of invalid type.
+    """
+    return binary_operators[expr.operator.type](expr, left, right)
+
+# The generic operations of the binary operators take the node and the operands.
+# Numbers are floats, so two floats (and two strings for +) take the first check,
+# other numbers (e.g. decimals) are checked and converted to float.
+
+def add(expr, left, right):
+    if type(left) is float and type(right) is float: return left + right
+    if type(left) is str and type(right) is str: return left + right
+    if is_number(left) and is_number(right): return float(left) + float(right)
+    raise RuntimeError(expr.operator, "Operands must be two numbers or two strings.")
+
+def subtract(expr, left, right):
+    if type(left) is float and type(right) is float: return left - right
+    check_number_operands(expr.operator, left, right)
+    return float(left) - float(right)
+
+def multiply(expr, left, right):
+    if type(left) is float and type(right) is float: return left * right
+    check_number_operands(expr.operator, left, right)
+    return float(left) * float(right)
+
+def divide(expr, left, right):
+    if type(left) is not float or type(right) is not float:
+        check_number_operands(expr.operator, left, right)
+        left, right = float(left), float(right)
+    if right == 0: return float("nan")
+    return left / right
+
+def greater(expr, left, right):
+    if type(left) is float and type(right) is float: return left > right
+    check_number_operands(expr.operator, left, right)
+    return float(left) > float(right)
+
+def greater_equal(expr, left, right):
+    if type(left) is float and type(right) is float: return left >= right
+    check_number_operands(expr.operator, left, right)
+    return float(left) >= float(right)
+
+def less(expr, left, right):
+    if type(left) is float and type(right) is float: return left < right
+    check_number_operands(expr.operator, left, right)
+    return float(left) < float(right)
+
+def less_equal(expr, left, right):
+    if type(left) is float and type(right) is float: return left <= right
+    check_number_operands(expr.operator, left, right)
+    return float(left) <= float(right)
+
+def equal(expr, left, right):
+    return is_equal(left, right)
+
+def not_equal(expr, left, right):
+    return not is_equal(left, right)
+
+binary_operators = {
+    "PLUS": add,
+    "MINUS": subtract,
+    "STAR": multiply,
+    "SLASH": divide,
+    "GREATER": greater,
+    "GREATER_EQUAL": greater_equal,
+    "LESS": less,
+    "LESS_EQUAL": less_equal,
+    "EQUAL_EQUAL": equal,
+    "BANG_EQUAL": not_equal,
+}
+
+# The specialized operations only check for the types they're specialized for,
+# other operands deoptimize the node.
+
+def add_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left + right
+    return deoptimize_binary(expr, left, right)
+
+def subtract_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left - right
+    return deoptimize_binary(expr, left, right)
+
+def multiply_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left * right
+    return deoptimize_binary(expr, left, right)
+
+def divide_floats(expr, left, right):
+    if type(left) is float and type(right) is float:
+        if right == 0: return float("nan")
+        return left / right
+    return deoptimize_binary(expr, left, right)
+
+def greater_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left > right
+    return deoptimize_binary(expr, left, right)
+
+def greater_equal_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left >= right
+    return deoptimize_binary(expr, left, right)
+
+def less_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left < right
+    return deoptimize_binary(expr, left, right)
+
+def less_equal_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left <= right
+    return deoptimize_binary(expr, left, right)
+
+def equal_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left == right
+    return deoptimize_binary(expr, left, right)
+
+def not_equal_floats(expr, left, right):
+    if type(left) is float and type(right) is float: return left != right
+    return deoptimize_binary(expr, left, right)
+
+def concatenate(expr, left, right):
+    if type(left) is str and type(right) is str: return left + right
+    return deoptimize_binary(expr, left, right)
+
+def equal_strings(expr, left, right):
+    if type(left) is str and type(right) is str: return left == right
+    return deoptimize_binary(expr, left, right)
+
+def not_equal_strings(expr, left, right):
+    if type(left) is str and type(right) is str: return left != right
+    return deoptimize_binary(expr, left, right)
+
+float_operators = {
+    "PLUS": add_floats,
+    "MINUS": subtract_floats,
+    "STAR": multiply_floats,
+    "SLASH": divide_floats,
+    "GREATER": greater_floats,
+    "GREATER_EQUAL": greater_equal_floats,
+    "LESS": less_floats,
+    "LESS_EQUAL": less_equal_floats,
+    "EQUAL_EQUAL": equal_floats,
+    "BANG_EQUAL": not_equal_floats,
+}
+
+string_operators = {
+    "PLUS": concatenate,
+    "EQUAL_EQUAL": equal_strings,
+    "BANG_EQUAL": not_equal_strings,
+}
+
+# The operations of the operands proven to be floats, or strings for +, == and !=,
+# apply the python operator.
+
+def add_proven(expr, left, right):
+    return left + right
+
+def subtract_proven(expr, left, right):
+    return left - right
+
+def multiply_proven(expr, left, right):
+    return left * right
+
+def divide_proven(expr, left, right):
+    if right == 0: return float("nan")
+    return left / right
+
+def greater_proven(expr, left, right):
+    return left > right
+
+def greater_equal_proven(expr, left, right):
+    return left >= right
+
+def less_proven(expr, left, right):
+    return left < right
+
+def less_equal_proven(expr, left, right):
+    return left <= right
+
+def equal_proven(expr, left, right):
+    return left == right
+
+def not_equal_proven(expr, left, right):
+    return left != right
+
+proven_operators = {
+    "PLUS": add_proven,
+    "MINUS": subtract_proven,
+    "STAR": multiply_proven,
+    "SLASH": divide_proven,
+    "GREATER": greater_proven,
+    "GREATER_EQUAL": greater_equal_proven,
+    "LESS": less_proven,
+    "LESS_EQUAL": less_equal_proven,
+    "EQUAL_EQUAL": equal_proven,
+    "BANG_EQUAL": not_equal_proven,
+}
 
 def visit_call_expr(expr: EXPR.Call):
     """Evaluates a call expression.
 
+    A call inlined by the optimizer evaluates the inlined expression if the
+    callee is the function it was inlined from.
+
     Args:
         expr (EXPR.Call): Call expression node.
 
@@ -229,7 +577,10 @@ def visit_call_expr(expr: EXPR.Call):
         RuntimeError: if the expression is not callable.
         RuntimeError: if the length of args mismatch.
     """
+    if type(expr.callee) is EXPR.Get: return invoke(expr)
     callee = evaluate(expr.callee)
+    if expr.inlined is not None and type(callee) is LoxFunction and callee.declaration is expr.target:
+        return evaluate(expr.inlined)
     arguments = [evaluate(arg) for arg in expr.arguments]
     if not isinstance(callee, LoxCallable):
         raise RuntimeError(expr.paren, "Can only call functions and classes.")
@@ -238,6 +589,39 @@ def visit_call_expr(expr: EXPR.Call):
         raise RuntimeError(expr.paren, "Expected {} arguments but got {}.".format(function.arity(), len(arguments)))
     return function.call(globals, arguments)
 
+def invoke(expr: EXPR.Call):
+    """Evaluates a method call, the method is called on the instance without binding it.
+
+    A getter method isn't called, the property it returns is read from the instance.
+
+    Args:
+        expr (EXPR.Call): Call expression node whose callee is a Get.
+
+    Raises:
+        RuntimeError: if the object is not an instance.
+        RuntimeError: if the property is not callable.
+        RuntimeError: if the length of args mismatch.
+    """
+    get = expr.callee
+    object = evaluate(get.object)
+    if type(object) is not LoxInstance: raise RuntimeError(get.name, "Only instances have property")
+    slot = get.slot if object.shape is get.shape else lookup_property(get, object)
+    if type(slot) is int:
+        # a field holding a callable is called like any other callee
+        callee = object.values[slot]
+        arguments = [evaluate(arg) for arg in expr.arguments]
+        if not isinstance(callee, LoxCallable):
+            raise RuntimeError(expr.paren, "Can only call functions and classes.")
+        if len(arguments) != callee.arity():
+            raise RuntimeError(expr.paren, "Expected {} arguments but got {}.".format(callee.arity(), len(arguments)))
+        return callee.call(globals, arguments)
+    getter = slot.declaration.getter
+    if getter is not None and not expr.arguments: return get_property(getter, object)
+    arguments = [evaluate(arg) for arg in expr.arguments]
+    if len(arguments) != slot.arity():
+        raise RuntimeError(expr.paren, "Expected {} arguments but got {}.".format(slot.arity(), len(arguments)))
+    return slot.invoke(object, arguments)
+
 def visit_get_expr(expr: EXPR.Get):
     """Evaluates a Get expression.
 
@@ -248,8 +632,45 @@ def visit_get_expr(expr: EXPR.Get):
         RuntimeError: if the object is not an instance.
     """
     object = evaluate(expr.object)
-    if type(object) is LoxInstance: return object.get(expr.name)
-    raise RuntimeError(expr.name, "Only instances have property")
+    if type(object) is not LoxInstance: raise RuntimeError(expr.name, "Only instances have property")
+    slot = expr.slot if object.shape is expr.shape else lookup_property(expr, object)
+    if type(slot) is int: return object.values[slot]
+    return slot.bind(object)
+
+def get_property(expr: EXPR.Get, object: LoxInstance):
+    """Reads the property of a Get node from an instance, through the inline cache of the node"""
+    slot = expr.slot if object.shape is expr.shape else lookup_property(expr, object)
+    if type(slot) is int: return object.values[slot]
+    return slot.bind(object)
+
+def lookup_property(expr: EXPR.Get, object: LoxInstance):
+    """Looks up a property which missed the inline cache of the Get node, and caches it for the shape of the instance.
+
+    Args:
+        expr (EXPR.Get): Get expression node.
+        object (LoxInstance): the instance.
+
+    Raises:
+        RuntimeError: if the property is not defined in the class.
+
+    Returns:
+        the slot of the field or the unbound method.
+    """
+    shape = object.shape
+    slot = expr.cache.get(shape) if expr.cache is not None else None
+    if slot is None:
+        slot = shape.lookup(expr.name.lexeme)
+        if slot is None: raise RuntimeError(expr.name, "Undefied property {}.".format(expr.name.lexeme))
+        # the first shape specializes the site, a second shape makes it polymorphic
+        if expr.shape is None: stats.specialized["Get"] += 1
+        else:
+            if expr.cache is None:
+                stats.deoptimized["Get"] += 1
+                expr.cache = {expr.shape: expr.slot}
+            if len(expr.cache) < POLYMORPHIC_LIMIT: expr.cache[shape] = slot
+    expr.shape = shape
+    expr.slot = slot
+    return slot
 
 def visit_set_expr(expr: EXPR.Set):
     """Evaluates a Set expression.
@@ -264,23 +685,105 @@ def visit_set_expr(expr: EXPR.Set):
     if type(object) is not LoxInstance: raise RuntimeError(expr.name, "Only instances have fields")
     
     value = evaluate(expr.value)
-    object.set(expr.name, value)
+    # the shape is checked once the value is evaluated, which can add fields to the instance
+    if object.shape is expr.shape:
+        transition = expr.transition
+        if transition is None:
+            object.values[expr.slot] = value
+        else:
+            object.shape = transition
+            object.values.append(value)
+    else:
+        set_property(expr, object, value)
     return value
 
+def set_property(expr: EXPR.Set, object: LoxInstance, value) -> None:
+    """Writes a field which missed the inline cache of the Set node, and caches its lookup for the shape of the instance.
+
+    Args:
+        expr (EXPR.Set): Set expression node.
+        object (LoxInstance): the instance.
+        value: value of the field.
+    """
+    shape = object.shape
+    entry = expr.cache.get(shape) if expr.cache is not None else None
+    if entry is None:
+        entry = shape.store(expr.name.lexeme)
+        # a second shape makes the site polymorphic
+        if expr.shape is not None:
+            if expr.cache is None: expr.cache = {expr.shape: (expr.slot, expr.transition)}
+            if len(expr.cache) < POLYMORPHIC_LIMIT: expr.cache[shape] = entry
+    expr.shape = shape
+    expr.slot, expr.transition = entry
+    if expr.transition is None:
+        object.values[expr.slot] = value
+    else:
+        object.shape = expr.transition
+        object.values.append(value)
+
 def visit_unary_expr(expr: EXPR.Unary):
     """Evaluates a unary expression.
 
+    The node keeps the operation it applies, specialized for a float operand
+    of - or a boolean operand of ! if its first evaluation got one, or for the
+    type proven by the type inference.
+
     Args:
         expr (EXPR.Unary): Unary expression node.
     """
     right = evaluate(expr.right)
-    if expr.operator.type == "MINUS" and check_number_operand(expr.operator, right): return float(-right)
-    elif expr.operator.type == "BANG": return not is_truthy(right)
+    operation = expr.operation
+    if operation is None:
+        if expr.proven is not None: operation = negate_proven if expr.operator.type == "MINUS" else not_proven
+        elif expr.operator.type == "MINUS": operation = negate_float if type(right) is float else negate
+        else: operation = not_bool if type(right) is bool else not_
+        if operation is negate_float or operation is not_bool: stats.specialized["Unary"] += 1
+        expr.operation = operation
+    return operation(expr, right)
+
+def deoptimize_unary(expr: EXPR.Unary, right):
+    """Rewrites a specialized Unary node, which got an operand of another type, back to the generic operation"""
+    stats.deoptimized["Unary"] += 1
+    operation = expr.operation = negate if expr.operator.type == "MINUS" else not_
+    return operation(expr, right)
+
+def unary(expr: EXPR.Unary, right):
+    """Applies the operator of a unary expression to the operand.
 
-    return None
+    Args:
+        expr (EXPR.Unary): Unary expression node.
+        right: the operand.
+
+    Raises:
+        RuntimeError: if the operand of the minus isn't a number.
+    """
+    if expr.operator.type == "MINUS": return negate(expr, right)
+    return not_(expr, right)
+
+def negate(expr, right):
+    if type(right) is float: return -right
+    check_number_operand(expr.operator, right)
+    return float(-right)
+
+def not_(expr, right):
+    return not is_truthy(right)
+
+def negate_float(expr, right):
+    if type(right) is float: return -right
+    return deoptimize_unary(expr, right)
+
+def not_bool(expr, right):
+    if type(right) is bool: return not right
+    return deoptimize_unary(expr, right)
+
+def negate_proven(expr, right):
+    return -right
+
+def not_proven(expr, right):
+    return not right
 
 def check_number_operands(operator, left, right) -> Optional[bool]:
-    """Checks if the operands are float points.
+    """Checks if the operands are numbers.
 
     Args:
         operator (_type_): The operator of the binary expression.
@@ -288,12 +791,12 @@ def check_number_operands(operator, left, right) -> Optional[bool]:
         right: right operand.
 
     Raises:
-        RuntimeError: if the operands aren't float points.
+        RuntimeError: if the operands aren't numbers.
 
     Returns:
-        Optional[bool]: returns true if both the operands can be converted to float.
+        Optional[bool]: returns true if both the operands are numbers.
     """
-    if is_float(left) and is_float(right): return True
+    if is_number(left) and is_number(right): return True
     raise RuntimeError(operator, "Operands must be numbers.")
 
 def check_number_operand(operator, operand) -> bool:
@@ -304,15 +807,26 @@ def check_number_operand(operator, operand) -> bool:
         operand: and the operand which is operating on.
 
     Raises:
-        RuntimeError: if the operand is not a digit.
+        RuntimeError: if the operand is not a number.
     """
-    if type(operand) in [int, float, decimal.Decimal] or str(operand).isdigit(): return True
+    if is_number(operand): return True
     raise RuntimeError(operator, "Operand must be a number.")
 
+def is_number(value) -> bool:
+    """Checks if the value is a lox number, a float or a decimal literal"""
+    # exact types, strings which look like numbers and booleans aren't numbers
+    return type(value) is float or type(value) is decimal.Decimal
+
 def visit_grouping_expr(expr: EXPR.Grouping):
     """Evaluates a Grouping expression"""
     return evaluate(expr.expression)
 
+def visit_hoisted_expr(expr: EXPR.Hoisted):
+    """Evaluates a loop invariant expression on the first pass of the loop, the next passes reuse its value"""
+    value = expr.value
+    if value is None: value = expr.value = (evaluate(expr.expression),)
+    return value[0]
+
 def visit_literal_expr(expr: EXPR.Literal):
     """Evaluates a literal"""
     return expr.value
@@ -339,33 +853,36 @@ def is_float(n) -> bool:
 def stringify(obj) -> str:
     """Converts the object into string and returns"""
     if obj is None: return "nil"
+    if type(obj) is float:
+        text = str(obj)
+        return text[:-2] if text.endswith(".0") else text
     if is_float(obj) and str(obj).endswith(".0"): return str(obj)[:-2]
     return str(obj)
 
 def evaluate(expr):
     """Evaluates an expression"""
-    # calls the accept method on the visitor's class.
-    return expr.accept(expr)
+    # dispatches on the kind tag of the node.
+    return expr_visitors[expr.kind](expr)
 
-def execute(stmt):
-    """Executes a statement"""
-    stmt.accept(stmt)
-    
-def resolve(expr: EXPR, depth: int) -> None:
-    """Resolves a local, global objects and assigns a depth.
+def execute(stmt) -> Optional[tuple]:
+    """Executes a statement.
 
-    Args:
-        expr (EXPR): object expession.
-        depth (int): depth of the expression.
+    Returns:
+        None, or a (value,) tuple once a return statement is executed.
     """
-    locals[expr] = depth
-
-def execute_block(statements: List, _env: Environment):
+    # calls the accept method on the visitor's class, which measured faster than
+    # the kind dispatch on deep recursion (fib).
+    return stmt.accept(stmt)
+    
+def execute_block(statements: List, _env: Environment) -> Optional[tuple]:
     """Executes a block of statements with the provided environment.
 
     Args:
         statements (List): statements to execute.
         _env (Environment): the binded environment.
+
+    Returns:
+        None, or a (value,) tuple once a return statement is executed, the rest of the block is skipped.
     """
     global env
     
@@ -374,26 +891,41 @@ def execute_block(statements: List, _env: Environment):
     env = _env
     try:
         for stmt in statements:
-            execute(stmt)
+            completion = execute(stmt)
+            if completion is not None: return completion
+        return None
     finally:
         # restoring the previous env
         env = previous_env
 
-def interpret(statements: List):
-    # assigning visitor method to the visitor's classes
-    EXPR.Assign.visit = visit_assign_expr
-    EXPR.Binary.visit = visit_binary_expr
-    EXPR.Call.visit = visit_call_expr
-    EXPR.Get.visit = visit_get_expr
-    EXPR.Grouping.visit = visit_grouping_expr
-    EXPR.Literal.visit = visit_literal_expr
-    EXPR.Set.visit = visit_set_expr
-    EXPR.Super.visit = visit_super_expr
-    EXPR.This.visit = visit_this_expr
-    EXPR.Unary.visit = visit_unary_expr
-    EXPR.Variable.visit = visit_variable_expr
-    EXPR.Logical.visit = visit_logical_expr
+def execute_statements(statements: List) -> Optional[tuple]:
+    """Executes a list of statements in the current environment.
 
+    Returns:
+        None, or a (value,) tuple once a return statement is executed, the rest of the statements is skipped.
+    """
+    for stmt in statements:
+        completion = execute(stmt)
+        if completion is not None: return completion
+    return None
+
+def interpret(statements: List):
+    # visitor functions of the expression kinds
+    expr_visitors[EXPR.ASSIGN] = visit_assign_expr
+    expr_visitors[EXPR.BINARY] = visit_binary_expr
+    expr_visitors[EXPR.CALL] = visit_call_expr
+    expr_visitors[EXPR.GET] = visit_get_expr
+    expr_visitors[EXPR.GROUPING] = visit_grouping_expr
+    expr_visitors[EXPR.HOISTED] = visit_hoisted_expr
+    expr_visitors[EXPR.LITERAL] = visit_literal_expr
+    expr_visitors[EXPR.SET] = visit_set_expr
+    expr_visitors[EXPR.SUPER] = visit_super_expr
+    expr_visitors[EXPR.THIS] = visit_this_expr
+    expr_visitors[EXPR.UNARY] = visit_unary_expr
+    expr_visitors[EXPR.VARIABLE] = visit_variable_expr
+    expr_visitors[EXPR.LOGICAL] = visit_logical_expr
+
+    # assigning visitor method to the statement classes
     STMT.Expression.visit = visit_expression_stmt
     STMT.Class.visit = visit_class_stmt
     STMT.Return.visit = visit_return_stmt
@@ -403,6 +935,7 @@ def interpret(statements: List):
     STMT.Block.visit = visit_block_stmt
     STMT.If.visit = visit_if_stmt
     STMT.While.visit = visit_while_stmt
+    STMT.For.visit = visit_for_stmt
     
     def c_arity():
         return 0
@@ -413,6 +946,8 @@ def interpret(statements: List):
     clock_object.arity = c_arity
     clock_object.call = c_call
     globals.define("clock",clock_object)
+    # the globals of the resolved statements index their slots
+    globals.reserve()
     
     # Executing statement by statement
     for stmt in statements:
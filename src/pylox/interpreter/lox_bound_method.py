@@ -0,0 +1,30 @@
+"""LoxBoundMethod is a method read off an instance, which is called later"""
+
+from typing import List
+from pylox.interpreter.lox_callable import LoxCallable
+from pylox.environment.environment import Environment
+
+
+class LoxBoundMethod(LoxCallable):
+    """A method with the instance it's read from, which becomes this when it's called"""
+
+    def __init__(self, method, instance) -> None:
+        """Initialization of the bound method.
+
+        Args:
+            method: the function of the method, a LoxFunction or a ClosureFunction.
+            instance (LoxInstance): the instance bound to this.
+        """
+        self.method = method
+        self.instance = instance
+
+    def arity(self) -> int:
+        """Returns the length of the required parameters"""
+        return self.method.arity()
+
+    def call(self, globals: Environment, arguments: List):
+        """Invokes the method on the instance"""
+        return self.method.invoke(self.instance, arguments)
+
+    def __repr__(self) -> str:
+        return repr(self.method)
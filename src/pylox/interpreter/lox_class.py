@@ -3,6 +3,7 @@
 from pylox.interpreter.lox_callable import LoxCallable
 from pylox.interpreter.lox_function import LoxFunction
 from pylox.interpreter.lox_instance import LoxInstance
+from pylox.interpreter.shape import Shape
 from pylox.environment.environment import Environment
 
 
@@ -18,7 +19,13 @@ class LoxClass(LoxCallable):
         """
         self.name = name
         self.superclass = superclass
-        self.methods: dict = methods
+        # a class can't change once built, so its method table is flattened with the inherited methods.
+        self.methods: dict = dict(superclass.methods) if superclass else {}
+        self.methods.update(methods)
+        self.initializer: LoxFunction = self.methods.get("init")
+        self.initializer_arity = self.initializer.arity() if self.initializer else 0
+        # shape of the new instances, which have no fields
+        self.shape = Shape(self, {})
         
     def call(self, env: Environment, arguments) -> LoxInstance:
         """Calling the class to create an instance
@@ -31,8 +38,7 @@ class LoxClass(LoxCallable):
             LoxInstance: returns the instance.
         """
         instance = LoxInstance(self)
-        initializer: LoxFunction = self.find_method("init")
-        if initializer: initializer.bind(instance).call(env, arguments)
+        if self.initializer: self.initializer.invoke(instance, arguments)
         return instance
     
     def find_method(self, name):
@@ -44,15 +50,11 @@ class LoxClass(LoxCallable):
         Returns:
             method: either method or None
         """
-        if name in self.methods: return self.methods[name]
-        if self.superclass: return self.superclass.find_method(name)
-        return None
+        return self.methods.get(name)
     
     def arity(self) -> int:
         """Return the length of the required arguments for the class constructor"""
-        initializer: LoxFunction = self.find_method("init")
-        if initializer: return initializer.arity()
-        return 0
+        return self.initializer_arity
     
     def __repr__(self) -> str:
         return str(self.name)
@@ -3,10 +3,11 @@
 from typing import List
 from pylox.interpreter.lox_callable import LoxCallable
 from pylox.interpreter.lox_instance import LoxInstance
+from pylox.interpreter.lox_bound_method import LoxBoundMethod
+from pylox.interpreter import memo
 import pylox.parser.stmt as STMT
 import pylox.interpreter.interpreter as interepreter
-from pylox.environment.environment import Environment
-from pylox.interpreter.function_return import FunctionReturn
+from pylox.environment.environment import Environment, box
 
 class LoxFunction(LoxCallable):
     """Class which provides interface to lox functions while evaluation"""
@@ -15,7 +16,7 @@ class LoxFunction(LoxCallable):
 
         Args:
             declaration (STMT.Function): function declaration.
-            closure (Environment): The enviroment which is bounded to the function (scope env).
+            closure (Environment): The enviroment of the cells captured by the function.
             is_initializer (bool): if the function is initializer or not.
         """
         self.declaration = declaration
@@ -29,30 +30,52 @@ class LoxFunction(LoxCallable):
     def __repr__(self) -> str:
         return "<fn {}>".format(self.declaration.name.lexeme)
     
-    def bind(self, instance: LoxInstance):
-        """Binds the given interface to a function"""
-        env = Environment(self.closure)
-        env.define("this", instance)
-        return LoxFunction(self.declaration, env, self.is_initializer)
+    def bind(self, instance: LoxInstance) -> LoxBoundMethod:
+        """Binds the given instance to the method as this"""
+        return LoxBoundMethod(self, instance)
     
     def call(self, globals: Environment, arguments: List):
         """The call interface of the lox function.
 
         Args:
             globals (Environment): the scope env.
-            arguments (List): arguments to the function call.
+            arguments (List): arguments to the function call, the parameters take their slots.
         """
-        env = Environment(self.closure)
-        for i in range(len(self.declaration.params)):
-            env.define(self.declaration.params[i], arguments[i])
-                
-        try:
-            interepreter.execute_block(self.declaration.body, env)
-        except FunctionReturn as return_value:
-            if self.is_initializer: self.closure.get_at(0, "this")
-            return return_value.value
-        
-        if self.is_initializer: return self.closure.get_at(0, "this")
+        # a function without params and locals has no frame, it runs in its closure
+        if not self.declaration.scoped: env = self.closure
+        elif self.declaration.cells: env = Environment(self.closure, box(list(arguments), self.declaration.cells))
+        else: env = Environment(self.closure, list(arguments))
+        completion = interepreter.execute_block(self.declaration.body, env)
+        if completion is not None: return completion[0]
         return None
     
-    
+    def invoke(self, instance: LoxInstance, arguments: List):
+        """Calls the method on an instance, this and the arguments take the slots of a single frame.
+
+        Args:
+            instance (LoxInstance): the instance bound to this.
+            arguments (List): arguments to the method call.
+        """
+        frame = [instance, *arguments]
+        if self.declaration.cells: box(frame, self.declaration.cells)
+        env = Environment(self.closure, frame)
+        completion = interepreter.execute_block(self.declaration.body, env)
+        if self.is_initializer: return instance
+        if completion is not None: return completion[0]
+        return None
+
+
+class MemoizedFunction(LoxFunction):
+    """Pure lox function whose results are kept by their arguments"""
+    def __init__(self, declaration: STMT.Function, closure: Environment, is_initializer: bool) -> None:
+        super().__init__(declaration, closure, is_initializer)
+        self.memo = memo.memoize(declaration.name.lexeme, self.compute)
+
+    def compute(self, *arguments):
+        """Runs the function, the memo calls it with the arguments it has no result for"""
+        return LoxFunction.call(self, None, arguments)
+
+    def call(self, globals: Environment, arguments: List):
+        """Returns the kept result of the arguments, or calls the function"""
+        if memo.memoizable(arguments): return self.memo(*arguments)
+        return LoxFunction.call(self, globals, arguments)
@@ -5,12 +5,15 @@ from pylox.scanner.token import Token
 
 
 class LoxInstance:
-    """Instance of lox classes"""
+    """Instance of lox classes, its fields are stored in the slots given by its shape"""
+    __slots__ = ("klass", "shape", "values")
+
     def __init__(self, klass) -> None:
         """Intialization of class and fields"""
         self.klass = klass
-        self.fields = {}
-    
+        self.shape = klass.shape
+        self.values = []
+
     def get(self, name: Token):
         """For getting the value of a property.
 
@@ -20,14 +23,24 @@ class LoxInstance:
         Raises:
             RuntimeError: if the property is not defined in the class.
         """
-        if name.lexeme in self.fields: return self.fields[name.lexeme]
-        method = self.klass.find_method(name.lexeme)
-        if method: return method.bind(self)
+        slot = self.shape.lookup(name.lexeme)
+        if type(slot) is int: return self.values[slot]
+        if slot is not None: return slot.bind(self)
         raise RuntimeError(name, "Undefied property {}.".format(name.lexeme))
-    
+
     def set(self, name: Token, value) -> None:
         """Sets the property of a field"""
-        self.fields[name.lexeme] = value
-    
+        slot, shape = self.shape.store(name.lexeme)
+        if shape is None:
+            self.values[slot] = value
+        else:
+            self.shape = shape
+            self.values.append(value)
+
+    @property
+    def fields(self) -> dict:
+        """Fields of the instance by name"""
+        return dict(zip(self.shape.slots, self.values))
+
     def __repr__(self) -> str:
-        return str(self.klass.name) + " instance"
\ No newline at end of file
+        return str(self.klass.name) + " instance"
@@ -0,0 +1,37 @@
+"""Memos of the pure functions, which keep their results by their arguments (--memoize=N)"""
+
+import functools
+from typing import List
+
+# Results kept by the memo of a pure function, the least recently used is dropped
+# past it. 0 doesn't memoize
+size = 0
+# Memos of the pure functions created by the run, by name
+memos = {}
+
+
+def memoize(name: str, compute):
+    """Wraps the function computing the result of a call from its arguments into a memo.
+
+    Args:
+        name (str): name of the lox function, its hits and misses are reported by it.
+        compute: python function of the arguments, which runs the lox function.
+
+    Returns:
+        the memo, called with the arguments in place of compute.
+    """
+    memo = functools.lru_cache(maxsize=size)(compute)
+    memos[name] = memo
+    return memo
+
+def memoizable(arguments: List) -> bool:
+    """Checks if the result of a call can be kept by its arguments, they're all numbers, strings or nil.
+
+    A zero isn't, -0 is the same key but prints differently. The decimal literals
+    aren't either, 1.50 is the same key as 1.5.
+    """
+    for argument in arguments:
+        if type(argument) is float:
+            if not argument: return False
+        elif type(argument) is not str and argument is not None: return False
+    return True
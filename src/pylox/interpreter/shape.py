@@ -0,0 +1,63 @@
+"""Shapes (hidden classes) of lox instances.
+
+A shape maps the field names of an instance to the slots of its value list. The
+instances of a class start with the root shape of the class and move to the next
+shape along a transition when a field is added, so the instances which got the
+same fields in the same order share their shape. A property access site caches
+the lookup for the shapes it has seen (inline cache).
+"""
+
+# Number of shapes an inline cache holds, a site seeing more shapes is megamorphic
+# and only keeps the last one.
+POLYMORPHIC_LIMIT = 4
+
+
+class Shape:
+    """Layout of the fields of instances of a class"""
+    __slots__ = ("klass", "slots", "transitions")
+
+    def __init__(self, klass, slots: dict) -> None:
+        """Initializes the shape.
+
+        Args:
+            klass: class of the instances, methods are looked up in it.
+            slots (dict): slot of each field name.
+        """
+        self.klass = klass
+        self.slots = slots
+        self.transitions = {}
+
+    def add(self, name: str) -> "Shape":
+        """Returns the shape with the field name appended, shared by all the instances adding it"""
+        shape = self.transitions.get(name)
+        if shape is None:
+            slots = dict(self.slots)
+            slots[name] = len(slots)
+            shape = self.transitions[name] = Shape(self.klass, slots)
+        return shape
+
+    def lookup(self, name: str):
+        """Looks up a property for a read.
+
+        Args:
+            name (str): name of the property.
+
+        Returns:
+            the slot of the field, the unbound method or None if the property is not defined.
+        """
+        slot = self.slots.get(name)
+        if slot is not None: return slot
+        return self.klass.find_method(name)
+
+    def store(self, name: str):
+        """Looks up a field for a write.
+
+        Args:
+            name (str): name of the field.
+
+        Returns:
+            the slot of the field and the shape to move to, None if the field already exists.
+        """
+        slot = self.slots.get(name)
+        if slot is not None: return slot, None
+        return len(self.slots), self.add(name)
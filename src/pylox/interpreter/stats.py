@@ -0,0 +1,72 @@
+"""Counters of the tree walk interpreter and the closure compiler, reported with --stats"""
+
+import gc
+import importlib
+import sys
+from pylox.interpreter import memo
+
+# Nodes which specialized their operation for the types of their operands,
+# and the specialized nodes which got other types and went back to the generic operation
+specialized = dict.fromkeys(("Binary", "Unary", "Logical", "Get"), 0)
+deoptimized = dict.fromkeys(("Binary", "Unary", "Logical", "Get"), 0)
+
+# Runtime objects allocated while the allocations are tracked, by class
+allocations = {}
+# Classes whose allocations are tracked, by module
+ALLOCATED = {
+    "pylox.environment.environment": ["Environment"],
+    "pylox.interpreter.lox_function": ["LoxFunction"],
+    "pylox.interpreter.lox_bound_method": ["LoxBoundMethod"],
+    "pylox.interpreter.lox_instance": ["LoxInstance"],
+    "pylox.closure.closure_function": ["ClosureFunction"],
+}
+# Garbage collections when the allocations started to be tracked
+collections = 0
+
+
+def reset() -> None:
+    """Clears the counters"""
+    global collections
+    for name in specialized:
+        specialized[name] = 0
+        deoptimized[name] = 0
+    for name in allocations: allocations[name] = 0
+    collections = sum(generation["collections"] for generation in gc.get_stats())
+
+def count_allocations(cls) -> None:
+    """Counts the instances of the class as they are initialized"""
+    init = cls.__init__
+    name = cls.__name__
+    def counted_init(self, *args, **kwargs):
+        allocations[name] += 1
+        init(self, *args, **kwargs)
+    cls.__init__ = counted_init
+    allocations[name] = 0
+
+def track_allocations() -> None:
+    """Starts counting the allocations of the runtime objects.
+
+    The counting wraps the initializers of the classes, so it costs nothing
+    until it's started.
+    """
+    for module, names in ALLOCATED.items():
+        module = importlib.import_module(module)
+        for name in names:
+            if name not in allocations: count_allocations(getattr(module, name))
+    reset()
+
+def report(file=sys.stderr) -> None:
+    """Prints the counters as tables"""
+    print("{:<16}{:>14}{:>14}".format("node", "specialized", "deoptimized"), file=file)
+    for name in specialized:
+        print("{:<16}{:>14}{:>14}".format(name, specialized[name], deoptimized[name]), file=file)
+    if memo.memos:
+        print("{:<16}{:>14}{:>14}".format("memoized", "hits", "misses"), file=file)
+        for name, cached in memo.memos.items():
+            info = cached.cache_info()
+            print("{:<16}{:>14}{:>14}".format(name, info.hits, info.misses), file=file)
+    if not allocations: return
+    print("{:<16}{:>14}".format("allocated", "count"), file=file)
+    for name, count in allocations.items():
+        print("{:<16}{:>14}".format(name, count), file=file)
+    print("{:<16}{:>14}".format("gc collections", sum(generation["collections"] for generation in gc.get_stats()) - collections), file=file)
@@ -1,48 +1,109 @@
 
 from shutil import ExecError
+import gc
 import sys
 import readline
 import argparse
+from decimal import Decimal
 from pylox.scanner.scanner import Scanner
 from pylox.parser.parser import Parser
 from pylox.interpreter.interpreter import interpret
+from pylox.interpreter import memo, stats
+from pylox.closure.compiler import interpret as closure_interpret
+from pylox.vm.vm import interpret as vm_interpret
 # from pylox.parser.ast_printer import ast_printer
 from pylox.resolver.resolver import resolve
+from pylox.optimizer.optimizer import optimize_program
+from pylox.inference.inference import infer_types, explain
+from pylox.purity.purity import analyze_purity
+from pylox.cache import cache
 from pylox.exceptions.exceptions import SyntaxError, ParseError, RuntimeError
 from pylox.error_reporter import report as error_report
 
 
 
-def run_prompt():
+# Execution engines
+engines = {
+    "tree": interpret,
+    "closure": closure_interpret,
+    "vm": vm_interpret,
+}
+
+# Types of the number literals
+numerics = {
+    "float": float,
+    "decimal": Decimal,
+}
+
+
+def run_prompt(engine="tree", numeric="float", optimize=False, max_call_depth=None):
     try:
         readline.parse_and_bind('tab: complete')
         readline.parse_and_bind('set editing-mode vi')
         readline.parse_and_bind('C-x: "\x16\n"')
         while True:
             cmd = input("> ")
-            run(cmd)
+            run(cmd, engine, numeric, optimize=optimize, max_call_depth=max_call_depth, whole=False)
     except (KeyboardInterrupt, EOFError) as e:
         print("Bye :)")
         sys.exit(0)
         
-def run_file(file):
+def run_file(file, engine="tree", numeric="float", use_cache=True, optimize=False, max_call_depth=None, explain_types=False, memoize=0):
     src = file.read()
     if src == "":
         print("Your source file is empty :/")
         return
-    run(src)
+    # stdin has no place for a cache file
+    path = file.name if use_cache and not file.name.startswith("<") else None
+    run(src, engine, numeric, path, optimize, max_call_depth, explain_types=explain_types, memoize=memoize)
+
+def compile_program(src, numeric="float", optimize=False, whole=True):
+    """Scans, parses, resolves and optionally optimizes the source into statements.
+
+    The types and the pure functions of a whole program are inferred, a line of
+    the repl isn't: its globals and functions are used by the next lines.
+    """
+    scanner = Scanner(src, numerics[numeric])
+    tokens = scanner.scan_buffer()
+    
+    parser = Parser(tokens)
+    statements = parser.parse()
+    
+    resolve(statements)
+    
+    if optimize: statements = optimize_program(statements)
+    if whole:
+        infer_types(statements)
+        analyze_purity(statements)
+    return statements
 
-def run(src):
+def run(src, engine="tree", numeric="float", path=None, optimize=False, max_call_depth=None, whole=True, explain_types=False, memoize=0):
     try:
-        scanner = Scanner(src)
-        tokens = scanner.scan_tokens()
-        
-        parser = Parser(tokens)
-        statements = parser.parse()
+        # the frontend only allocates nodes which live for the whole run, collecting
+        # them is wasted time. The nodes of a whole program are frozen afterwards, so
+        # the collections of the run don't traverse them either. A line of the repl
+        # isn't frozen, its nodes and garbage are freed after it.
+        gc.disable()
+        try:
+            # the resolved program of a script is cached by its path
+            options = (numeric, "-O") if optimize else (numeric,)
+            statements = cache.load(path, src, *options) if path else None
+            if statements is None:
+                statements = compile_program(src, numeric, optimize, whole)
+                if path: cache.store(path, src, statements, *options)
+        finally:
+            if whole: gc.freeze()
+            gc.enable()
         
-        resolve(statements)
+        if explain_types:
+            explain(statements)
+            return
         
-        interpret(statements)
+        # the pure functions keep their last results on the tree and closure engines
+        memo.size = memoize
+        # only the vm limits the depth of the calls itself, the other engines recurse in python
+        if max_call_depth is None: engines[engine](statements)
+        else: engines[engine](statements, max_call_depth)
         
     except SyntaxError as e:
         error_report(e.line, e.char, e, "SyntaxError")
@@ -64,12 +125,36 @@ def run(src):
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("infile", nargs="?", type=argparse.FileType('r'), default=None)
+    parser.add_argument("--engine", choices=engines.keys(), default="tree", help="execution engine: tree walk interpreter, closure compiler or bytecode vm")
+    parser.add_argument("-O", dest="optimize", action="store_true", help="fold the constants and eliminate the dead code")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write the compiled program cache (__loxcache__)")
+    parser.add_argument("--numeric", choices=numerics.keys(), default="float", help="number model: native floats or exact decimal literals")
+    parser.add_argument("--max-call-depth", type=int, default=None, help="maximum depth of the lox calls on the vm, which keeps its frames off the python stack (default: 10000)")
+    parser.add_argument("--explain-types", action="store_true", help="print the share of the operators whose operand types are proven by the type inference, by function, instead of running the script")
+    parser.add_argument("--stats", action="store_true", help="print the counters of the tree walk interpreter (specialized nodes), the allocations of the runtime objects and the hits of the memos to stderr after the script")
+    parser.add_argument("--memoize", type=int, default=0, metavar="N", help="keep the results of the last N calls of every pure function by their arguments (tree and closure engines)")
 
     args = parser.parse_args()
+    if args.max_call_depth is not None and args.engine != "vm":
+        parser.error("--max-call-depth needs --engine=vm, the other engines recurse in python")
+    if args.max_call_depth is not None and args.max_call_depth < 1:
+        parser.error("--max-call-depth must be at least 1")
+    if args.stats and (args.engine == "vm" or args.infile is None):
+        parser.error("--stats needs a script run with --engine=tree or --engine=closure")
+    if args.memoize < 0:
+        parser.error("--memoize must be at least 0")
+    if args.memoize and args.engine == "vm":
+        parser.error("--memoize needs --engine=tree or --engine=closure")
+    if args.memoize and args.infile is None:
+        parser.error("--memoize needs a script, the functions of the repl lines aren't analyzed")
+    if args.explain_types and args.infile is None:
+        parser.error("--explain-types needs a script, the types of the repl lines aren't inferred")
     if args.infile is None:
-        run_prompt()
+        run_prompt(args.engine, args.numeric, args.optimize, args.max_call_depth)
     else:
-        run_file(args.infile)
+        if args.stats: stats.track_allocations()
+        run_file(args.infile, args.engine, args.numeric, not args.no_cache, args.optimize, args.max_call_depth, args.explain_types, args.memoize)
+        if args.stats: stats.report()
         
 
 
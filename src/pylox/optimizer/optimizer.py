@@ -0,0 +1,427 @@
+"""Optimizer which folds the constant expressions, eliminates the dead code, inlines the small functions and hoists the loop invariant expressions of the resolved statements.
+
+It runs between the resolver and the interpreter (-O). The constants are folded
+with the operators of the tree walk interpreter, so they keep the lox semantics.
+An operation which fails isn't folded, it raises its error at runtime.
+
+A call of a top-level function which only returns a small expression gets a copy
+of the expression, with the arguments in place of the params, in its "inlined"
+slot. The engines evaluate it instead of calling the function if the callee is
+still that function, the copy keeps the tokens of the function so its errors
+report the same lines. A method which only returns a property of this is marked
+as a getter, the method calls read the property without calling it.
+
+The invariant expressions of a loop are wrapped into Hoisted nodes listed in the
+"hoisted" slot of the loop. A hoisted expression is evaluated where it stands on
+the first pass of every run of its loop, the next passes reuse its value.
+"""
+
+from typing import List, Optional
+import pylox.parser.expr as EXPR
+import pylox.parser.stmt as STMT
+from pylox.interpreter.interpreter import binary, unary, is_truthy
+
+# Largest number of nodes of the returned expression of an inlined function
+INLINE_LIMIT = 16
+
+# The top-level functions whose calls are inlined, by name
+inlinable = {}
+# The functions being inlined, their calls in the inlined expression aren't inlined again
+inlining = set()
+
+# The loop of every hoisted expression, an expression hoisted out of a loop moves to
+# the enclosing loop if it's invariant there too
+hoisted_by = {}
+# Nodes which evaluate their operands and nothing else, they're invariant if their operands are
+PURE = (EXPR.Binary, EXPR.Unary, EXPR.Logical, EXPR.Grouping, EXPR.Hoisted)
+# Nodes which assign or declare a name
+BINDINGS = (EXPR.Assign, STMT.Var, STMT.Function, STMT.Class)
+
+
+def fold_binary_expr(expr: EXPR.Binary):
+    """Folds a binary expression of two constants"""
+    expr.left = fold(expr.left)
+    expr.right = fold(expr.right)
+    if type(expr.left) is EXPR.Literal and type(expr.right) is EXPR.Literal:
+        try:
+            return EXPR.Literal(binary(expr, expr.left.value, expr.right.value))
+        except Exception:
+            pass
+    return expr
+
+def fold_unary_expr(expr: EXPR.Unary):
+    """Folds a unary expression of a constant"""
+    expr.right = fold(expr.right)
+    if type(expr.right) is EXPR.Literal:
+        try:
+            return EXPR.Literal(unary(expr, expr.right.value))
+        except Exception:
+            pass
+    return expr
+
+def fold_logical_expr(expr: EXPR.Logical):
+    """Folds a logical expression with a constant left operand into one of its operands"""
+    expr.left = fold(expr.left)
+    expr.right = fold(expr.right)
+    if type(expr.left) is EXPR.Literal:
+        if expr.operator.type == "OR": return expr.left if is_truthy(expr.left.value) else expr.right
+        return expr.right if is_truthy(expr.left.value) else expr.left
+    return expr
+
+def fold_grouping_expr(expr: EXPR.Grouping):
+    """A grouping only evaluates its expression, so it's replaced by it"""
+    return fold(expr.expression)
+
+def fold_assign_expr(expr: EXPR.Assign):
+    expr.value = fold(expr.value)
+    return expr
+
+def fold_call_expr(expr: EXPR.Call):
+    """Folds the arguments of a call, and inlines the call of a small top-level function"""
+    expr.callee = fold(expr.callee)
+    expr.arguments = [fold(argument) for argument in expr.arguments]
+    callee = expr.callee
+    if type(callee) is not EXPR.Variable or callee.depth != EXPR.GLOBAL: return expr
+    function = inlinable.get(callee.name.lexeme)
+    # a call with another number of arguments fails, it's left to raise its error
+    if function is None or function in inlining or len(function.params) != len(expr.arguments): return expr
+    if not all(is_trivial(argument) for argument in expr.arguments): return expr
+    inlining.add(function)
+    try:
+        params = {param.lexeme: argument for param, argument in zip(function.params, expr.arguments)}
+        expr.inlined = fold(copy_expression(function.body[0].value, params))
+        expr.target = function
+    finally:
+        inlining.discard(function)
+    return expr
+
+def is_trivial(expr) -> bool:
+    """Checks if an argument can be evaluated in place of its param, as often as the param is read.
+
+    A constant, this and a local which no closure captures keep their value while
+    the inlined expression runs, nothing else can assign them.
+    """
+    if type(expr) is EXPR.Literal or type(expr) is EXPR.This: return True
+    return type(expr) is EXPR.Variable and expr.depth != EXPR.GLOBAL and not expr.cell
+
+def copy_expression(expr, params: dict):
+    """Copies the returned expression of an inlined function, its params are replaced by the arguments.
+
+    Args:
+        expr: expression to copy, made of the nodes accepted by inlinable_expression.
+        params (dict): the argument nodes by the names of the params.
+    """
+    kind = type(expr)
+    if kind is EXPR.Variable:
+        if expr.depth == EXPR.GLOBAL: return expr
+        return params[expr.name.lexeme]
+    if kind is EXPR.Literal: return expr
+    if kind is EXPR.Binary: return EXPR.Binary(copy_expression(expr.left, params), expr.operator, copy_expression(expr.right, params))
+    if kind is EXPR.Logical: return EXPR.Logical(copy_expression(expr.left, params), expr.operator, copy_expression(expr.right, params))
+    if kind is EXPR.Unary: return EXPR.Unary(expr.operator, copy_expression(expr.right, params))
+    if kind is EXPR.Grouping: return EXPR.Grouping(copy_expression(expr.expression, params))
+    if kind is EXPR.Get: return EXPR.Get(copy_expression(expr.object, params), expr.name)
+    return EXPR.Call(copy_expression(expr.callee, params), expr.paren, [copy_expression(argument, params) for argument in expr.arguments])
+
+def inlinable_expression(expr, function: STMT.Function) -> bool:
+    """Checks if the returned expression of a top-level function can be inlined.
+
+    It has at most INLINE_LIMIT nodes, reads only globals and the params, assigns
+    nothing and doesn't refer to the function itself.
+    """
+    params = {param.lexeme for param in function.params}
+    pending = [expr]
+    count = 0
+    while pending:
+        node = pending.pop()
+        count += 1
+        if count > INLINE_LIMIT: return False
+        kind = type(node)
+        if kind is EXPR.Variable:
+            if node.depth != EXPR.GLOBAL: continue
+            if node.name.lexeme == function.name.lexeme: return False
+        elif kind is EXPR.Binary or kind is EXPR.Logical: pending += [node.left, node.right]
+        elif kind is EXPR.Unary: pending.append(node.right)
+        elif kind is EXPR.Grouping: pending.append(node.expression)
+        elif kind is EXPR.Get: pending.append(node.object)
+        elif kind is EXPR.Call: pending += [node.callee, *node.arguments]
+        elif kind is not EXPR.Literal: return False
+    return True
+
+def fold_get_expr(expr: EXPR.Get):
+    expr.object = fold(expr.object)
+    return expr
+
+def fold_set_expr(expr: EXPR.Set):
+    expr.object = fold(expr.object)
+    expr.value = fold(expr.value)
+    return expr
+
+def fold_leaf_expr(expr):
+    """Literals, variables, this and super have nothing to fold"""
+    return expr
+
+def optimize_expression_stmt(stmt: STMT.Expression) -> Optional[STMT.Expression]:
+    """Drops an expression statement which is a constant, it has no effect"""
+    stmt.expression = fold(stmt.expression)
+    if type(stmt.expression) is EXPR.Literal: return None
+    return stmt
+
+def optimize_print_stmt(stmt: STMT.Print) -> STMT.Print:
+    stmt.expression = fold(stmt.expression)
+    return stmt
+
+def optimize_var_stmt(stmt: STMT.Var) -> STMT.Var:
+    if stmt.initializer is not None: stmt.initializer = fold(stmt.initializer)
+    return stmt
+
+def optimize_return_stmt(stmt: STMT.Return) -> STMT.Return:
+    if stmt.value is not None: stmt.value = fold(stmt.value)
+    return stmt
+
+def optimize_function_stmt(stmt: STMT.Function) -> STMT.Function:
+    stmt.body = optimize_statements(stmt.body)
+    return stmt
+
+def optimize_class_stmt(stmt: STMT.Class) -> STMT.Class:
+    """Optimizes the methods, a method which only returns a property of this is a getter"""
+    for method in stmt.methods:
+        optimize_function_stmt(method)
+        body = method.body
+        if method.params or len(body) != 1 or type(body[0]) is not STMT.Return: continue
+        value = body[0].value
+        if type(value) is EXPR.Get and type(value.object) is EXPR.This: method.getter = value
+    return stmt
+
+def optimize_block_stmt(stmt: STMT.Block) -> Optional[STMT.Block]:
+    """Optimizes the statements of the block, an empty block is dropped"""
+    stmt.statements = optimize_statements(stmt.statements)
+    if not stmt.statements: return None
+    return stmt
+
+def optimize_if_stmt(stmt: STMT.If):
+    """Replaces an if statement with a constant condition by the taken branch"""
+    stmt.condition = fold(stmt.condition)
+    if type(stmt.condition) is EXPR.Literal:
+        if is_truthy(stmt.condition.value): return optimize(stmt.thenBranch)
+        if stmt.elseBranch is not None: return optimize(stmt.elseBranch)
+        return None
+    stmt.thenBranch = optimize_branch(stmt.thenBranch)
+    if stmt.elseBranch is not None: stmt.elseBranch = optimize(stmt.elseBranch)
+    return stmt
+
+def optimize_while_stmt(stmt: STMT.While) -> Optional[STMT.While]:
+    """Drops a while statement whose condition is a constant false, and hoists the invariant expressions of the loop"""
+    stmt.condition = fold(stmt.condition)
+    if type(stmt.condition) is EXPR.Literal and not is_truthy(stmt.condition.value): return None
+    stmt.body = optimize_branch(stmt.body)
+    hoist_loop(stmt, ("condition", "body"))
+    return stmt
+
+def optimize_for_stmt(stmt: STMT.For):
+    """Optimizes a for loop, a loop whose condition is a constant false only runs its initializer"""
+    if stmt.condition is not None:
+        stmt.condition = fold(stmt.condition)
+        if type(stmt.condition) is EXPR.Literal:
+            if is_truthy(stmt.condition.value): stmt.condition = None
+            elif type(stmt.initializer) is STMT.Var:
+                # the variable stays in the scope the loop was resolved with
+                block = STMT.Block([optimize(stmt.initializer)])
+                block.scoped, block.merged = stmt.scoped, stmt.merged
+                return block
+            elif stmt.initializer is not None: return optimize(stmt.initializer)
+            else: return None
+    if stmt.initializer is not None: stmt.initializer = optimize(stmt.initializer)
+    if stmt.increment is not None:
+        stmt.increment = fold(stmt.increment)
+        # a constant increment has no effect
+        if type(stmt.increment) is EXPR.Literal: stmt.increment = None
+    stmt.body = optimize_branch(stmt.body)
+    # the initializer runs once, before the loop
+    hoist_loop(stmt, ("condition", "increment", "body"))
+    return stmt
+
+def hoist_loop(loop, fields) -> None:
+    """Hoists the largest invariant expressions of the loop.
+
+    An expression is invariant if it only operates on constants, this and the
+    variables which the loop neither assigns nor declares, it has no call,
+    property access or assignment. If the loop calls anything, only the locals
+    which no closure captures are invariant, the callee can assign the globals
+    and the captured variables.
+
+    Args:
+        loop: While or For node.
+        fields: the fields of the loop which run on every pass.
+    """
+    nodes = list(walk([getattr(loop, field) for field in fields]))
+    assigned = {node.name.lexeme for node in nodes if type(node) in BINDINGS}
+    calls = any(type(node) is EXPR.Call for node in nodes)
+    loop.hoisted = []
+    hoist_fields(loop, fields, loop, assigned, calls)
+    if not loop.hoisted: loop.hoisted = None
+
+def hoist(node, loop, assigned: set, calls: bool) -> bool:
+    """Hoists the largest invariant expressions under the node out of the loop.
+
+    Returns:
+        bool: True if the node itself is invariant, its parent hoists it.
+    """
+    kind = type(node)
+    if kind is EXPR.Literal or kind is EXPR.This: return True
+    if kind is EXPR.Variable:
+        if node.name.lexeme in assigned: return False
+        return not calls or (node.depth != EXPR.GLOBAL and not node.cell)
+    # the functions and classes run out of the loop
+    if kind is STMT.Function or kind is STMT.Class: return False
+    return hoist_fields(node, node.__match_args__, loop, assigned, calls)
+
+def hoist_fields(node, fields, loop, assigned: set, calls: bool) -> bool:
+    """Hoists the invariant expressions of the fields of a node which isn't invariant itself.
+
+    Returns:
+        bool: True if the node is invariant, it operates on invariant fields only.
+    """
+    invariants = []
+    invariant = True
+    for field in fields:
+        value = getattr(node, field)
+        if type(value) is list:
+            for i, item in enumerate(value):
+                if hoist(item, loop, assigned, calls): invariants.append((value, i, item))
+                else: invariant = False
+        # tokens, the missing branches and clauses
+        elif hasattr(value, "kind"):
+            if hoist(value, loop, assigned, calls): invariants.append((node, field, value))
+            else: invariant = False
+    if invariant and type(node) in PURE: return True
+    for owner, key, expr in invariants:
+        kind = type(expr)
+        if kind is EXPR.Hoisted:
+            # moves to the enclosing loop
+            inner = hoisted_by[expr]
+            inner.hoisted.remove(expr)
+            if not inner.hoisted: inner.hoisted = None
+        elif kind is EXPR.Binary or kind is EXPR.Unary or kind is EXPR.Logical:
+            expr = EXPR.Hoisted(expr)
+            if type(owner) is list: owner[key] = expr
+            else: setattr(owner, key, expr)
+        # a constant or a single variable is as fast to evaluate as its hoisted value
+        else: continue
+        hoisted_by[expr] = loop
+        loop.hoisted.append(expr)
+    return False
+
+def walk(nodes: List):
+    """Iterates over the nodes and every node under them"""
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        if type(node) is list:
+            pending += node
+            continue
+        # tokens and the values of the literals
+        if not hasattr(node, "kind"): continue
+        yield node
+        pending += [getattr(node, field) for field in node.__match_args__]
+
+def optimize_branch(stmt):
+    """Optimizes the statement of a branch or a loop body, which can't be dropped"""
+    optimized = optimize(stmt)
+    # an empty block doesn't declare anything, so it can stand in for the dropped statement.
+    if optimized is None: return STMT.Block([])
+    return optimized
+
+def fold(expr):
+    """Folds the constants of an expression.
+
+    Args:
+        expr: expression node.
+
+    Returns:
+        the folded expression, a literal if it's a constant.
+    """
+    return folders[expr.kind](expr)
+
+def optimize(stmt):
+    """Optimizes a statement.
+
+    Args:
+        stmt: statement node.
+
+    Returns:
+        the optimized statement, None if the statement has no effect.
+    """
+    return optimizers[stmt.kind](stmt)
+
+def optimize_program(statements: List) -> List:
+    """Optimizes the statements of a program.
+
+    The calls of its top-level functions which only return a small expression are
+    inlined, a function declared twice isn't.
+
+    Args:
+        statements (List): resolved statements of the program.
+
+    Returns:
+        List: optimized statements.
+    """
+    declared = {}
+    for stmt in statements:
+        if type(stmt) is STMT.Var or type(stmt) is STMT.Function or type(stmt) is STMT.Class:
+            declared[stmt.name.lexeme] = declared.get(stmt.name.lexeme, 0) + 1
+    for stmt in statements:
+        if type(stmt) is not STMT.Function or declared[stmt.name.lexeme] != 1: continue
+        if len(stmt.body) != 1 or type(stmt.body[0]) is not STMT.Return or stmt.body[0].value is None: continue
+        if inlinable_expression(stmt.body[0].value, stmt): inlinable[stmt.name.lexeme] = stmt
+    try:
+        return optimize_statements(statements)
+    finally:
+        inlinable.clear()
+        hoisted_by.clear()
+
+def optimize_statements(statements: List) -> List:
+    """Optimizes a list of statements, the statements after a return are unreachable and dropped.
+
+    Args:
+        statements (List): statements to optimize.
+
+    Returns:
+        List: optimized statements.
+    """
+    optimized = []
+    for stmt in statements:
+        stmt = optimize(stmt)
+        if stmt is None: continue
+        optimized.append(stmt)
+        if type(stmt) is STMT.Return: break
+    return optimized
+
+
+# Optimizing functions indexed by the kind of the node
+folders = [None] * len(EXPR.classes)
+folders[EXPR.ASSIGN] = fold_assign_expr
+folders[EXPR.BINARY] = fold_binary_expr
+folders[EXPR.CALL] = fold_call_expr
+folders[EXPR.GET] = fold_get_expr
+folders[EXPR.GROUPING] = fold_grouping_expr
+folders[EXPR.HOISTED] = fold_leaf_expr
+folders[EXPR.LITERAL] = fold_leaf_expr
+folders[EXPR.LOGICAL] = fold_logical_expr
+folders[EXPR.SET] = fold_set_expr
+folders[EXPR.SUPER] = fold_leaf_expr
+folders[EXPR.THIS] = fold_leaf_expr
+folders[EXPR.UNARY] = fold_unary_expr
+folders[EXPR.VARIABLE] = fold_leaf_expr
+
+optimizers = [None] * len(STMT.classes)
+optimizers[STMT.BLOCK] = optimize_block_stmt
+optimizers[STMT.CLASS] = optimize_class_stmt
+optimizers[STMT.EXPRESSION] = optimize_expression_stmt
+optimizers[STMT.FUNCTION] = optimize_function_stmt
+optimizers[STMT.IF] = optimize_if_stmt
+optimizers[STMT.PRINT] = optimize_print_stmt
+optimizers[STMT.VAR] = optimize_var_stmt
+optimizers[STMT.RETURN] = optimize_return_stmt
+optimizers[STMT.WHILE] = optimize_while_stmt
+optimizers[STMT.FOR] = optimize_for_stmt
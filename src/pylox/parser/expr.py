@@ -1,123 +1,300 @@
 """Node classes(expr classes) definition"""
 """This is a generated file, from tools/generate_ast.py script"""
 
+# Depth of a variable which isn't resolved to a local, i.e. a global.
+GLOBAL = -1
+
+# Kind tags of the node classes, new classes are appended so the kinds are stable.
+ASSIGN = 0
+BINARY = 1
+CALL = 2
+GET = 3
+GROUPING = 4
+LITERAL = 5
+LOGICAL = 6
+SET = 7
+SUPER = 8
+THIS = 9
+UNARY = 10
+VARIABLE = 11
+HOISTED = 12
+
 class Assign:
+	__slots__ = ("name", "value", "depth", "index", "cell",)
+	__match_args__ = ("name", "value",)
+	kind = ASSIGN
+
 	#Constructor
 	def __init__(self, name,value):
 		self.name = name
 		self.value = value
+		self.depth = GLOBAL
+		self.index = 0
+		self.cell = False
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.name.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Binary:
+	__slots__ = ("left", "operator", "right", "operation", "proven",)
+	__match_args__ = ("left", "operator", "right",)
+	kind = BINARY
+
 	#Constructor
 	def __init__(self, left,operator,right):
 		self.left = left
 		self.operator = operator
 		self.right = right
+		self.operation = None
+		self.proven = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.operator.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Call:
+	__slots__ = ("callee", "paren", "arguments", "inlined", "target",)
+	__match_args__ = ("callee", "paren", "arguments",)
+	kind = CALL
+
 	#Constructor
 	def __init__(self, callee,paren,arguments):
 		self.callee = callee
 		self.paren = paren
 		self.arguments = arguments
+		self.inlined = None
+		self.target = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.paren.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Get:
+	__slots__ = ("object", "name", "shape", "slot", "cache",)
+	__match_args__ = ("object", "name",)
+	kind = GET
+
 	#Constructor
 	def __init__(self, object,name):
 		self.object = object
 		self.name = name
+		self.shape = None
+		self.slot = None
+		self.cache = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.name.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Grouping:
+	__slots__ = ("expression",)
+	__match_args__ = ("expression",)
+	kind = GROUPING
+
 	#Constructor
 	def __init__(self, expression):
 		self.expression = expression
 
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.expression.line
+
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Literal:
+	__slots__ = ("value",)
+	__match_args__ = ("value",)
+	kind = LITERAL
+
 	#Constructor
 	def __init__(self, value):
 		self.value = value
 
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return None
+
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Logical:
+	__slots__ = ("left", "operator", "right", "operation", "proven",)
+	__match_args__ = ("left", "operator", "right",)
+	kind = LOGICAL
+
 	#Constructor
 	def __init__(self, left,operator,right):
 		self.left = left
 		self.operator = operator
 		self.right = right
+		self.operation = None
+		self.proven = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.operator.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Set:
+	__slots__ = ("object", "name", "value", "shape", "slot", "transition", "cache",)
+	__match_args__ = ("object", "name", "value",)
+	kind = SET
+
 	#Constructor
 	def __init__(self, object,name,value):
 		self.object = object
 		self.name = name
 		self.value = value
+		self.shape = None
+		self.slot = None
+		self.transition = None
+		self.cache = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.name.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Super:
+	__slots__ = ("keyword", "method", "depth", "index", "cell", "superclass", "function", "this",)
+	__match_args__ = ("keyword", "method",)
+	kind = SUPER
+
 	#Constructor
 	def __init__(self, keyword,method):
 		self.keyword = keyword
 		self.method = method
+		self.depth = GLOBAL
+		self.index = 0
+		self.cell = False
+		self.superclass = None
+		self.function = None
+		self.this = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.keyword.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class This:
+	__slots__ = ("keyword", "depth", "index", "cell",)
+	__match_args__ = ("keyword",)
+	kind = THIS
+
 	#Constructor
 	def __init__(self, keyword):
 		self.keyword = keyword
+		self.depth = GLOBAL
+		self.index = 0
+		self.cell = False
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.keyword.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Unary:
+	__slots__ = ("operator", "right", "operation", "proven",)
+	__match_args__ = ("operator", "right",)
+	kind = UNARY
+
 	#Constructor
 	def __init__(self, operator,right):
 		self.operator = operator
 		self.right = right
+		self.operation = None
+		self.proven = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.operator.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Variable:
+	__slots__ = ("name", "depth", "index", "cell",)
+	__match_args__ = ("name",)
+	kind = VARIABLE
+
 	#Constructor
 	def __init__(self, name):
 		self.name = name
+		self.depth = GLOBAL
+		self.index = 0
+		self.cell = False
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.name.line
+
+	#Visitor Method
+	def accept(self, visitor):
+		return visitor.visit()
+
+class Hoisted:
+	__slots__ = ("expression", "value",)
+	__match_args__ = ("expression",)
+	kind = HOISTED
+
+	#Constructor
+	def __init__(self, expression):
+		self.expression = expression
+		self.value = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.expression.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
+# Node classes, indexed by their kind
+classes = (Assign, Binary, Call, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable, Hoisted,)
@@ -1,30 +1,40 @@
 """Parser class for the interpreter"""
 
-from typing import List, Optional
+from array import array
+from typing import List, Optional, Union
 from pylox.scanner.token import Token
-from pylox.scanner.token_types import TOKEN_TYPES
+from pylox.scanner.token_types import TOKEN_TYPES, token_type_codes
+from pylox.scanner.token_buffer import TokenBuffer
 import pylox.parser.expr as EXPR
 import pylox.parser.stmt as STMT
 from types import SimpleNamespace
 from pylox.exceptions.exceptions import ParseError
 
-# Token type definition
+# Token type codes, the parser checks the types of the tokens by their codes
 tkns = {}
 for k,v in dict(TOKEN_TYPES.__dict__).items():
-    tkns[k] = k
+    tkns[k] = token_type_codes[k]
 TOKEN_TYPE = SimpleNamespace(**tkns)
 
+# Codes of the tokens where synchronize() stops, they start a statement
+sync_types = {TOKEN_TYPE.CLASS, TOKEN_TYPE.FUN, TOKEN_TYPE.VAR, TOKEN_TYPE.FOR, TOKEN_TYPE.IF, TOKEN_TYPE.WHILE, TOKEN_TYPE.PRINT, TOKEN_TYPE.RETURN}
+
 
 class Parser:
     """This class parses the tokens scanned by the scanner.
     """
-    def __init__(self, tokens: List[Token]) -> None:
+    def __init__(self, tokens: Union[List[Token], TokenBuffer]) -> None:
         """Initializes the list of tokens and sets the current pointer
 
+        The types of the tokens are checked by their codes, so the tokens of a
+        packed token buffer are built only when the parser keeps them.
+
         Args:
-            tokens (List[Token]): list of tokens scanned by the scanner
+            tokens (Union[List[Token], TokenBuffer]): tokens scanned by the scanner, a list or a packed buffer.
         """
         self.tokens = tokens
+        if isinstance(tokens, TokenBuffer): self.types = tokens.types
+        else: self.types = array("B", [token_type_codes[token.type] for token in tokens])
         self.current = 0
     
     def parse(self) -> List:
@@ -90,11 +100,11 @@ class Parser:
         if self.match(TOKEN_TYPE.LEFT_BRACE): return STMT.Block(self.block())
         return self.expression_statement()
     
-    def for_statement(self) -> STMT.Block:
+    def for_statement(self) -> STMT.For:
         """Handles the For loop parsing.
 
         Returns:
-            STMT.Block: returns a block node which contains equivalent code for for loop.
+            STMT.For: returns a for loop node, its clauses are None when they are omitted.
         """
         self.consume(TOKEN_TYPE.LEFT_PAREN, "Expect '(' after 'for'.")
         initializer = None
@@ -112,14 +122,7 @@ class Parser:
         self.consume(TOKEN_TYPE.RIGHT_PAREN, "Expect ')' after for clauses.")
         
         body = self.statement()
-        if increment is not None:
-            body = STMT.Block([body, STMT.Expression(increment)])
-        
-        if condition is None: condition = EXPR.Literal(True)
-        body = STMT.While(condition, body)
-        
-        if initializer is not None: body = STMT.Block([initializer, body])
-        return body
+        return STMT.For(initializer, condition, increment, body)
     
     def while_statement(self) -> STMT.While:
         """Handles the while loop parsing.
@@ -408,12 +411,11 @@ class Parser:
             bool: returns true if the type matched.
         """
         if self.isAtEnd(): return False
-        return self.peek().type == type
+        return self.types[self.current] == type
     
-    def advance(self):
+    def advance(self) -> None:
         """Advances the token from the tokens list"""
         if not self.isAtEnd(): self.current +=1
-        return self.previous()
     
     def isAtEnd(self) -> bool:
         """Checks it the parser has reached the end of tokens.
@@ -421,7 +423,7 @@ class Parser:
         Returns:
             bool: returs True if it reaches end, else False.
         """
-        return self.peek().type == "EOF"
+        return self.types[self.current] == TOKEN_TYPE.EOF
     
     def peek(self) -> Token:
         """Peeks the list and returns the current token.
@@ -443,8 +445,8 @@ class Parser:
         """Syncs the tokens untils a certain node is parsed"""
         self.advance()
         while not self.isAtEnd():
-            if (self.previous().type == TOKEN_TYPE.SEMICOLON): return
-            if self.peek().type in ["CLASS", "FUN", "VAR", "FOR", "IF", "WHILE", "PRINT", "RETURN"]: return
+            if (self.types[self.current -1] == TOKEN_TYPE.SEMICOLON): return
+            if self.types[self.current] in sync_types: return
             self.advance()
 
     def consume(self, type: TOKEN_TYPE, message: str):
@@ -457,7 +459,9 @@ class Parser:
         Raises:
             self.error: if the check is not passed it raises Parse error exception.
         """
-        if self.check(type): return self.advance()
+        if self.check(type):
+            self.advance()
+            return self.previous()
         self.error(self.peek(), message)
     
     def error(self, token: TOKEN_TYPE, message: str):
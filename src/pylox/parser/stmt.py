@@ -1,93 +1,223 @@
 """Node classes(stmt classes) definition"""
 """This is a generated file, from tools/generate_ast.py script"""
 
+# Kind tags of the node classes, new classes are appended so the kinds are stable.
+BLOCK = 0
+CLASS = 1
+EXPRESSION = 2
+FUNCTION = 3
+IF = 4
+PRINT = 5
+VAR = 6
+RETURN = 7
+WHILE = 8
+FOR = 9
+
 class Block:
+	__slots__ = ("statements", "scoped", "merged",)
+	__match_args__ = ("statements",)
+	kind = BLOCK
+
 	#Constructor
 	def __init__(self, statements):
 		self.statements = statements
+		self.scoped = None
+		self.merged = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return None
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Class:
+	__slots__ = ("name", "superclass", "methods", "captured",)
+	__match_args__ = ("name", "superclass", "methods",)
+	kind = CLASS
+
 	#Constructor
 	def __init__(self, name,superclass,methods):
 		self.name = name
 		self.superclass = superclass
 		self.methods = methods
+		self.captured = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.name.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Expression:
+	__slots__ = ("expression",)
+	__match_args__ = ("expression",)
+	kind = EXPRESSION
+
 	#Constructor
 	def __init__(self, expression):
 		self.expression = expression
 
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.expression.line
+
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Function:
+	__slots__ = ("name", "params", "body", "scoped", "upvalues", "cells", "captured", "getter", "pure",)
+	__match_args__ = ("name", "params", "body",)
+	kind = FUNCTION
+
 	#Constructor
 	def __init__(self, name,params,body):
 		self.name = name
 		self.params = params
 		self.body = body
+		self.scoped = None
+		self.upvalues = None
+		self.cells = None
+		self.captured = None
+		self.getter = None
+		self.pure = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.name.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class If:
+	__slots__ = ("condition", "thenBranch", "elseBranch",)
+	__match_args__ = ("condition", "thenBranch", "elseBranch",)
+	kind = IF
+
 	#Constructor
 	def __init__(self, condition,thenBranch,elseBranch):
 		self.condition = condition
 		self.thenBranch = thenBranch
 		self.elseBranch = elseBranch
 
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.condition.line
+
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Print:
+	__slots__ = ("expression",)
+	__match_args__ = ("expression",)
+	kind = PRINT
+
 	#Constructor
 	def __init__(self, expression):
 		self.expression = expression
 
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.expression.line
+
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Var:
+	__slots__ = ("name", "initializer", "captured",)
+	__match_args__ = ("name", "initializer",)
+	kind = VAR
+
 	#Constructor
 	def __init__(self, name,initializer):
 		self.name = name
 		self.initializer = initializer
+		self.captured = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.name.line
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class Return:
+	__slots__ = ("keyword", "value",)
+	__match_args__ = ("keyword", "value",)
+	kind = RETURN
+
 	#Constructor
 	def __init__(self, keyword,value):
 		self.keyword = keyword
 		self.value = value
 
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.keyword.line
+
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
 class While:
+	__slots__ = ("condition", "body", "hoisted",)
+	__match_args__ = ("condition", "body",)
+	kind = WHILE
+
 	#Constructor
 	def __init__(self, condition,body):
 		self.condition = condition
 		self.body = body
+		self.hoisted = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return self.condition.line
+
+	#Visitor Method
+	def accept(self, visitor):
+		return visitor.visit()
+
+class For:
+	__slots__ = ("initializer", "condition", "increment", "body", "scoped", "merged", "hoisted",)
+	__match_args__ = ("initializer", "condition", "increment", "body",)
+	kind = FOR
+
+	#Constructor
+	def __init__(self, initializer,condition,increment,body):
+		self.initializer = initializer
+		self.condition = condition
+		self.increment = increment
+		self.body = body
+		self.scoped = None
+		self.merged = None
+		self.hoisted = None
+
+	#Line of the node, None if it has no token
+	@property
+	def line(self):
+		return None
 
 	#Visitor Method
 	def accept(self, visitor):
 		return visitor.visit()
 
+# Node classes, indexed by their kind
+classes = (Block, Class, Expression, Function, If, Print, Var, Return, While, For,)
@@ -0,0 +1,77 @@
+"""Purity analysis of the resolved statements, which finds the functions whose calls can be memoized.
+
+It runs on a whole program (a script), after the resolver and the optimizer. A
+top-level function is pure if it's declared once and never assigned, and its
+body only reads and assigns its params and locals and calls pure functions: it
+doesn't print, assign or read globals, declare functions or classes, or access
+properties. Two calls of a pure function with the same arguments return the same
+value, so the engines can keep its results by the arguments (--memoize). The
+functions start pure, a function which calls an impure one isn't pure either,
+until none of them changes.
+"""
+
+from typing import List
+import pylox.parser.expr as EXPR
+import pylox.parser.stmt as STMT
+
+# Nodes which a pure function doesn't run
+IMPURE = (EXPR.Get, EXPR.Set, EXPR.This, EXPR.Super, STMT.Print, STMT.Function, STMT.Class)
+
+
+def analyze_purity(statements: List) -> None:
+    """Finds the pure top-level functions of a whole program, and sets their "pure" slot.
+
+    Args:
+        statements (List): resolved statements of the program.
+    """
+    declared = {}
+    for stmt in statements:
+        if type(stmt) is STMT.Var or type(stmt) is STMT.Function or type(stmt) is STMT.Class:
+            declared[stmt.name.lexeme] = declared.get(stmt.name.lexeme, 0) + 1
+    assigned = {node.name.lexeme for node in walk(statements) if type(node) is EXPR.Assign and node.depth == EXPR.GLOBAL}
+    functions = {}
+    for stmt in statements:
+        if type(stmt) is not STMT.Function: continue
+        stmt.pure = False
+        if declared[stmt.name.lexeme] == 1 and stmt.name.lexeme not in assigned: functions[stmt.name.lexeme] = stmt
+    pure = set(functions)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not is_pure(functions[name], pure):
+                pure.discard(name)
+                changed = True
+    for name in pure: functions[name].pure = True
+
+def is_pure(function: STMT.Function, pure: set) -> bool:
+    """Checks if the body of a function only runs pure nodes, and calls the functions of the pure set"""
+    for node in walk(function.body, skip_callees=True):
+        kind = type(node)
+        if kind is EXPR.Variable or kind is EXPR.Assign:
+            if node.depth == EXPR.GLOBAL: return False
+        elif kind is EXPR.Call:
+            callee = node.callee
+            if type(callee) is not EXPR.Variable or callee.depth != EXPR.GLOBAL or callee.name.lexeme not in pure: return False
+        elif kind in IMPURE: return False
+    return True
+
+def walk(nodes: List, skip_callees: bool = False):
+    """Iterates over the nodes and every node under them.
+
+    Args:
+        nodes (List): nodes to iterate over.
+        skip_callees (bool, optional): if the callee of a call is left out, the
+            call itself checks it. Defaults to False.
+    """
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        if type(node) is list:
+            pending += node
+            continue
+        # tokens and the values of the literals
+        if not hasattr(node, "kind"): continue
+        yield node
+        if skip_callees and type(node) is EXPR.Call: pending += node.arguments
+        else: pending += [getattr(node, field) for field in node.__match_args__]
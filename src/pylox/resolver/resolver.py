@@ -2,9 +2,9 @@
 
 from enum import Enum
 from pylox.exceptions.exceptions import RuntimeError
+from pylox.environment.environment import global_slot
 import pylox.parser.expr as EXPR
 import pylox.parser.stmt as STMT
-from pylox.interpreter.interpreter import resolve as interpreter_resolve
 from pylox.scanner.token import Token
 
 
@@ -24,16 +24,40 @@ class CLASS_TYPE(Enum):
 # State
 current_class = CLASS_TYPE.NONE
 current_function = FUNCTION_TYPES.NONE
+# every scope maps the name of a local to [slot index, defined, captured, declaration, references]:
+# if a closure captures it, its declaration node and the nodes of its function which refer to it
 scopes = []
+# index of the scope whose environment holds the locals of each scope, a merged
+# scope appends its locals to the environment of an enclosing scope
+owners = []
+# number of slots of the environment of each owning scope, a merged scope keeps
+# the number of slots of its owner when it began, they are restored at its end
+sizes = []
+# index of the first scope of the current function, the scopes below it belong
+# to the enclosing functions
+function_scope = 0
+# the function of each closure scope, None for the other scopes. The closure scope of
+# a function holds the variables it captures, they are the cells of its closure
+closures = []
 
 
 def visit_block_stmt(stmt: STMT.Block) -> None:
     """Resolves a block of statements.
 
+    A block which declares nothing has no scope, it runs in the enclosing
+    environment. The locals of a block which creates no closures are merged
+    into the environment of the enclosing scope.
+
     Args:
         stmt (STMT.Block): statement block node.
     """
-    begin_scope()
+    if not declares(stmt.statements):
+        stmt.scoped = stmt.merged = False
+        resolve(stmt.statements)
+        return None
+    stmt.merged = can_merge(stmt.statements)
+    stmt.scoped = not stmt.merged
+    begin_scope(stmt.merged)
     resolve(stmt.statements)
     end_scope()
     return None
@@ -48,7 +72,7 @@ def visit_class_stmt(stmt: STMT.Class) -> None:
     enclosing_class = current_class
     current_class = CLASS_TYPE.CLASS
     
-    declare(stmt.name)
+    declare(stmt.name, stmt)
     define(stmt.name)
     
     # superclass analysis
@@ -58,17 +82,13 @@ def visit_class_stmt(stmt: STMT.Class) -> None:
         resolve(stmt.superclass)
     if stmt.superclass:
         begin_scope()
-        scopes[-1].update({"super": True})
-    
-    begin_scope()
-    scopes[-1].update({"this": True})
+        add_slot("super")
     
     # methods analysis
     for method in stmt.methods:
         declaration = FUNCTION_TYPES.METHOD
         if method.name.lexeme == "init": declaration = FUNCTION_TYPES.INITIALIZER
         resolve_function(method, declaration)
-    end_scope()
     
     if stmt.superclass: end_scope()
     current_class = enclosing_class
@@ -94,6 +114,9 @@ def visit_super_expr(expr: EXPR.Super) -> None:
     if current_class is CLASS_TYPE.NONE: raise RuntimeError(expr.keyword, "Can't use 'super' outside of a class")
     elif current_class is not CLASS_TYPE.SUBCLASS: raise RuntimeError(expr.keyword, "Can't use 'super' in a class with no superclass.")
     resolveLocal(expr, expr.keyword)
+    # the method is bound to this, which is resolved on its own
+    expr.this = EXPR.This(Token("THIS", "this", None, expr.keyword.line))
+    resolveLocal(expr.this, expr.this.keyword)
     return None
 
 def visit_expression_stmt(stmt: STMT.Expression) -> None:
@@ -111,7 +134,7 @@ def visit_var_stmt(stmt: STMT.Var) -> None:
     Args:
         stmt (STMT.Var): variable statement node.
     """
-    declare(stmt.name)
+    declare(stmt.name, stmt)
     if stmt.initializer != None:
         resolve(stmt.initializer)
     define(stmt.name)
@@ -123,7 +146,7 @@ def visit_variable_expr(expr: EXPR.Variable) -> None:
     Args:
         expr (EXPR.Variable): variable expression node.
     """
-    if len(scopes) != 0 and scopes[-1].get(expr.name.lexeme) == False:
+    if len(scopes) != 0 and expr.name.lexeme in scopes[-1] and not scopes[-1][expr.name.lexeme][1]:
        raise RuntimeError(expr.name, "Can't read local variable in its own initializer.")
    
     resolveLocal(expr, expr.name)
@@ -145,7 +168,7 @@ def visit_function_stmt(stmt: STMT.Function) -> None:
     Args:
         stmt (STMT.Function): function statement node.
     """
-    declare(stmt.name)
+    declare(stmt.name, stmt)
     define(stmt.name)
     
     resolve_function(stmt, FUNCTION_TYPES.FUNCTION)
@@ -195,6 +218,25 @@ def visit_while_stmt(stmt: STMT.While) -> None:
     resolve(stmt.body)
     return None
 
+def visit_for_stmt(stmt: STMT.For) -> None:
+    """Resolves for loop statement, the variable declared by the initializer is in a scope of the loop.
+
+    Args:
+        stmt (STMT.For): for statement node.
+    """
+    if type(stmt.initializer) is STMT.Var:
+        stmt.merged = can_merge([stmt.body])
+        stmt.scoped = not stmt.merged
+        begin_scope(stmt.merged)
+    else:
+        stmt.scoped = stmt.merged = False
+    if stmt.initializer is not None: resolve(stmt.initializer)
+    if stmt.condition is not None: resolve(stmt.condition)
+    if stmt.increment is not None: resolve(stmt.increment)
+    resolve(stmt.body)
+    if stmt.scoped or stmt.merged: end_scope()
+    return None
+
 def visit_binary_expr(expr: EXPR.Binary) -> None:
     """Resolves binary expression.
 
@@ -301,6 +343,7 @@ def resolve(handler) -> None:
         STMT.Block.visit = visit_block_stmt
         STMT.If.visit = visit_if_stmt
         STMT.While.visit = visit_while_stmt
+        STMT.For.visit = visit_for_stmt
         for stmt in handler:
             resolve(stmt)
     else:
@@ -314,39 +357,125 @@ def resolve_function(function: STMT.Function, type: FUNCTION_TYPES) -> None:
         function (STMT.Function): function node.
         type (FUNCTION_TYPES): type of the function.
     """
-    global current_function
+    global current_function, function_scope
     enclosing_function = current_function
+    enclosing_scope = function_scope
     current_function = type
     
-    begin_scope()
+    # the variables of the enclosing functions are captured in the closure scope as they're referred
+    function.upvalues = []
+    begin_scope(closure=function)
+    function_scope = len(scopes)
+    
+    # a function without params and locals runs in its closure, it has no frame
+    is_method = type is FUNCTION_TYPES.METHOD or type is FUNCTION_TYPES.INITIALIZER
+    function.scoped = is_method or len(function.params) > 0 or declares(function.body)
+    if function.scoped: begin_scope()
+    # this takes the first slot of a method's frame, before the params
+    if is_method: add_slot("this")
     # params
     for param in function.params:
         declare(param)
         define(param)
     resolve(function.body)
+    if function.scoped:
+        frame = end_scope()
+        # this and the params have no declaration, the captured ones are moved into cells by the call
+        function.cells = [entry[0] for entry in frame.values() if entry[2] and entry[3] is None]
     end_scope()
     
     current_function = enclosing_function
+    function_scope = enclosing_scope
+
+def declares(statements) -> bool:
+    """Checks if the statements declare a local of their scope"""
+    for stmt in statements:
+        if type(stmt) is STMT.Var or type(stmt) is STMT.Function or type(stmt) is STMT.Class: return True
+    return False
+
+def can_merge(statements) -> bool:
+    """Checks if the locals of a new scope of the statements can be merged into the enclosing scope.
+
+    The enclosing scope has to be a local scope of the same function, and the
+    statements can't create a closure, which would keep the merged locals alive.
+    """
+    return len(scopes) > function_scope and not any(creates_closures(stmt) for stmt in statements)
 
-def begin_scope() -> None:
-    """Begins a scope"""
+def creates_closures(stmt) -> bool:
+    """Checks if a statement declares a function or a class, which captures its environment"""
+    if type(stmt) is STMT.Function or type(stmt) is STMT.Class: return True
+    if type(stmt) is STMT.Block: return any(creates_closures(s) for s in stmt.statements)
+    if type(stmt) is STMT.If:
+        return creates_closures(stmt.thenBranch) or (stmt.elseBranch is not None and creates_closures(stmt.elseBranch))
+    if type(stmt) is STMT.While or type(stmt) is STMT.For: return creates_closures(stmt.body)
+    return False
+
+def begin_scope(merged: bool = False, closure: STMT.Function = None) -> None:
+    """Begins a scope.
+
+    Args:
+        merged (bool, optional): if the locals of the scope are appended to the environment of the enclosing scope. Defaults to False.
+        closure (STMT.Function, optional): the function of a closure scope. Defaults to None.
+    """
+    if merged:
+        owner = owners[-1]
+        owners.append(owner)
+        sizes.append(sizes[owner])
+    else:
+        owners.append(len(scopes))
+        sizes.append(0)
+    closures.append(closure)
     scopes.append({})
     
-def end_scope() -> None:
-    """Ends a scope"""
-    scopes.pop()
+def end_scope() -> dict:
+    """Ends a scope, the slots of a merged scope are released in the environment of its owner.
+
+    The declarations of the captured locals and the nodes referring to them are
+    marked, the locals are stored in cells.
+
+    Returns:
+        dict: the locals of the scope.
+    """
+    scope = len(scopes) - 1
+    owner = owners.pop()
+    size = sizes.pop()
+    if owner != scope: sizes[owner] = size
+    closures.pop()
+    locals = scopes.pop()
+    for slot, defined, captured, declaration, references in locals.values():
+        if not captured: continue
+        if declaration is not None: declaration.captured = True
+        for expr in references: expr.cell = True
+    return locals
+
+def next_slot() -> int:
+    """Returns the next slot of the environment holding the locals of the current scope"""
+    owner = owners[-1]
+    slot = sizes[owner]
+    sizes[owner] += 1
+    return slot
+
+def add_slot(name: str) -> None:
+    """Adds a defined local to the next slot of the scope.
 
-def declare(name: Token) -> None:
-    """Declares an identifier in the scope.
+    Args:
+        name (str): name of the local.
+    """
+    scopes[-1].update({name: [next_slot(), True, False, None, []]})
+
+def declare(name: Token, declaration = None) -> None:
+    """Declares an identifier in the scope, assigning it the next slot. A global takes its slot of the global table.
 
     Args:
         name (Token): token of the identifier.
+        declaration (optional): the Var, Function or Class node declaring it, None for a param. Defaults to None.
     """
     if len(scopes) == 0:
+        global_slot(name.lexeme)
         return None
     if name.lexeme in scopes[-1]:
         raise RuntimeError(name, "Already a variable with this name exists in the scope.")
-    scopes[-1].update({name.lexeme: False})
+    scopes[-1].update({name.lexeme: [next_slot(), False, False, declaration, []]})
 
 def define(name: Token) -> None:
     """Defines an identifier in the scope.
@@ -356,19 +485,59 @@ def define(name: Token) -> None:
     """
     if len(scopes) == 0:
         return None
-    scopes[-1].update({name.lexeme: True})
+    scopes[-1][name.lexeme][1] = True
 
 def resolveLocal(expr: EXPR, name: Token) -> None:
-    """Resolves local identifiers to the interpreter state.
+    """Resolves local identifiers, storing their depth and slot index on the node.
+    Unresolved identifiers keep the EXPR.GLOBAL depth, their index is their slot of the global table.
 
     Args:
         expr (EXPR): expression to be resolved.
         name (Token): token of the identifier.
     """
-    i = len(scopes) - 1
+    found = find(name.lexeme, len(scopes) - 1)
+    if found is None:
+        expr.index = global_slot(name.lexeme)
+        return
+    scope, depth = found
+    entry = scopes[scope][name.lexeme]
+    expr.depth = depth
+    expr.index = entry[0]
+    # a variable captured from an enclosing function is a cell of the closure, a local of
+    # the function is in a cell if a closure captures it, which is known at the end of its scope
+    if closures[scope] is not None: expr.cell = True
+    else: entry[4].append(expr)
+
+def find(name: str, top: int):
+    """Finds the scope of a local, from scopes[top] down.
+
+    A local of an enclosing function is captured by the functions in between,
+    it's added to their closure scopes.
+
+    Args:
+        name (str): name of the local.
+        top (int): index of the scope to start from.
+
+    Returns:
+        the (scope index, depth) of the local, None if it's a global.
+    """
+    depth = 0
+    i = top
     while i >= 0:
-        if name.lexeme in scopes[i]:
-            interpreter_resolve(expr, len(scopes) - 1 - i)
-            return
+        if name in scopes[i]: return i, depth
+        function = closures[i]
+        if function is not None:
+            found = find(name, i - 1)
+            if found is None: return None
+            scope, distance = found
+            entry = scopes[scope][name]
+            if closures[scope] is None: entry[2] = True
+            # the closure is created in the scope below the closure scope, the cell is looked up from there
+            function.upvalues.append((distance, entry[0]))
+            scopes[i][name] = [sizes[i], True, False, None, []]
+            sizes[i] += 1
+            return i, depth
+        # the enclosing scopes are in the enclosing environment, unless this scope is merged into it
+        if owners[i] == i: depth += 1
         i -= 1
-        
\ No newline at end of file
+    return None
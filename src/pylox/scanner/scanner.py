@@ -1,24 +1,52 @@
 """This is scanner, which scans the source and segegrates into tokens"""
 
-from typing import List, Type
-from pylox.scanner.token_types import TOKEN_TYPES, single_char_token, multi_char_token, keywords
+import re
+from typing import Callable, List, Type
+from pylox.scanner.token_types import single_char_token, multi_char_token, keywords, token_type_codes
 from pylox.scanner.token import Token
+from pylox.scanner.token_buffer import TokenBuffer
 from pylox.exceptions.exceptions import SyntaxError
-from decimal import Decimal
+
+# Kinds of the chars, a char's kind selects the rule which scans the token starting with it
+UNEXPECTED, WHITESPACE, NEWLINE, SINGLE, OPERATOR, SLASH, STRING, DIGIT, ALPHA = range(9)
+
+# Type codes of the tokens which aren't looked up by their char
+IDENTIFIER, NUMBER, STRING_CODE, SLASH_CODE, EOF = (token_type_codes[type] for type in ("IDENTIFIER", "NUMBER", "STRING", "SLASH", "EOF"))
+# Type code of the single char tokens by their char, "/" is excluded as it may start a comment
+single_chars = {char: token_type_codes[type] for type, char in single_char_token.items() if char != "/"}
+# Type codes of (operator, operator followed by "=") by their char
+equal_chars = {char: (token_type_codes[type], token_type_codes[type + "_EQUAL"]) for type, char in multi_char_token.items() if len(char) == 1}
+# Type code of the keywords by their lexeme
+keyword_types = {lexeme: token_type_codes[type] for type, lexeme in keywords.items()}
+
+# Kind of every ascii char, the other chars are classified by classify()
+char_kinds = {chr(i): UNEXPECTED for i in range(128)}
+char_kinds.update({char: SINGLE for char in single_chars})
+char_kinds.update({char: OPERATOR for char in equal_chars})
+char_kinds.update({" ": WHITESPACE, "\r": WHITESPACE, "\t": WHITESPACE, "\n": NEWLINE, "/": SLASH, '"': STRING, "_": ALPHA})
+char_kinds.update({char: DIGIT for char in "0123456789"})
+char_kinds.update({char: ALPHA for char in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"})
+
+whitespace = re.compile(r"[ \r\t]*")
+# [^\W_] is a char which isalnum()
+identifier_tail = re.compile(r"[^\W_]*")
+number_tail = re.compile(r"\d*(?:\.\d+)?")
 
 class Scanner:
     """Scanner class"""
-    def __init__(self, source) -> None:
+    def __init__(self, source, number_type: Callable = float) -> None:
         """Initializing the scanner with source.
 
         Args:
             source (string): source code input.
+            number_type (Callable, optional): type of the number literals, float or Decimal. Defaults to float.
         """
         self.tokens = []
         self.start = 0
         self.current = 0
         self.line = 1
         self.source = source
+        self.number_type = number_type
     
     def __repr__(self) -> str:
         """To represent a class object.
@@ -34,137 +62,97 @@ class Scanner:
         Returns:
             List: tokens list.
         """
-        while(not self.is_at_end()):
-            self.start = self.current
-            self.scan_token()
-        self.tokens.append(Token("EOF", "", None, self.line))
+        self.tokens.extend(self.scan_buffer().tokens())
         return self.tokens
 
-    def is_at_end(self) -> bool:
-        """Checks if the scanner has reached the end of the source.
+    def scan_buffer(self) -> TokenBuffer:
+        """Scans all the tokens from the source in a single pass into a packed token buffer.
 
-        Returns:
-            bool: returns True if the scanner reached the end.
-        """
-        return self.current >= len(self.source)
-    
-    def scan_token(self) -> None:
-        """scans a single char from the source and identifies token,
-            Also reports error if any unexpected char is found.
-        """
-        c = self.advance()
-        if c in list(single_char_token.values()) and c != "/":
-            type = list(single_char_token.keys())[list(single_char_token.values()).index(c)]
-            self.add_token(type, None)
-        elif c in list(multi_char_token.values()):
-            type = list(multi_char_token.keys())[list(multi_char_token.values()).index(c)]
-            if self.match("="):
-                type += "_EQUAL"
-            self.add_token(type, None)
-        elif c == "/":
-            if self.match("/"):
-                while (self.peek() != "\n" and not self.is_at_end()):   self.advance()
-            else:
-                self.add_token("SLASH", None)
-        elif c in [" ", "\r", "\t"]:
-            pass
-        elif c == "\n":
-            self.line += 1
-        elif c == '"':
-            self.string()
-        elif c.isdigit():
-            self.number()
-        elif c.isalpha() or c == "_":
-            self.identifier()
-        else:
-            raise SyntaxError(self.line, c, "Unexpected character")
-    
-    def identifier(self) -> None:
-        """Identifies identifiers from the source and adds to tokens.
-        """
-        while (self.peek().isalnum()): self.advance()
-        lexeme = self.source[self.start: self.current]
-        type = TOKEN_TYPES.IDENTIFIER
-        if lexeme in list(keywords.values()):
-            type = list(keywords.keys())[list(keywords.values()).index(lexeme)]
-        self.add_token(type, None)
-    
-    def number(self) -> None:
-        """Identifies number from the source and adds to tokens.
-        """
-        while (self.peek().isdigit()): self.advance()
-        if (self.peek() == "." and self.peek_next().isdigit()):
-            self.advance()
-            while self.peek().isdigit(): self.advance()
-        self.add_token(TOKEN_TYPES.NUMBER, Decimal(self.source[self.start: self.current]))
-    
-    def string(self) -> None:
-        """Identifies string from the source (double quoted) and adds to tokens.
-        """
-        while(self.peek() != '"' and not self.is_at_end()):
-            if (self.peek() == "\n"): self.line += 1
-            self.advance()
-        if (self.is_at_end()):
-            raise SyntaxError(self.line, None, "Undeterminated string")
-        self.advance()
-        lexeme = self.source[self.start +1 : self.current -1]
-        self.add_token(TOKEN_TYPES.STRING, lexeme)
-    
-    def peek(self) -> str:
-        """looks the current position of the scanner. 
+        Every char is classified with a table lookup, runs of whitespace, identifiers
+        and numbers are consumed with a single regex match.
 
-        Returns:
-            str: returns null byte when the scanner reaches the end of source,
-                else it will return the pointing element from the source.
-        """
-        if (self.is_at_end()): return "\0"
-        return self.source[self.current]
-    
-    def peek_next(self) -> str:
-        """one look ahead of the scanner
+        Raises:
+            SyntaxError: on an unexpected character or an undeterminated string.
 
         Returns:
-            str: returns null byte if it reachs the before last one in the source,
-                else it will return one look ahead of the scanner pointer.
-        """
-        if (self.current + 1 >= len(self.source)): return "\0"
-        return self.source[self.current +1]
-    
-    def match(self, expected: Token) -> bool:
-        """To match the current token with the expected.
-
-        Args:
-            expected (token): token to be matched.
-
-        Returns:
-            bool: returns True if the current token matched, else False
-        """
-        if(self.is_at_end()):
-            return False
-            
-        if (self.source[self.current] != expected):
-            return False
-
-        self.current += 1
-        return True
-
-
-    def advance(self) -> str:
-        """Advances the scanner pointer
-
-        Returns:
-            str: the next char from the source
-        """
-        c = self.source[self.current]
-        self.current += 1
-        return c
-    
-    def add_token(self, type: TOKEN_TYPES, literal: str) -> None:
-        """Adds the recognized tokens to the tokens list.
-
-        Args:
-            type (TOKEN_TYPES): Identified type
-            literal (str): string literal of the token (source)
+            TokenBuffer: the scanned tokens.
         """
-        lexeme = self.source[self.start: self.current]
-        self.tokens.append(Token(type, lexeme, literal, self.line))
+        source = self.source
+        length = len(source)
+        buffer = TokenBuffer(source, self.number_type)
+        add_type, add_start, add_end, add_line = buffer.types.append, buffer.starts.append, buffer.ends.append, buffer.lines.append
+        current = self.current
+        line = self.line
+        try:
+            while current < length:
+                start = current
+                c = source[current]
+                current += 1
+                kind = char_kinds.get(c)
+                if kind is None: kind = classify(c)
+
+                if kind == WHITESPACE:
+                    current = whitespace.match(source, current).end()
+                    continue
+                elif kind == ALPHA:
+                    current = identifier_tail.match(source, current).end()
+                    code = keyword_types.get(source[start: current], IDENTIFIER)
+                elif kind == SINGLE:
+                    code = single_chars[c]
+                elif kind == NEWLINE:
+                    line += 1
+                    # skips the indentation of the next line too
+                    current = whitespace.match(source, current).end()
+                    continue
+                elif kind == DIGIT:
+                    current = number_tail.match(source, current).end()
+                    code = NUMBER
+                elif kind == OPERATOR:
+                    code, equal_code = equal_chars[c]
+                    if current < length and source[current] == "=":
+                        current += 1
+                        code = equal_code
+                elif kind == STRING:
+                    end = source.find('"', current)
+                    if end == -1:
+                        line += source.count("\n", current)
+                        current = length
+                        raise SyntaxError(line, None, "Undeterminated string")
+                    line += source.count("\n", current, end)
+                    current = end + 1
+                    code = STRING_CODE
+                elif kind == SLASH:
+                    if current < length and source[current] == "/":
+                        end = source.find("\n", current)
+                        current = length if end == -1 else end
+                        continue
+                    code = SLASH_CODE
+                else:
+                    raise SyntaxError(line, c, "Unexpected character")
+
+                add_type(code)
+                add_start(start)
+                add_end(current)
+                add_line(line)
+        finally:
+            self.current = current
+            self.line = line
+        add_type(EOF)
+        add_start(length)
+        add_end(length)
+        add_line(line)
+        return buffer
+
+
+def classify(c: str) -> int:
+    """Classifies a char which isn't in the char table (non ascii).
+
+    Args:
+        c (str): char to classify.
+
+    Returns:
+        int: kind of the char.
+    """
+    if c.isdigit(): return DIGIT
+    if c.isalpha(): return ALPHA
+    return UNEXPECTED
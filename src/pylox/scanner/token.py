@@ -1,9 +1,11 @@
 # Token class defination
 class Token:
+    __slots__ = ("type", "lexeme", "literal", "line")
+
     def __init__(self, type, lexeme, literal, line) -> None:
         self.type = type
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
     def __repr__(self) -> str:
-        return "<TYPE:({}) LEXEME:({}) LITERAL:({})>".format(self.type, self.lexeme, self.literal)
\ No newline at end of file
+        return "<TYPE:({}) LEXEME:({}) LITERAL:({})>".format(self.type, self.lexeme, self.literal)
@@ -0,0 +1,89 @@
+"""Packed token stream, which stores the scanned tokens as parallel arrays instead of Token objects"""
+
+from array import array
+from sys import intern
+from typing import Callable, List
+from pylox.scanner.token import Token
+from pylox.scanner.token_types import token_type_names, token_type_codes
+
+NUMBER, STRING = token_type_codes["NUMBER"], token_type_codes["STRING"]
+
+
+class TokenBuffer:
+    """Struct of arrays of the tokens: type codes, lexeme offsets in the source and lines.
+
+    A Token is built only when it's indexed, its lexeme is sliced from the source
+    and its literal is computed from the lexeme.
+    """
+    __slots__ = ("source", "number_type", "types", "starts", "ends", "lines")
+
+    def __init__(self, source: str, number_type: Callable = float) -> None:
+        """Initializing an empty buffer.
+
+        Args:
+            source (str): source code the offsets refer to.
+            number_type (Callable, optional): type of the number literals. Defaults to float.
+        """
+        self.source = source
+        self.number_type = number_type
+        self.types = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+
+    def __repr__(self) -> str:
+        return "<TokenBuffer tokens: {}>".format(len(self.types))
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        """Builds the token at the index.
+
+        Args:
+            index (int): index of the token.
+
+        Returns:
+            Token: the token.
+        """
+        code = self.types[index]
+        lexeme = self.source[self.starts[index]: self.ends[index]]
+        return build_token(code, lexeme, self.lines[index], self.number_type)
+
+    def type(self, index: int) -> str:
+        """Type of the token at the index, without building the token"""
+        return token_type_names[self.types[index]]
+
+    def tokens(self) -> List[Token]:
+        """Builds all the tokens of the buffer, same as indexing every token"""
+        source = self.source
+        number_type = self.number_type
+        tokens = []
+        append = tokens.append
+        # build_token() inlined, it's called for every token
+        for code, start, end, line in zip(self.types, self.starts, self.ends, self.lines):
+            lexeme = source[start: end]
+            if code == STRING: append(Token("STRING", lexeme, lexeme[1:-1], line))
+            elif code == NUMBER: append(Token("NUMBER", intern(lexeme), number_type(lexeme), line))
+            else: append(Token(token_type_names[code], intern(lexeme), None, line))
+        return tokens
+
+
+def build_token(code: int, lexeme: str, line: int, number_type: Callable) -> Token:
+    """Builds a token from its packed fields.
+
+    The lexemes, except of the strings, are interned. So every occurrence of a
+    name, keyword or operator shares a single string.
+
+    Args:
+        code (int): type code of the token.
+        lexeme (str): lexeme of the token.
+        line (int): line of the token.
+        number_type (Callable): type of the number literals.
+
+    Returns:
+        Token: the token.
+    """
+    if code == STRING: return Token("STRING", lexeme, lexeme[1:-1], line)
+    if code == NUMBER: return Token("NUMBER", intern(lexeme), number_type(lexeme), line)
+    return Token(token_type_names[code], intern(lexeme), None, line)
@@ -54,4 +54,8 @@ keywords = {
     "WHILE" : "while"
 }
 
-TOKEN_TYPES = SimpleNamespace(**single_char_token, **multi_char_token, **literals, **keywords, EOF="")
\ No newline at end of file
+TOKEN_TYPES = SimpleNamespace(**single_char_token, **multi_char_token, **literals, **keywords, EOF="")
+
+# Type codes of the token types, a code is the index of the type in token_type_names
+token_type_names = [*single_char_token, *multi_char_token, *literals, *keywords, "EOF"]
+token_type_codes = {type: code for code, type in enumerate(token_type_names)}
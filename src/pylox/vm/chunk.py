@@ -0,0 +1,72 @@
+"""Chunk holds the compiled bytecode of a function"""
+
+from pylox.vm.opcodes import opcodes
+
+
+class Chunk:
+    """A sequence of instructions along with its constant pool"""
+    def __init__(self) -> None:
+        """Initializes an empty chunk.
+
+        code: opcodes and their operands.
+        constants: constant pool of the chunk.
+        tokens: source token of every code entry, used for error reporting.
+        """
+        self.code = []
+        self.constants = []
+        self.tokens = []
+        self.constant_index = {}
+
+    def write(self, byte: int, token=None) -> None:
+        """Appends an opcode or an operand to the chunk.
+
+        Args:
+            byte (int): opcode or operand.
+            token (Token, optional): token reported if the instruction fails. Defaults to None.
+        """
+        self.code.append(byte)
+        self.tokens.append(token)
+
+    def add_constant(self, value) -> int:
+        """Adds a value to the constant pool, reusing the slot of an equal constant.
+
+        Args:
+            value: constant value.
+
+        Returns:
+            int: index of the constant in the pool.
+        """
+        # keyed by type as well, since 1 == True == Decimal(1) in python.
+        # floats are keyed by their repr, since 0.0 == -0.0.
+        if type(value) is str: key = (str, value)
+        elif type(value) is float: key = (float, repr(value))
+        else: key = None
+        if key is not None and key in self.constant_index:
+            return self.constant_index[key]
+        self.constants.append(value)
+        if key is not None: self.constant_index[key] = len(self.constants) - 1
+        return len(self.constants) - 1
+
+    def disassemble(self, name: str) -> str:
+        """Dumps the chunk in a human readable form, for debugging.
+
+        Args:
+            name (str): name of the chunk.
+
+        Returns:
+            str: disassembly of the chunk.
+        """
+        lines = ["== {} ==".format(name)]
+        offset = 0
+        while offset < len(self.code):
+            op = opcodes[self.code[offset]]
+            size = 2 if op in ("CONSTANT", "GET_LOCAL", "SET_LOCAL", "GET_GLOBAL", "DEFINE_GLOBAL", "SET_GLOBAL",
+                               "GET_UPVALUE", "SET_UPVALUE", "GET_PROPERTY", "SET_PROPERTY", "GET_SUPER",
+                               "JUMP", "JUMP_IF_FALSE", "POP_JUMP_IF_FALSE", "LOOP", "CALL", "CLASS", "METHOD") else 1
+            if op in ("INVOKE", "SUPER_INVOKE"): size = 3
+            if op == "CLOSURE":
+                size = 2 + 2 * self.constants[self.code[offset + 1]].upvalue_count
+            operands = self.code[offset + 1: offset + size]
+            lines.append("{:04d} {} {}".format(offset, op, " ".join(str(i) for i in operands)))
+            offset += size
+        return "\n".join(lines)
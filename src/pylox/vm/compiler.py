@@ -0,0 +1,470 @@
+"""Bytecode compiler which compiles the resolved statements into chunks for the vm"""
+
+from decimal import Decimal
+from enum import Enum
+from typing import List
+import pylox.parser.expr as EXPR
+import pylox.parser.stmt as STMT
+from pylox.scanner.token import Token
+from pylox.environment.environment import global_slot
+from pylox.vm.opcodes import OP
+from pylox.vm.objects import VMFunction
+
+
+# Types of the functions
+class FUNCTION_TYPES(Enum):
+    SCRIPT = 0
+    FUNCTION = 1
+    INITIALIZER = 2
+    METHOD = 3
+
+
+class Local:
+    """A local variable slot of the function being compiled"""
+    def __init__(self, name: str, depth: int) -> None:
+        self.name = name
+        self.depth = depth
+        self.is_captured = False
+
+
+class FunctionCompiler:
+    """Compilation state of a single function"""
+    def __init__(self, enclosing, name, type: FUNCTION_TYPES) -> None:
+        """Initializes the function state, slot zero holds the callee or the receiver.
+
+        Args:
+            enclosing (FunctionCompiler): compiler of the enclosing function.
+            name (str): name of the function, None for the top level script.
+            type (FUNCTION_TYPES): type of the function.
+        """
+        self.enclosing = enclosing
+        self.function = VMFunction(name)
+        self.type = type
+        self.locals = [Local("this" if type in (FUNCTION_TYPES.METHOD, FUNCTION_TYPES.INITIALIZER) else "", 0)]
+        self.upvalues = []
+        self.scope_depth = 0
+
+
+# State
+current = None
+
+# Binary operators whose operands are always converted to float by the operation.
+arithmetic_ops = {
+    "MINUS": OP.SUBTRACT,
+    "SLASH": OP.DIVIDE,
+    "STAR": OP.MULTIPLY,
+    "PLUS": OP.ADD,
+    "GREATER": OP.GREATER,
+    "GREATER_EQUAL": OP.GREATER_EQUAL,
+    "LESS": OP.LESS,
+    "LESS_EQUAL": OP.LESS_EQUAL,
+}
+
+
+def visit_expression_stmt(stmt: STMT.Expression) -> None:
+    """Compiles an expression statement, discarding its value"""
+    compile_node(stmt.expression)
+    emit(OP.POP)
+
+def visit_print_stmt(stmt: STMT.Print) -> None:
+    """Compiles a print statement"""
+    compile_node(stmt.expression)
+    emit(OP.PRINT)
+
+def visit_var_stmt(stmt: STMT.Var) -> None:
+    """Compiles a variable declaration, locals live in the stack slot of their initializer.
+
+    Args:
+        stmt (STMT.Var): The Var node.
+    """
+    if stmt.initializer: compile_node(stmt.initializer)
+    else: emit(OP.NIL)
+    define_variable(stmt.name)
+
+def visit_block_stmt(stmt: STMT.Block) -> None:
+    """Compiles a block in a new scope"""
+    begin_scope()
+    for statement in stmt.statements:
+        compile_node(statement)
+    end_scope()
+
+def visit_if_stmt(stmt: STMT.If) -> None:
+    """Compiles an if statement with optional else branch"""
+    compile_node(stmt.condition)
+    then_jump = emit_jump(OP.POP_JUMP_IF_FALSE)
+    compile_node(stmt.thenBranch)
+    if stmt.elseBranch is None:
+        patch_jump(then_jump)
+        return
+    else_jump = emit_jump(OP.JUMP)
+    patch_jump(then_jump)
+    compile_node(stmt.elseBranch)
+    patch_jump(else_jump)
+
+def visit_while_stmt(stmt: STMT.While) -> None:
+    """Compiles a while loop"""
+    loop_start = len(current.function.chunk.code)
+    compile_node(stmt.condition)
+    exit_jump = emit_jump(OP.POP_JUMP_IF_FALSE)
+    compile_node(stmt.body)
+    emit_loop(loop_start)
+    patch_jump(exit_jump)
+
+def visit_for_stmt(stmt: STMT.For) -> None:
+    """Compiles a for loop, a variable declared by the initializer is a local of the loop's scope"""
+    scoped = type(stmt.initializer) is STMT.Var
+    if scoped: begin_scope()
+    if stmt.initializer is not None: compile_node(stmt.initializer)
+    loop_start = len(current.function.chunk.code)
+    exit_jump = None
+    if stmt.condition is not None:
+        compile_node(stmt.condition)
+        exit_jump = emit_jump(OP.POP_JUMP_IF_FALSE)
+    compile_node(stmt.body)
+    if stmt.increment is not None:
+        compile_node(stmt.increment)
+        emit(OP.POP)
+    emit_loop(loop_start)
+    if exit_jump is not None: patch_jump(exit_jump)
+    if scoped: end_scope()
+
+def visit_function_stmt(stmt: STMT.Function) -> None:
+    """Compiles a function declaration.
+
+    Args:
+        stmt (STMT.Function): Function node.
+    """
+    # a local function is declared before its body, so that it can refer to itself.
+    if current.scope_depth > 0: add_local(stmt.name.lexeme)
+    compile_function(stmt, FUNCTION_TYPES.FUNCTION)
+    if current.scope_depth == 0: emit(OP.DEFINE_GLOBAL, global_slot(stmt.name.lexeme))
+
+def visit_return_stmt(stmt: STMT.Return) -> None:
+    """Compiles a return statement"""
+    if stmt.value: compile_node(stmt.value)
+    else: emit_implicit_return_value()
+    emit(OP.RETURN)
+
+def visit_class_stmt(stmt: STMT.Class) -> None:
+    """Compiles a class declaration along with its methods.
+
+    Args:
+        stmt (STMT.Class): class node.
+    """
+    name = identifier_constant(stmt.name)
+    emit(OP.CLASS, name)
+    if current.scope_depth > 0: add_local(stmt.name.lexeme)
+    else: emit(OP.DEFINE_GLOBAL, global_slot(stmt.name.lexeme))
+
+    if stmt.superclass:
+        named_variable(stmt.superclass.name, False)
+        begin_scope()
+        add_local("super")
+        named_variable(stmt.name, False)
+        emit(OP.INHERIT, token=stmt.superclass.name)
+
+    named_variable(stmt.name, False)
+    for method in stmt.methods:
+        type = FUNCTION_TYPES.INITIALIZER if method.name.lexeme == "init" else FUNCTION_TYPES.METHOD
+        compile_function(method, type)
+        emit(OP.METHOD, identifier_constant(method.name))
+    emit(OP.POP)
+
+    if stmt.superclass: end_scope()
+
+def visit_literal_expr(expr: EXPR.Literal) -> None:
+    """Compiles a literal"""
+    if expr.value is None: emit(OP.NIL)
+    elif expr.value is True: emit(OP.TRUE)
+    elif expr.value is False: emit(OP.FALSE)
+    else: emit(OP.CONSTANT, make_constant(expr.value))
+
+def visit_grouping_expr(expr: EXPR.Grouping) -> None:
+    """Compiles a grouping expression"""
+    compile_node(expr.expression)
+
+def visit_hoisted_expr(expr: EXPR.Hoisted) -> None:
+    """A loop invariant expression is evaluated on every pass, the vm doesn't keep its value"""
+    compile_node(expr.expression)
+
+def visit_unary_expr(expr: EXPR.Unary) -> None:
+    """Compiles a unary expression"""
+    if expr.operator.type == "MINUS":
+        compile_operand(expr.right)
+        emit(OP.NEGATE, token=expr.operator)
+    else:
+        compile_node(expr.right)
+        emit(OP.NOT)
+
+def visit_binary_expr(expr: EXPR.Binary) -> None:
+    """Compiles a binary expression.
+
+    Args:
+        expr (EXPR.Binary): Binary expression node.
+    """
+    op = arithmetic_ops.get(expr.operator.type)
+    if op is not None:
+        compile_operand(expr.left)
+        compile_operand(expr.right)
+        emit(op, token=expr.operator)
+    else:
+        compile_node(expr.left)
+        compile_node(expr.right)
+        emit(OP.EQUAL if expr.operator.type == "EQUAL_EQUAL" else OP.NOT_EQUAL)
+
+def visit_logical_expr(expr: EXPR.Logical) -> None:
+    """Compiles a short circuiting logical expression"""
+    compile_node(expr.left)
+    if expr.operator.type == "OR":
+        else_jump = emit_jump(OP.JUMP_IF_FALSE)
+        end_jump = emit_jump(OP.JUMP)
+        patch_jump(else_jump)
+        emit(OP.POP)
+        compile_node(expr.right)
+        patch_jump(end_jump)
+    else:
+        end_jump = emit_jump(OP.JUMP_IF_FALSE)
+        emit(OP.POP)
+        compile_node(expr.right)
+        patch_jump(end_jump)
+
+def visit_variable_expr(expr: EXPR.Variable) -> None:
+    """Compiles a variable read"""
+    named_variable(expr.name, False)
+
+def visit_assign_expr(expr: EXPR.Assign) -> None:
+    """Compiles an assignment"""
+    compile_node(expr.value)
+    named_variable(expr.name, True)
+
+def visit_this_expr(expr: EXPR.This) -> None:
+    """Compiles this, which is the local slot zero of the method"""
+    named_variable(expr.keyword, False)
+
+def visit_super_expr(expr: EXPR.Super) -> None:
+    """Compiles a super method access into a bound method"""
+    named_variable(Token("THIS", "this", None, expr.keyword.line), False)
+    named_variable(expr.keyword, False)
+    emit(OP.GET_SUPER, identifier_constant(expr.method), token=expr.method)
+
+def visit_get_expr(expr: EXPR.Get) -> None:
+    """Compiles a property access"""
+    compile_node(expr.object)
+    emit(OP.GET_PROPERTY, identifier_constant(expr.name), token=expr.name)
+
+def visit_set_expr(expr: EXPR.Set) -> None:
+    """Compiles a property assignment"""
+    compile_node(expr.object)
+    compile_node(expr.value)
+    emit(OP.SET_PROPERTY, identifier_constant(expr.name), token=expr.name)
+
+def visit_call_expr(expr: EXPR.Call) -> None:
+    """Compiles a call, method calls are compiled into a single invoke instruction.
+
+    Args:
+        expr (EXPR.Call): Call expression node.
+    """
+    callee = expr.callee
+    if type(callee) is EXPR.Get:
+        compile_node(callee.object)
+        for arg in expr.arguments: compile_node(arg)
+        emit(OP.INVOKE, identifier_constant(callee.name), token=callee.name)
+        emit(len(expr.arguments), token=expr.paren)
+    elif type(callee) is EXPR.Super:
+        named_variable(Token("THIS", "this", None, callee.keyword.line), False)
+        for arg in expr.arguments: compile_node(arg)
+        named_variable(callee.keyword, False)
+        emit(OP.SUPER_INVOKE, identifier_constant(callee.method), token=callee.method)
+        emit(len(expr.arguments), token=expr.paren)
+    else:
+        compile_node(callee)
+        for arg in expr.arguments: compile_node(arg)
+        emit(OP.CALL, len(expr.arguments), token=expr.paren)
+
+def compile_node(node) -> None:
+    """Compiles an expression or a statement"""
+    node.accept(node)
+
+def compile_operand(expr) -> None:
+    """Compiles an operand of an arithmetic or comparison operator.
+
+    The operators convert their operands to float anyway, so number literals are
+    stored as float constants and take the fast path of the vm.
+    """
+    if type(expr) is EXPR.Literal and type(expr.value) is Decimal:
+        emit(OP.CONSTANT, make_constant(float(expr.value)))
+    else:
+        compile_node(expr)
+
+def compile_function(stmt: STMT.Function, type: FUNCTION_TYPES) -> None:
+    """Compiles the function body into its own chunk and emits the closure creation.
+
+    Args:
+        stmt (STMT.Function): function node.
+        type (FUNCTION_TYPES): type of the function.
+    """
+    global current
+    current = FunctionCompiler(current, stmt.name.lexeme, type)
+    current.function.arity = len(stmt.params)
+
+    begin_scope()
+    for param in stmt.params:
+        add_local(param.lexeme)
+    for statement in stmt.body:
+        compile_node(statement)
+    emit_implicit_return_value()
+    emit(OP.RETURN)
+
+    compiler = current
+    function = compiler.function
+    function.upvalue_count = len(compiler.upvalues)
+    current = compiler.enclosing
+
+    emit(OP.CLOSURE, make_constant(function))
+    for index, is_local in compiler.upvalues:
+        emit(1 if is_local else 0, index)
+
+def emit(*bytes, token: Token = None) -> None:
+    """Writes the bytes to the chunk of the current function"""
+    chunk = current.function.chunk
+    for byte in bytes:
+        chunk.write(byte, token)
+
+def emit_jump(op: int) -> int:
+    """Emits a jump with a placeholder offset, returns the position of the offset"""
+    emit(op, 0)
+    return len(current.function.chunk.code) - 1
+
+def patch_jump(offset: int) -> None:
+    """Patches the jump at offset to land on the next instruction"""
+    code = current.function.chunk.code
+    code[offset] = len(code) - offset - 1
+
+def emit_loop(loop_start: int) -> None:
+    """Emits a backward jump to loop_start"""
+    emit(OP.LOOP, 0)
+    code = current.function.chunk.code
+    code[-1] = len(code) - loop_start
+
+def emit_implicit_return_value() -> None:
+    """Initializers return this, everything else returns nil"""
+    if current.type == FUNCTION_TYPES.INITIALIZER: emit(OP.GET_LOCAL, 0)
+    else: emit(OP.NIL)
+
+def make_constant(value) -> int:
+    """Adds a value to the constant pool of the current chunk"""
+    return current.function.chunk.add_constant(value)
+
+def identifier_constant(name: Token) -> int:
+    """Adds the lexeme of the identifier to the constant pool"""
+    return make_constant(name.lexeme)
+
+def begin_scope() -> None:
+    """Begins a scope"""
+    current.scope_depth += 1
+
+def end_scope() -> None:
+    """Ends a scope, popping its locals and closing the captured ones"""
+    current.scope_depth -= 1
+    locals = current.locals
+    while locals and locals[-1].depth > current.scope_depth:
+        emit(OP.CLOSE_UPVALUE if locals[-1].is_captured else OP.POP)
+        locals.pop()
+
+def add_local(name: str) -> None:
+    """Declares a local in the current scope, it takes the next stack slot"""
+    current.locals.append(Local(name, current.scope_depth))
+
+def define_variable(name: Token) -> None:
+    """Defines the variable whose value is on top of the stack"""
+    if current.scope_depth > 0: add_local(name.lexeme)
+    else: emit(OP.DEFINE_GLOBAL, global_slot(name.lexeme))
+
+def resolve_local(compiler: FunctionCompiler, name: str) -> int:
+    """Finds the slot of a local in the function, -1 if not found"""
+    for i in range(len(compiler.locals) - 1, -1, -1):
+        if compiler.locals[i].name == name: return i
+    return -1
+
+def add_upvalue(compiler: FunctionCompiler, index: int, is_local: bool) -> int:
+    """Adds an upvalue to the function, reusing an existing capture of the same variable"""
+    upvalue = (index, is_local)
+    if upvalue in compiler.upvalues: return compiler.upvalues.index(upvalue)
+    compiler.upvalues.append(upvalue)
+    return len(compiler.upvalues) - 1
+
+def resolve_upvalue(compiler: FunctionCompiler, name: str) -> int:
+    """Finds the variable in the enclosing functions and captures it, -1 if it is global"""
+    if compiler.enclosing is None: return -1
+    local = resolve_local(compiler.enclosing, name)
+    if local != -1:
+        compiler.enclosing.locals[local].is_captured = True
+        return add_upvalue(compiler, local, True)
+    upvalue = resolve_upvalue(compiler.enclosing, name)
+    if upvalue != -1: return add_upvalue(compiler, upvalue, False)
+    return -1
+
+def named_variable(name: Token, assign: bool) -> None:
+    """Emits a read or a write of the variable, resolving it to a local, an upvalue or a global.
+
+    Args:
+        name (Token): token of the identifier.
+        assign (bool): True to store the value on top of the stack.
+    """
+    arg = resolve_local(current, name.lexeme)
+    if arg != -1:
+        get_op, set_op = OP.GET_LOCAL, OP.SET_LOCAL
+    else:
+        arg = resolve_upvalue(current, name.lexeme)
+        if arg != -1:
+            get_op, set_op = OP.GET_UPVALUE, OP.SET_UPVALUE
+        else:
+            arg = global_slot(name.lexeme)
+            get_op, set_op = OP.GET_GLOBAL, OP.SET_GLOBAL
+    emit(set_op if assign else get_op, arg, token=name)
+
+def compile(statements: List) -> VMFunction:
+    """Compiles the resolved statements into the top level script function.
+
+    Args:
+        statements (List): resolved statements.
+
+    Returns:
+        VMFunction: the script function.
+    """
+    global current
+    # assigning visitor method to the visitor's classes
+    EXPR.Assign.visit = visit_assign_expr
+    EXPR.Binary.visit = visit_binary_expr
+    EXPR.Call.visit = visit_call_expr
+    EXPR.Get.visit = visit_get_expr
+    EXPR.Grouping.visit = visit_grouping_expr
+    EXPR.Hoisted.visit = visit_hoisted_expr
+    EXPR.Literal.visit = visit_literal_expr
+    EXPR.Set.visit = visit_set_expr
+    EXPR.Super.visit = visit_super_expr
+    EXPR.This.visit = visit_this_expr
+    EXPR.Unary.visit = visit_unary_expr
+    EXPR.Variable.visit = visit_variable_expr
+    EXPR.Logical.visit = visit_logical_expr
+
+    STMT.Expression.visit = visit_expression_stmt
+    STMT.Class.visit = visit_class_stmt
+    STMT.Return.visit = visit_return_stmt
+    STMT.Function.visit = visit_function_stmt
+    STMT.Print.visit = visit_print_stmt
+    STMT.Var.visit = visit_var_stmt
+    STMT.Block.visit = visit_block_stmt
+    STMT.If.visit = visit_if_stmt
+    STMT.While.visit = visit_while_stmt
+    STMT.For.visit = visit_for_stmt
+
+    current = FunctionCompiler(None, None, FUNCTION_TYPES.SCRIPT)
+    try:
+        for stmt in statements:
+            compile_node(stmt)
+        emit(OP.NIL)
+        emit(OP.RETURN)
+        return current.function
+    finally:
+        current = None
@@ -0,0 +1,81 @@
+"""Runtime objects of the bytecode virtual machine"""
+
+from pylox.vm.chunk import Chunk
+
+
+class VMFunction:
+    """Compiled function: its bytecode and metadata"""
+    __slots__ = ("name", "arity", "chunk", "upvalue_count")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.arity = 0
+        self.chunk = Chunk()
+        self.upvalue_count = 0
+
+    def __repr__(self) -> str:
+        if self.name is None: return "<script>"
+        return "<fn {}>".format(self.name)
+
+
+class Upvalue:
+    """A captured variable, open while it lives on the stack and closed once its slot is popped"""
+    __slots__ = ("index", "value")
+
+    def __init__(self, index: int) -> None:
+        """Initializes an open upvalue.
+
+        Args:
+            index (int): stack slot of the captured variable, -1 once closed.
+        """
+        self.index = index
+        self.value = None
+
+
+class Closure:
+    """Runtime function object, a compiled function along with its captured upvalues"""
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: VMFunction) -> None:
+        self.function = function
+        self.upvalues = []
+
+    def __repr__(self) -> str:
+        return repr(self.function)
+
+
+class BoundMethod:
+    """Method closure bound to its receiver"""
+    __slots__ = ("receiver", "method")
+
+    def __init__(self, receiver, method: Closure) -> None:
+        self.receiver = receiver
+        self.method = method
+
+    def __repr__(self) -> str:
+        return repr(self.method)
+
+
+class VMClass:
+    """Runtime class object, inherited methods are copied down into methods"""
+    __slots__ = ("name", "methods", "initializer")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.methods = {}
+        self.initializer = None
+
+    def __repr__(self) -> str:
+        return str(self.name)
+
+
+class VMInstance:
+    """Instance of a VMClass"""
+    __slots__ = ("klass", "fields")
+
+    def __init__(self, klass: VMClass) -> None:
+        self.klass = klass
+        self.fields = {}
+
+    def __repr__(self) -> str:
+        return str(self.klass.name) + " instance"
@@ -0,0 +1,50 @@
+"""Opcodes of the bytecode virtual machine"""
+
+from types import SimpleNamespace
+
+# Instruction set, the operands (if any) follow the opcode in the code list.
+opcodes = [
+    "CONSTANT",         # constant index
+    "NIL",
+    "TRUE",
+    "FALSE",
+    "POP",
+    "GET_LOCAL",        # slot
+    "SET_LOCAL",        # slot
+    "GET_GLOBAL",       # global slot
+    "DEFINE_GLOBAL",    # global slot
+    "SET_GLOBAL",       # global slot
+    "GET_UPVALUE",      # upvalue index
+    "SET_UPVALUE",      # upvalue index
+    "GET_PROPERTY",     # name constant index
+    "SET_PROPERTY",     # name constant index
+    "GET_SUPER",        # name constant index
+    "EQUAL",
+    "NOT_EQUAL",
+    "GREATER",
+    "GREATER_EQUAL",
+    "LESS",
+    "LESS_EQUAL",
+    "ADD",
+    "SUBTRACT",
+    "MULTIPLY",
+    "DIVIDE",
+    "NOT",
+    "NEGATE",
+    "PRINT",
+    "JUMP",             # forward offset
+    "JUMP_IF_FALSE",    # forward offset
+    "POP_JUMP_IF_FALSE",  # forward offset, pops the condition
+    "LOOP",             # backward offset
+    "CALL",             # argument count
+    "INVOKE",           # name constant index, argument count
+    "SUPER_INVOKE",     # name constant index, argument count
+    "CLOSURE",          # function constant index, (is_local, index) per upvalue
+    "CLOSE_UPVALUE",
+    "RETURN",
+    "CLASS",            # name constant index
+    "INHERIT",
+    "METHOD",           # name constant index
+]
+
+OP = SimpleNamespace(**{name: code for code, name in enumerate(opcodes)})
@@ -0,0 +1,414 @@
+"""Stack based virtual machine which runs the compiled bytecode"""
+
+import time
+from typing import List
+from pylox.exceptions.exceptions import RuntimeError
+from pylox.interpreter.interpreter import check_number_operand, check_number_operands, is_number, stringify
+from pylox.interpreter.lox_callable import LoxCallable
+from pylox.environment.environment import UNDEFINED, GlobalEnvironment
+from pylox.vm.compiler import compile
+from pylox.vm.objects import BoundMethod, Closure, Upvalue, VMClass, VMInstance
+from pylox.vm.opcodes import OP
+
+
+# Default maximum depth of lox calls, the frames are a list so it isn't bound by the python stack.
+FRAMES_MAX = 10000
+
+# State of the vm
+globals = GlobalEnvironment()
+
+
+def binary_op(op: int, left, right, operator):
+    """Slow path of the binary operators, for operands which aren't both floats.
+
+    Mirrors the operand checks and conversions of the tree walk interpreter.
+
+    Args:
+        op (int): opcode of the operator.
+        left: left operand.
+        right: right operand.
+        operator (Token): operator token, reported on errors.
+
+    Raises:
+        RuntimeError: if the operands are of invalid type.
+    """
+    if op == OP.ADD:
+        if is_number(left) and is_number(right): return float(left) + float(right)
+        if type(left) is str and type(right) is str: return str(left + right)
+        raise RuntimeError(operator, "Operands must be two numbers or two strings.")
+    check_number_operands(operator, left, right)
+    left, right = float(left), float(right)
+    if op == OP.SUBTRACT: return left - right
+    if op == OP.MULTIPLY: return left * right
+    if op == OP.DIVIDE:
+        if right == 0: return float("nan")
+        return left / right
+    if op == OP.GREATER: return left > right
+    if op == OP.GREATER_EQUAL: return left >= right
+    if op == OP.LESS: return left < right
+    return left <= right
+
+def negate(operand, operator):
+    """Slow path of the negation, mirroring the tree walk interpreter"""
+    check_number_operand(operator, operand)
+    return float(-operand)
+
+def call_native(callee: LoxCallable, arguments: List, paren):
+    """Calls a native callable.
+
+    Args:
+        callee (LoxCallable): the native function.
+        arguments (List): arguments to the call.
+        paren (Token): closing paren of the call, reported on errors.
+    """
+    if len(arguments) != callee.arity():
+        raise RuntimeError(paren, "Expected {} arguments but got {}.".format(callee.arity(), len(arguments)))
+    return callee.call(globals, arguments)
+
+def run(script: Closure, max_call_depth: int = FRAMES_MAX) -> None:
+    """Runs the script closure in the dispatch loop until it returns.
+
+    Every lox call pushes a frame on the frames list instead of recursing, the
+    state of the executing frame is kept in the local variables of the loop.
+    A call in tail position (directly followed by a return) reuses the frame of
+    the caller instead. The branches are ordered by how often the instructions execute.
+
+    Args:
+        script (Closure): the compiled top level script.
+        max_call_depth (int): maximum number of frames.
+
+    Raises:
+        RuntimeError: on lox runtime errors, a stack overflow when the frames exceed max_call_depth.
+    """
+    # opcodes as locals for the dispatch loop
+    CONSTANT, NIL, TRUE, FALSE, POP = OP.CONSTANT, OP.NIL, OP.TRUE, OP.FALSE, OP.POP
+    GET_LOCAL, SET_LOCAL = OP.GET_LOCAL, OP.SET_LOCAL
+    GET_GLOBAL, DEFINE_GLOBAL, SET_GLOBAL = OP.GET_GLOBAL, OP.DEFINE_GLOBAL, OP.SET_GLOBAL
+    GET_UPVALUE, SET_UPVALUE = OP.GET_UPVALUE, OP.SET_UPVALUE
+    GET_PROPERTY, SET_PROPERTY, GET_SUPER = OP.GET_PROPERTY, OP.SET_PROPERTY, OP.GET_SUPER
+    EQUAL, NOT_EQUAL = OP.EQUAL, OP.NOT_EQUAL
+    GREATER, GREATER_EQUAL, LESS, LESS_EQUAL = OP.GREATER, OP.GREATER_EQUAL, OP.LESS, OP.LESS_EQUAL
+    ADD, SUBTRACT, MULTIPLY, DIVIDE = OP.ADD, OP.SUBTRACT, OP.MULTIPLY, OP.DIVIDE
+    NOT, NEGATE, PRINT = OP.NOT, OP.NEGATE, OP.PRINT
+    JUMP, JUMP_IF_FALSE, POP_JUMP_IF_FALSE, LOOP = OP.JUMP, OP.JUMP_IF_FALSE, OP.POP_JUMP_IF_FALSE, OP.LOOP
+    CALL, INVOKE, SUPER_INVOKE = OP.CALL, OP.INVOKE, OP.SUPER_INVOKE
+    CLOSURE, CLOSE_UPVALUE, RETURN = OP.CLOSURE, OP.CLOSE_UPVALUE, OP.RETURN
+    CLASS, INHERIT, METHOD = OP.CLASS, OP.INHERIT, OP.METHOD
+
+    _globals = globals.values
+    _float = float
+    stack = [script]
+    push, pop = stack.append, stack.pop
+    frames = []
+    open_upvalues = []
+
+    closure = script
+    chunk = script.function.chunk
+    code, constants = chunk.code, chunk.constants
+    ip = 0
+    base = 0
+
+    while True:
+        op = code[ip]
+        ip += 1
+
+        if op == GET_LOCAL:
+            push(stack[base + code[ip]])
+            ip += 1
+        elif op == GET_GLOBAL:
+            value = _globals[code[ip]]
+            ip += 1
+            if value is UNDEFINED:
+                raise RuntimeError(chunk.tokens[ip - 1], "Undefined variable '" + chunk.tokens[ip - 1].lexeme + "'.")
+            push(value)
+        elif op == CONSTANT:
+            push(constants[code[ip]])
+            ip += 1
+        elif op == CALL or op == INVOKE:
+            if op == CALL:
+                argc = code[ip]
+                ip += 1
+                callee = stack[-argc - 1]
+            else:
+                name = constants[code[ip]]
+                argc = code[ip + 1]
+                ip += 2
+                receiver = stack[-argc - 1]
+                if type(receiver) is not VMInstance:
+                    raise RuntimeError(chunk.tokens[ip - 2], "Only instances have property")
+                if name in receiver.fields:
+                    callee = stack[-argc - 1] = receiver.fields[name]
+                else:
+                    callee = receiver.klass.methods.get(name)
+                    if callee is None:
+                        raise RuntimeError(chunk.tokens[ip - 2], "Undefied property {}.".format(name))
+
+            callee_type = type(callee)
+            if callee_type is BoundMethod:
+                stack[-argc - 1] = callee.receiver
+                callee = callee.method
+            elif callee_type is VMClass:
+                stack[-argc - 1] = VMInstance(callee)
+                if callee.initializer is None:
+                    if argc != 0:
+                        raise RuntimeError(chunk.tokens[ip - 1], "Expected 0 arguments but got {}.".format(argc))
+                    continue
+                callee = callee.initializer
+            elif callee_type is not Closure:
+                if not isinstance(callee, LoxCallable):
+                    raise RuntimeError(chunk.tokens[ip - 1], "Can only call functions and classes.")
+                arguments = stack[len(stack) - argc:]
+                result = call_native(callee, arguments, chunk.tokens[ip - 1])
+                del stack[len(stack) - argc - 1:]
+                push(result)
+                continue
+
+            function = callee.function
+            if argc != function.arity:
+                raise RuntimeError(chunk.tokens[ip - 1], "Expected {} arguments but got {}.".format(function.arity, argc))
+            if code[ip] == RETURN:
+                # tail call, the callee and the arguments replace the slots of the returning frame
+                if open_upvalues and open_upvalues[-1].index >= base:
+                    close_upvalues(open_upvalues, stack, base)
+                stack[base:] = stack[len(stack) - argc - 1:]
+            else:
+                if len(frames) >= max_call_depth:
+                    raise RuntimeError(chunk.tokens[ip - 1], "Stack overflow.")
+                frames.append((closure, chunk, ip, base))
+                base = len(stack) - argc - 1
+            closure = callee
+            chunk = function.chunk
+            code, constants = chunk.code, chunk.constants
+            ip = 0
+        elif op == RETURN:
+            result = pop()
+            if open_upvalues and open_upvalues[-1].index >= base:
+                close_upvalues(open_upvalues, stack, base)
+            if not frames:
+                del stack[:]
+                return
+            del stack[base:]
+            push(result)
+            closure, chunk, ip, base = frames.pop()
+            code, constants = chunk.code, chunk.constants
+        elif op == POP:
+            pop()
+        elif op == GET_PROPERTY:
+            instance = stack[-1]
+            name = constants[code[ip]]
+            ip += 1
+            if type(instance) is not VMInstance:
+                raise RuntimeError(chunk.tokens[ip - 1], "Only instances have property")
+            fields = instance.fields
+            if name in fields:
+                stack[-1] = fields[name]
+            else:
+                method = instance.klass.methods.get(name)
+                if method is None:
+                    raise RuntimeError(chunk.tokens[ip - 1], "Undefied property {}.".format(name))
+                stack[-1] = BoundMethod(instance, method)
+        elif op == ADD:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a + b
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == POP_JUMP_IF_FALSE:
+            if pop(): ip += 1
+            else: ip += code[ip] + 1
+        elif op == LESS:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a < b
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == SUBTRACT:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a - b
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == SET_GLOBAL:
+            slot = code[ip]
+            ip += 1
+            if _globals[slot] is UNDEFINED:
+                raise RuntimeError(chunk.tokens[ip - 1], "Undefined variable '" + chunk.tokens[ip - 1].lexeme + "'.")
+            _globals[slot] = stack[-1]
+        elif op == SET_LOCAL:
+            stack[base + code[ip]] = stack[-1]
+            ip += 1
+        elif op == LOOP:
+            ip -= code[ip] - 1
+        elif op == SET_PROPERTY:
+            value = pop()
+            instance = stack[-1]
+            ip += 1
+            if type(instance) is not VMInstance:
+                raise RuntimeError(chunk.tokens[ip - 1], "Only instances have fields")
+            instance.fields[constants[code[ip - 1]]] = value
+            stack[-1] = value
+        elif op == GET_UPVALUE:
+            upvalue = closure.upvalues[code[ip]]
+            ip += 1
+            push(stack[upvalue.index] if upvalue.index >= 0 else upvalue.value)
+        elif op == JUMP_IF_FALSE:
+            if stack[-1]: ip += 1
+            else: ip += code[ip] + 1
+        elif op == JUMP:
+            ip += code[ip] + 1
+        elif op == NIL:
+            push(None)
+        elif op == EQUAL:
+            b = pop()
+            stack[-1] = stack[-1] == b
+        elif op == NOT_EQUAL:
+            b = pop()
+            stack[-1] = not stack[-1] == b
+        elif op == TRUE:
+            push(True)
+        elif op == FALSE:
+            push(False)
+        elif op == GREATER:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a > b
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == GREATER_EQUAL:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a >= b
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == LESS_EQUAL:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a <= b
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == MULTIPLY:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a * b
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == DIVIDE:
+            b = pop()
+            a = stack[-1]
+            if type(a) is _float and type(b) is _float: stack[-1] = a / b if b != 0 else _float("nan")
+            else: stack[-1] = binary_op(op, a, b, chunk.tokens[ip - 1])
+        elif op == NOT:
+            stack[-1] = not stack[-1]
+        elif op == NEGATE:
+            a = stack[-1]
+            if type(a) is _float: stack[-1] = -a
+            else: stack[-1] = negate(a, chunk.tokens[ip - 1])
+        elif op == SET_UPVALUE:
+            upvalue = closure.upvalues[code[ip]]
+            ip += 1
+            if upvalue.index >= 0: stack[upvalue.index] = stack[-1]
+            else: upvalue.value = stack[-1]
+        elif op == PRINT:
+            print(stringify(pop()))
+        elif op == DEFINE_GLOBAL:
+            _globals[code[ip]] = pop()
+            ip += 1
+        elif op == SUPER_INVOKE or op == GET_SUPER:
+            name = constants[code[ip]]
+            superclass = pop()
+            method = superclass.methods.get(name)
+            if method is None:
+                raise RuntimeError(chunk.tokens[ip], "Undefined property '{}'.".format(name))
+            if op == GET_SUPER:
+                ip += 1
+                stack[-1] = BoundMethod(stack[-1], method)
+                continue
+            argc = code[ip + 1]
+            ip += 2
+            function = method.function
+            if argc != function.arity:
+                raise RuntimeError(chunk.tokens[ip - 1], "Expected {} arguments but got {}.".format(function.arity, argc))
+            if code[ip] == RETURN:
+                # tail call, as in CALL
+                if open_upvalues and open_upvalues[-1].index >= base:
+                    close_upvalues(open_upvalues, stack, base)
+                stack[base:] = stack[len(stack) - argc - 1:]
+            else:
+                if len(frames) >= max_call_depth:
+                    raise RuntimeError(chunk.tokens[ip - 1], "Stack overflow.")
+                frames.append((closure, chunk, ip, base))
+                base = len(stack) - argc - 1
+            closure = method
+            chunk = function.chunk
+            code, constants = chunk.code, chunk.constants
+            ip = 0
+        elif op == CLOSURE:
+            function = constants[code[ip]]
+            ip += 1
+            new_closure = Closure(function)
+            for _ in range(function.upvalue_count):
+                is_local, index = code[ip], code[ip + 1]
+                ip += 2
+                if is_local: new_closure.upvalues.append(capture_upvalue(open_upvalues, base + index))
+                else: new_closure.upvalues.append(closure.upvalues[index])
+            push(new_closure)
+        elif op == CLOSE_UPVALUE:
+            close_upvalues(open_upvalues, stack, len(stack) - 1)
+            pop()
+        elif op == CLASS:
+            push(VMClass(constants[code[ip]]))
+            ip += 1
+        elif op == INHERIT:
+            superclass = stack[-2]
+            if type(superclass) is not VMClass:
+                raise RuntimeError(chunk.tokens[ip - 1], "Superclass must be a class.")
+            subclass = pop()
+            subclass.methods.update(superclass.methods)
+            subclass.initializer = superclass.initializer
+        elif op == METHOD:
+            name = constants[code[ip]]
+            ip += 1
+            method = pop()
+            klass = stack[-1]
+            klass.methods[name] = method
+            if name == "init": klass.initializer = method
+        else:
+            raise Exception("Unknown opcode {}".format(op))
+
+def capture_upvalue(open_upvalues: List, index: int) -> Upvalue:
+    """Captures the stack slot, sharing the upvalue if the slot is already captured.
+
+    Args:
+        open_upvalues (List): open upvalues sorted by their stack slot.
+        index (int): stack slot to capture.
+    """
+    for upvalue in reversed(open_upvalues):
+        if upvalue.index == index: return upvalue
+        if upvalue.index < index: break
+    upvalue = Upvalue(index)
+    open_upvalues.append(upvalue)
+    open_upvalues.sort(key=lambda u: u.index)
+    return upvalue
+
+def close_upvalues(open_upvalues: List, stack: List, last: int) -> None:
+    """Closes the open upvalues of the slots at or above last, moving their values off the stack"""
+    while open_upvalues and open_upvalues[-1].index >= last:
+        upvalue = open_upvalues.pop()
+        upvalue.value = stack[upvalue.index]
+        upvalue.index = -1
+
+def interpret(statements: List, max_call_depth: int = FRAMES_MAX) -> None:
+    """Compiles the resolved statements and runs them on the vm.
+
+    Args:
+        statements (List): resolved statements.
+        max_call_depth (int): maximum depth of lox calls.
+    """
+    script = Closure(compile(statements))
+    # the globals of the compiled statements index their slots
+    globals.reserve()
+    if not globals.is_defined("clock"):
+        def c_arity():
+            return 0
+        def c_call(interepreter, globals):
+            return time.time()
+
+        clock_object = LoxCallable()
+        clock_object.arity = c_arity
+        clock_object.call = c_call
+        globals.define("clock", clock_object)
+
+    run(script, max_call_depth)
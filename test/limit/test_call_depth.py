@@ -0,0 +1,47 @@
+"""Call depth of the vm: the --max-call-depth limit and the tail calls.
+
+The scripts need flags the .lox suite doesn't pass, so they run pylox here.
+"""
+import subprocess
+import sys
+
+# Recursion which isn't in tail position, every call keeps its frame
+COUNT = """\
+fun count(n) {
+  if (n == 0) return 0;
+  return 1 + count(n - 1);
+}
+
+print count(300000);
+"""
+
+# A call in tail position reuses the frame of its caller
+LOOP = """\
+fun loop(n, total) {
+  if (n == 0) return total;
+  return loop(n - 1, total + 1);
+}
+
+print loop(500000, 0);
+"""
+
+
+def run_vm(tmp_path, source, *flags):
+    script = tmp_path / "script.lox"
+    script.write_text(source)
+    result = subprocess.run([sys.executable, "-m", "pylox.lox", str(script), "--no-cache", "--engine=vm", *flags],
+                            capture_output=True, text=True, timeout=120)
+    return result.stdout.strip()
+
+
+def test_raised_limit_runs_deep_recursion(tmp_path):
+    assert run_vm(tmp_path, COUNT, "--max-call-depth=300001") == "300000"
+
+
+def test_deep_recursion_past_the_limit_overflows(tmp_path):
+    assert run_vm(tmp_path, COUNT, "--max-call-depth=300000") == "RuntimeError: [line: 3] ) : Stack overflow."
+    assert run_vm(tmp_path, COUNT) == "RuntimeError: [line: 3] ) : Stack overflow."
+
+
+def test_tail_calls_run_in_one_frame(tmp_path):
+    assert run_vm(tmp_path, LOOP, "--max-call-depth=1") == "500000"
@@ -0,0 +1,81 @@
+"""Counts the runtime objects (environments, functions and bound methods) allocated per method call"""
+
+import argparse
+import importlib
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_PATH)
+
+from pylox.lox import compile_program, engines
+
+# Classes whose instances are counted, by module
+COUNTED = {
+    "pylox.environment.environment": ["Environment"],
+    "pylox.interpreter.lox_function": ["LoxFunction"],
+    "pylox.interpreter.lox_bound_method": ["LoxBoundMethod"],
+    "pylox.closure.closure_function": ["ClosureFunction"],
+}
+
+# Script running a loop of count iterations, which calls a method
+SCRIPT = """
+class Counter {{
+  init() {{
+    this.count = 0;
+  }}
+
+  add(n) {{
+    this.count = this.count + n;
+  }}
+}}
+
+var counter = Counter();
+for (var i = 0; i < {count}; i = i + 1) {{
+  {call}
+}}
+print counter.count;
+"""
+
+counts = {}
+
+
+def count_instances(cls):
+    """Counts the instances of the class as they are initialized"""
+    init = cls.__init__
+    def counted_init(self, *args, **kwargs):
+        counts[cls.__name__] += 1
+        init(self, *args, **kwargs)
+    cls.__init__ = counted_init
+    counts[cls.__name__] = 0
+
+def run(engine, count, call):
+    """Runs the script with count iterations, returns the counted allocations"""
+    statements = compile_program(SCRIPT.format(count=count, call=call), "float")
+    for name in counts: counts[name] = 0
+    with redirect_stdout(io.StringIO()):
+        engines[engine](statements)
+    return dict(counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engine", choices=("tree", "closure"), default="tree", help="engine running the script")
+    parser.add_argument("--calls", type=int, default=100000, help="number of method calls")
+    args = parser.parse_args()
+
+    for module, names in COUNTED.items():
+        try:
+            module = importlib.import_module(module)
+        except ImportError:
+            continue
+        for name in names: count_instances(getattr(module, name))
+
+    # the allocations of the loop itself are counted without the call and subtracted
+    loop = run(args.engine, args.calls, "")
+    calls = run(args.engine, args.calls, "counter.add(1);")
+    for name in counts:
+        print("{:<16} {:.2f} per call".format(name, (calls[name] - loop[name]) / args.calls))
+    print("{:<16} {:.2f} per call".format("total", sum(calls[name] - loop[name] for name in counts) / args.calls))
@@ -0,0 +1,73 @@
+"""Measures the memory of the AST and the time to parse and resolve it on a large generated lox program"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test", "benchmark")
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_PATH)
+
+from pylox.scanner.scanner import Scanner
+from pylox.parser.parser import Parser
+from pylox.resolver.resolver import resolve
+
+
+def generate_source(size):
+    """Generates a lox program of at least size bytes by repeating the benchmark scripts"""
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(DEFAULT_PATH, "*.lox"))):
+        with open(path) as f:
+            chunks.append(f.read() + "\n")
+    corpus = "".join(chunks)
+    return corpus * (size // len(corpus) + 1)
+
+def children(node):
+    """Child nodes of a node"""
+    fields = getattr(type(node), "__match_args__", None)
+    values = [getattr(node, field) for field in fields] if fields is not None else vars(node).values()
+    for value in values:
+        if type(value) is list: yield from (v for v in value if hasattr(v, "accept"))
+        elif hasattr(value, "accept"): yield value
+
+def walk(statements):
+    """Counts the nodes of the statements"""
+    count = 0
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(children(node))
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=float, default=2, help="size of the generated program in MB")
+    args = parser.parse_args()
+
+    src = generate_source(int(args.size * 1024 * 1024))
+    tokens = Scanner(src).scan_tokens()
+
+    start = time.perf_counter()
+    statements = Parser(tokens).parse()
+    parsed = time.perf_counter()
+
+    # parsed again for the memory, tracing slows the parser down
+    del statements
+    tracemalloc.start()
+    statements = Parser(tokens).parse()
+    del tokens
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start_resolve = time.perf_counter()
+    resolve(statements)
+    resolved = time.perf_counter()
+    nodes = walk(statements)
+
+    print("{} nodes: {:.1f} MB ({:.0f} bytes per node)".format(nodes, size / (1024 * 1024), size / nodes))
+    print("parse {:.2f}s, resolve {:.2f}s".format(parsed - start, resolved - start_resolve))
@@ -0,0 +1,49 @@
+"""Runs the lox benchmarks under the given engines and reports the wall time of each run"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import time
+
+DEFAULT_PATH = "../test/benchmark"
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def run_benchmark(path, options, timeout):
+    """Runs a single benchmark script and returns the elapsed seconds, None on timeout"""
+    env = dict(os.environ, PYTHONPATH=SRC_PATH)
+    start = time.perf_counter()
+    try:
+        subprocess.run([sys.executable, "-m", "pylox.lox", *options, path], env=env, timeout=timeout,
+                       stdout=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        return None
+    return time.perf_counter() - start
+
+def benchmark(paths, configurations, timeout):
+    """Prints a table of the timings, with the speedup relative to the first configuration"""
+    print("{:<24}".format("benchmark") + "".join("{:>24}".format(c) for c in configurations))
+    for path in paths:
+        row = "{:<24}".format(os.path.basename(path))
+        baseline = None
+        for configuration in configurations:
+            elapsed = run_benchmark(path, configuration.split(), timeout)
+            if elapsed is None:
+                row += "{:>24}".format("timeout")
+                continue
+            if baseline is None: baseline = elapsed
+            row += "{:>24}".format("{:.2f}s ({:.1f}x)".format(elapsed, baseline / elapsed))
+        print(row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", help="benchmark scripts, defaults to every script in " + DEFAULT_PATH)
+    parser.add_argument("-c", "--config", action="append", help="pylox options of a configuration, e.g. '--engine=vm'")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    scripts = args.scripts or sorted(glob.glob(os.path.join(DEFAULT_PATH, "*.lox")))
+    benchmark(scripts, args.config or ["--engine=tree", "--engine=vm"], args.timeout)
@@ -0,0 +1,64 @@
+"""Measures the memory retained per closure which outlives the nested functions which created it"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_PATH)
+
+from pylox.lox import compile_program, engines
+
+# A linked list of callbacks, each one created by depth nested functions with
+# many locals of which the callback refers to only one
+RETAIN = """
+class Node {{
+  init(callback, next) {{
+    this.callback = callback;
+    this.next = next;
+  }}
+}}
+
+fun make(i) {{
+{nest}
+}}
+
+var head = nil;
+for (var i = 0; i < {count}; i = i + 1) head = Node(make(i), head);
+"""
+
+
+def nest(depth, locals):
+    """Returns the nested functions, the innermost one returns the callback"""
+    lines = []
+    for level in range(depth):
+        indent = "  " * (level + 1)
+        lines += ["{}var local{}x{} = i + {};".format(indent, level, n, n) for n in range(locals)]
+        lines.append("{}fun level{}() {{".format(indent, level))
+    indent = "  " * (depth + 1)
+    lines += [indent + "fun callback() { return local0x0; }", indent + "return callback;"]
+    for level in reversed(range(depth)):
+        indent = "  " * (level + 1)
+        lines += [indent + "}", "{}return level{}();".format(indent, level)]
+    return "\n".join(lines)
+
+def memory(engine, depth, locals, count):
+    """Returns the bytes retained per callback"""
+    statements = compile_program(RETAIN.format(nest=nest(depth, locals), count=count), "float")
+    tracemalloc.start()
+    engines[engine](statements)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engine", choices=("tree", "closure"), default="tree", help="engine running the script")
+    parser.add_argument("--depth", type=int, default=4, help="number of functions nested around the callback")
+    parser.add_argument("--locals", type=int, default=8, help="number of locals of every nested function")
+    parser.add_argument("--count", type=int, default=10000, help="number of retained callbacks")
+    args = parser.parse_args()
+
+    print("depth {}, {} locals: {:.0f} bytes per callback".format(args.depth, args.locals, memory(args.engine, args.depth, args.locals, args.count)))
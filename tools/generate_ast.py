@@ -3,6 +3,18 @@ import sys
 DEFAULT_PATH = "../src/pylox/parser"
 
 
+def define_kinds(f, classes):
+    f.write("# Kind tags of the node classes, new classes are appended so the kinds are stable.\n")
+    f.write("".join("{} = {}\n".format(c_name.upper(), kind) for kind, c_name in enumerate(classes)))
+    f.write("\n")
+
+def define_classes(f, classes):
+    f.write("# Node classes, indexed by their kind\nclasses = ({},)\n".format(", ".join(classes)))
+
+def define_line(f, line):
+    # line of the node is read from its tokens, so it isn't stored
+    f.write("\n\t#Line of the node, None if it has no token\n\t@property\n\tdef line(self):\n\t\treturn {}\n".format(line))
+
 def define_visitor(f):
     data = "\n\t#Visitor Method\n\tdef accept(self, visitor):\n\t\treturn visitor.visit()\n\n"
     f.write(data)
@@ -11,10 +23,27 @@ def comments(f, c):
     message = "{}Node classes({} classes) definition{}\n{}This is a generated file, from tools/generate_ast.py script{}\n\n".format('"""', c, '"""', '"""', '"""')
     f.write(message)
 
+def define_markers(f):
+    f.write("# Depth of a variable which isn't resolved to a local, i.e. a global.\nGLOBAL = -1\n\n")
+
 
-def define_type(file, c_name, fields):
-    # class definition with constructor
-    _class = "class {}:\n\t#Constructor\n\tdef __init__(self, {}):\n{}".format(c_name, fields, "".join("\t\tself.{} = {}\n".format(i, i) for i in fields.split(",")))
+def define_type(file, c_name, fields, resolved=False, cache=None, typed=False):
+    slots = fields.split(",") + (["depth", "index", "cell"] if resolved else []) + (cache.split(",") if cache else []) + (["proven"] if typed else [])
+    # class definition with slots, kind tag and constructor
+    _class = "class {}:\n".format(c_name)
+    _class += "\t__slots__ = ({},)\n".format(", ".join('"{}"'.format(i) for i in slots))
+    _class += "\t__match_args__ = ({},)\n".format(", ".join('"{}"'.format(i) for i in fields.split(",")))
+    _class += "\tkind = {}\n\n".format(c_name.upper())
+    _class += "\t#Constructor\n\tdef __init__(self, {}):\n{}".format(fields, "".join("\t\tself.{} = {}\n".format(i, i) for i in fields.split(",")))
+    # resolution of the variable, stored on the node by the resolver, a captured variable is in a cell
+    if resolved:
+        _class += "\t\tself.depth = GLOBAL\n\t\tself.index = 0\n\t\tself.cell = False\n"
+    # inline cache of the site, filled by the interpreter
+    if cache:
+        _class += "".join("\t\tself.{} = None\n".format(i) for i in cache.split(","))
+    # python type of the operands proven by the type inference, None if nothing is proven
+    if typed:
+        _class += "\t\tself.proven = None\n"
 
     file.write(_class)
 
@@ -25,6 +54,16 @@ def generate_ast(filename, path = DEFAULT_PATH):
 
     print("Path", path)
     
+    # nodes referring to a variable, which are resolved to a (depth, index)
+    resolved = []
+    # operators whose operand types are proven by the type inference
+    typed = []
+    # property access sites with an inline cache keyed on the shape of the instance, super
+    # accesses with the method cached for their superclass, calls inlined by the optimizer
+    # with the function they're guarded on, loop invariant expressions with their value in the
+    # current run of their loop
+    caches = {}
+    # new classes are appended, the kind of a class is its position
     if file_name == "expr":
         classes = {
             "Assign":"name,value",
@@ -38,7 +77,35 @@ def generate_ast(filename, path = DEFAULT_PATH):
             "Super": "keyword,method",
             "This": "keyword",
             "Unary": "operator,right",
-            "Variable": "name"
+            "Variable": "name",
+            "Hoisted": "expression"
+        }
+        resolved = ["Assign", "Super", "This", "Variable"]
+        typed = ["Binary", "Logical", "Unary"]
+        caches = {
+            "Binary": "operation",
+            "Call": "inlined,target",
+            "Get": "shape,slot,cache",
+            "Set": "shape,slot,transition,cache",
+            "Super": "superclass,function,this",
+            "Unary": "operation",
+            "Logical": "operation",
+            "Hoisted": "value"
+        }
+        lines = {
+            "Assign": "self.name.line",
+            "Binary": "self.operator.line",
+            "Call": "self.paren.line",
+            "Get": "self.name.line",
+            "Grouping": "self.expression.line",
+            "Literal": "None",
+            "Logical": "self.operator.line",
+            "Set": "self.name.line",
+            "Super": "self.keyword.line",
+            "This": "self.keyword.line",
+            "Unary": "self.operator.line",
+            "Variable": "self.name.line",
+            "Hoisted": "self.expression.line"
         }
     elif file_name == "stmt":
         classes = {
@@ -50,18 +117,48 @@ def generate_ast(filename, path = DEFAULT_PATH):
             "Print": "expression",
             "Var": "name,initializer",
             "Return": "keyword,value",
-            "While": "condition,body"
+            "While": "condition,body",
+            "For": "initializer,condition,increment,body"
+        }
+        # environments of the scopes, set by the resolver: a scope with an environment
+        # of its own, or merged into the environment of the enclosing scope. Declarations
+        # of captured variables, and the variables a function captures for its closure. The
+        # property a method returns if the optimizer found it's a trivial getter, and if
+        # the function is pure. The expressions the optimizer hoisted out of a loop
+        caches = {
+            "Block": "scoped,merged",
+            "Class": "captured",
+            "Function": "scoped,upvalues,cells,captured,getter,pure",
+            "Var": "captured",
+            "While": "hoisted",
+            "For": "scoped,merged,hoisted"
+        }
+        lines = {
+            "Block": "None",
+            "Class": "self.name.line",
+            "Expression": "self.expression.line",
+            "Function": "self.name.line",
+            "If": "self.condition.line",
+            "Print": "self.expression.line",
+            "Var": "self.name.line",
+            "Return": "self.keyword.line",
+            "While": "self.condition.line",
+            "For": "None"
         }
     else:
         raise SystemExit("Invalid filename")
     f = open(path, "w")
     comments(f, file_name)
+    if resolved: define_markers(f)
+    define_kinds(f, classes)
     
     for c_name,fields in classes.items():
         # fields = fields.split(",")
         # print(c_name, ":", fields)
-        define_type(f, c_name, fields)
+        define_type(f, c_name, fields, c_name in resolved, caches.get(c_name), c_name in typed)
+        define_line(f, lines[c_name])
         define_visitor(f)
+    define_classes(f, classes)
         
     
 
@@ -0,0 +1,82 @@
+"""Measures the memory per instance of lox objects with many fields and the time of repeated property reads"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_PATH)
+
+from pylox.lox import compile_program, engines
+
+# A linked list of instances which are alive at the end of the script
+ALLOCATE = """
+class Node {{
+  init(next) {{
+    this.next = next;
+{fields}
+  }}
+}}
+
+var head = nil;
+for (var i = 0; i < {count}; i = i + 1) head = Node(head);
+"""
+
+# Reads of the fields of one instance in a loop
+READ = """
+class Point {{
+  init() {{
+{fields}
+  }}
+}}
+
+var point = Point();
+var total = 0;
+for (var i = 0; i < {count}; i = i + 1) {{
+  total = total{reads};
+}}
+print total;
+"""
+
+
+def fields(n):
+    return "\n".join("    this.field{0} = {0};".format(i) for i in range(n))
+
+def memory(engine, n, count):
+    """Returns the bytes allocated per instance with n fields"""
+    statements = compile_program(ALLOCATE.format(fields=fields(n), count=count), "float")
+    tracemalloc.start()
+    engines[engine](statements)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / count
+
+def reads(engine, n, count, runs):
+    """Returns the best seconds of count iterations reading n fields"""
+    src = READ.format(fields=fields(n), count=count, reads="".join(" + point.field{}".format(i) for i in range(n)))
+    best = None
+    for _ in range(runs):
+        statements = compile_program(src, "float")
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            engines[engine](statements)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best: best = elapsed
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engine", choices=("tree", "closure"), default="tree", help="engine running the scripts")
+    parser.add_argument("--fields", type=int, default=16, help="number of fields of the instances")
+    parser.add_argument("--count", type=int, default=20000, help="number of instances, and of iterations of the reads")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs, the best one is reported")
+    args = parser.parse_args()
+
+    print("{} fields: {:.0f} bytes per instance".format(args.fields, memory(args.engine, args.fields, args.count)))
+    elapsed = reads(args.engine, args.fields, args.count, args.runs)
+    print("{} reads in {:.2f}s: {:.0f} reads/s".format(args.fields * args.count, elapsed, args.fields * args.count / elapsed))
@@ -0,0 +1,68 @@
+"""Measures the scanner throughput in MB/s and the memory of the tokens on a generated lox source of the given size"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+TEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test")
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_PATH)
+
+from pylox.scanner.scanner import Scanner
+
+# Ways of scanning the source: a list of tokens or a packed token buffer
+modes = {
+    "tokens": lambda src: Scanner(src).scan_tokens(),
+    "buffer": lambda src: Scanner(src).scan_buffer(),
+}
+
+
+def generate_source(size):
+    """Generates a lox source of at least size bytes by repeating the test scripts which scan without errors"""
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(TEST_PATH, "**", "*.lox"), recursive=True)):
+        with open(path) as f:
+            src = f.read()
+        try:
+            Scanner(src).scan_tokens()
+        except Exception:
+            continue
+        chunks.append(src + "\n")
+    corpus = "".join(chunks)
+    return corpus * (size // len(corpus) + 1)
+
+def benchmark(scan, src, runs):
+    """Scans the source runs times and returns the best elapsed seconds and the token count"""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        tokens = scan(src)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best: best = elapsed
+    return best, len(tokens)
+
+def memory(scan, src):
+    """Returns the bytes allocated for the scanned tokens, which are alive after the scan"""
+    tracemalloc.start()
+    tokens = scan(src)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=float, default=4, help="size of the generated source in MB")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs, the best one is reported")
+    args = parser.parse_args()
+
+    src = generate_source(int(args.size * 1024 * 1024))
+    mb = len(src.encode()) / (1024 * 1024)
+    print("{:.2f} MB source".format(mb))
+    for mode, scan in modes.items():
+        elapsed, count = benchmark(scan, src, args.runs)
+        size = memory(scan, src) / (1024 * 1024)
+        print("{:<8} {} tokens in {:.2f}s: {:.2f} MB/s, {:.0f} tokens/s, {:.1f} MB".format(mode, count, elapsed, mb / elapsed, count / elapsed, size))
@@ -0,0 +1,45 @@
+"""Reports how many nodes of the lox benchmarks specialized and deoptimized on the tree walk interpreter"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_PATH)
+
+from pylox.lox import compile_program, engines
+from pylox.interpreter import stats
+
+DEFAULT_PATH = "../test/benchmark"
+
+
+def run(path):
+    """Runs the script on the tree walk interpreter with cleared counters"""
+    with open(path) as f:
+        statements = compile_program(f.read())
+    stats.reset()
+    with redirect_stdout(io.StringIO()):
+        engines["tree"](statements)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", help="benchmark scripts, defaults to every script in " + DEFAULT_PATH)
+    args = parser.parse_args()
+
+    names = list(stats.specialized)
+    print("{:<24}".format("benchmark") + "".join("{:>20}".format(name) for name in names))
+    totals = {name: [0, 0] for name in names}
+    for path in args.scripts or sorted(glob.glob(os.path.join(DEFAULT_PATH, "*.lox"))):
+        run(path)
+        row = "{:<24}".format(os.path.basename(path))
+        for name in names:
+            totals[name][0] += stats.specialized[name]
+            totals[name][1] += stats.deoptimized[name]
+            row += "{:>20}".format("{} / {}".format(stats.specialized[name], stats.deoptimized[name]))
+        print(row)
+    print("{:<24}".format("total") + "".join("{:>20}".format("{} / {}".format(*totals[name])) for name in names))
+    print("(specialized / deoptimized nodes)")
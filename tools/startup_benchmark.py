@@ -0,0 +1,73 @@
+"""Measures the startup time of a large generated lox script without the compiled program cache, with a cold and a warm cache"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# A function and a class which are declared but never called, so only the frontend runs
+TEMPLATE = """
+fun function{0}(n) {{
+  var total = 0;
+  for (var i = 0; i < n; i = i + 1) {{
+    if (i > {0} and total != nil) total = total + i * 2 - 1;
+    else total = total - 1;
+  }}
+  return total;
+}}
+
+class Class{0} {{
+  init(value) {{
+    this.value = value;
+  }}
+
+  get() {{
+    return this.value + "{0}";
+  }}
+}}
+"""
+
+
+def generate_script(path, functions):
+    """Writes a script with the given number of functions and classes"""
+    with open(path, "w") as f:
+        f.write("".join(TEMPLATE.format(i) for i in range(functions)))
+        f.write('print "done";\n')
+
+def run(path, options):
+    """Runs the script and returns the elapsed seconds"""
+    env = dict(os.environ, PYTHONPATH=SRC_PATH)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "pylox.lox", *options, path], env=env, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, default=2000, help="number of functions and classes of the generated script")
+    parser.add_argument("--runs", type=int, default=3, help="number of runs, the best one is reported")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "startup.lox")
+        generate_script(path, args.functions)
+        print("{:.2f} MB script".format(os.path.getsize(path) / (1024 * 1024)))
+
+        no_cache = min(run(path, ["--no-cache"]) for _ in range(args.runs))
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(os.path.join(directory, "__loxcache__"), ignore_errors=True)
+            cold.append(run(path, []))
+        warm = min(run(path, []) for _ in range(args.runs))
+
+        print("{:<10} {:.3f}s".format("no cache", no_cache))
+        print("{:<10} {:.3f}s".format("cold", min(cold)))
+        print("{:<10} {:.3f}s ({:.1f}x)".format("warm", warm, no_cache / warm))
+    finally:
+        shutil.rmtree(directory)